@@ -0,0 +1,37 @@
+"""Times `PyssectGraph.clean_graph` on synthetic functions with thousands of nested `if`/`for` blocks.
+
+Run from the repository root with `python benchmarks/clean_graph_bench.py`. The time per node should stay flat as
+the number of blocks grows.
+"""
+from typing import List
+import ast
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from pyssect import ASTtoCFG, PyssectGraph
+from corpus import nested_blocks
+
+
+def time_clean(blocks: int, repeat: int = 3) -> List[float]:
+  tree = ast.parse(nested_blocks(blocks))
+  timings = []
+  for _ in range(repeat):
+    cfg: PyssectGraph = ASTtoCFG().build(tree)['synthetic']
+    nodes = len(cfg.nodes)
+    start = time.perf_counter()
+    cfg.clean_graph()
+    timings.append(time.perf_counter() - start)
+  return [nodes, min(timings)]
+
+
+def main():
+  print(f"{'blocks':>8} {'nodes':>8} {'seconds':>10} {'us/node':>9}")
+  for blocks in [250, 500, 1000, 2000, 4000]:
+    nodes, seconds = time_clean(blocks)
+    print(f"{blocks:>8} {nodes:>8} {seconds:>10.4f} {seconds / nodes * 1e6:>9.2f}")
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,70 @@
+"""Source corpora for the benchmarks: the standard library plus synthetic worst cases."""
+from typing import Dict, Optional
+import glob
+import os
+import sysconfig
+
+
+def stdlib_sources(limit: Optional[int] = None) -> Dict[str, str]:
+  """Returns the top level modules of the running python's standard library, keyed by file name"""
+  sources = {}
+  for path in sorted(glob.glob(os.path.join(sysconfig.get_paths()['stdlib'], '*.py')))[:limit]:
+    with open(path, 'r', encoding='utf-8') as f:
+      try:
+        sources[os.path.basename(path)] = f.read()
+      except UnicodeDecodeError:
+        continue
+  return sources
+
+
+def nested_blocks(blocks: int, depth: int = 4) -> str:
+  """Returns the source of a function made of `blocks` sequential blocks of `for`/`if` statements nested `depth`
+  levels deep"""
+  lines = ['def synthetic(xs):', '  y = 0']
+  for block in range(blocks):
+    indent = '  '
+    for level in range(depth):
+      if level % 2 == 0:
+        lines.append(f"{indent}for i_{block}_{level} in xs:")
+      else:
+        lines.append(f"{indent}if i_{block}_{level - 1} > {level}:")
+      indent += '  '
+    lines.append(f"{indent}y += {block}")
+  lines.append('  return y')
+  return '\n'.join(lines)
+
+
+def deep_loops(depth: int = 50) -> str:
+  """Returns the source of a function with `depth` directly nested `while`/`for` loops"""
+  lines = ['def deep(xs):']
+  indent = '  '
+  for level in range(depth):
+    lines.append(f"{indent}{'while xs' if level % 2 else f'for i_{level} in xs'}:")
+    indent += '  '
+  lines.append(f"{indent}xs = xs[1:]")
+  return '\n'.join(lines)
+
+
+def try_ladder(handlers: int = 2000) -> str:
+  """Returns the source of a function with one `try` statement followed by `handlers` except clauses"""
+  lines = ['def ladder(x):', '  try:', '    x = int(x)']
+  for i in range(handlers):
+    lines.extend([f"  except E{i}:", f"    x = {i}"])
+  lines.extend(['  else:', '    x += 1', '  finally:', '    print(x)', '  return x'])
+  return '\n'.join(lines)
+
+
+def many_functions(functions: int = 5000) -> str:
+  """Returns the source of a module with `functions` small functions"""
+  return '\n'.join(
+    f"def f_{i}(x):\n  if x > {i}:\n    return x\n  return {i}\n" for i in range(functions)
+  )
+
+
+def synthetic_sources() -> Dict[str, str]:
+  return {
+    'nested_blocks': nested_blocks(2000),
+    'deep_loops': deep_loops(),
+    'try_ladder': try_ladder(),
+    'many_functions': many_functions()
+  }
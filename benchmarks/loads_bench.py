@@ -0,0 +1,69 @@
+"""Times `pyssect_loads` against the `object_hook` decoder it replaced, on json dumps of the standard library and the
+synthetic corpora.
+
+Run from the repository root with `python benchmarks/loads_bench.py`. Both decoders read the same text into the same
+graphs, the hook guessing the kind of every json object from its keys as it is parsed. Both are timed with the garbage
+collector on, and again with it off, which leaves out the collections triggered by the objects they allocate.
+"""
+from typing import Dict, List, Tuple
+import gc
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from pyssect import ASTtoCFG, ControlEvent, Location, PyssectGraph, PyssectNode, pyssect_dumps, pyssect_loads
+from corpus import stdlib_sources, synthetic_sources
+import ast
+
+
+def hook_loads(text: str):
+  """The decoder `pyssect_loads` used before it followed the schema, skipping the `version` it predates"""
+
+  def _object_hook(obj):
+    if 'name' in obj and 'cur' in obj and 'root' in obj:
+      obj.pop('version', None)
+      return PyssectGraph(**obj)
+    if 'line' in obj and 'column' in obj:
+      return Location(obj['line'], obj['column'])
+    if 'parents' in obj and 'children' in obj:
+      obj['parents'] = {name: ControlEvent(event) for name, event in obj['parents'].items()}
+      obj['children'] = {name: ControlEvent(event) for name, event in obj['children'].items()}
+      return PyssectNode(**obj)
+    return obj
+
+  return json.loads(text, object_hook=_object_hook)
+
+
+def time_loads(texts: List[str], collect: bool, repeat: int = 3) -> Tuple[float, float]:
+  """Returns the best time of each decoder over texts, with the garbage collector on when collect is true"""
+  timings = {hook_loads: [], pyssect_loads: []}
+  for _ in range(repeat):
+    for loads, times in timings.items():
+      gc.collect()
+      if not collect:
+        gc.disable()
+      start = time.perf_counter()
+      for text in texts:
+        loads(text)
+      times.append(time.perf_counter() - start)
+      gc.enable()
+  return min(timings[hook_loads]), min(timings[pyssect_loads])
+
+
+def main():
+  corpora: Dict[str, Dict[str, str]] = {'stdlib': stdlib_sources()}
+  corpora.update({name: {name: source} for name, source in synthetic_sources().items()})
+  print(f"{'corpus':<16} {'MiB':>7} {'gc':>4} {'hook s':>8} {'schema s':>9} {'speedup':>8}")
+  for name, sources in corpora.items():
+    texts = [pyssect_dumps(ASTtoCFG().build(ast.parse(source)), indent=None) for source in sources.values()]
+    size = sum(len(text) for text in texts) / 2 ** 20
+    for collect in [True, False]:
+      hook, schema = time_loads(texts, collect)
+      state = 'on' if collect else 'off'
+      print(f"{name:<16} {size:>7.1f} {state:>4} {hook:>8.3f} {schema:>9.3f} {hook / schema:>7.2f}x")
+
+
+if __name__ == '__main__':
+  main()
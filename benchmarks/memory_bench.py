@@ -0,0 +1,53 @@
+"""Measures the memory held by built graphs, in bytes per node, on the standard library and the synthetic corpora.
+
+Run from the repository root with `python benchmarks/memory_bench.py`. Sources are parsed before tracing starts, so
+only what the builder allocates is counted: nodes, their locations, names and edge dictionaries, and the graphs. The
+ast nodes held in node contents are shared with the parsed trees and are not counted.
+"""
+from typing import Dict, Tuple
+import ast
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from pyssect import ASTtoCFG, pyssect_loads, pyssect_dumps
+from corpus import stdlib_sources, synthetic_sources
+
+
+def built_bytes(sources: Dict[str, str]) -> Tuple[int, int, int]:
+  """Returns the node count of the builds of sources, with the bytes they retain when built and when loaded back from
+  json"""
+  trees = [ast.parse(source) for source in sources.values()]
+  gc.collect()
+  tracemalloc.start()
+  builds = [ASTtoCFG().build(tree) for tree in trees]
+  gc.collect()
+  built, _ = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+
+  nodes = sum(len(cfg.nodes) for cfg_dict in builds for cfg in cfg_dict.values())
+  texts = [pyssect_dumps(cfg_dict, indent=None) for cfg_dict in builds]
+  del builds, trees
+  gc.collect()
+  tracemalloc.start()
+  loaded = [pyssect_loads(text) for text in texts]
+  gc.collect()
+  loaded_bytes, _ = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  del loaded
+  return nodes, built, loaded_bytes
+
+
+def main():
+  corpora = {'stdlib': stdlib_sources()}
+  corpora.update({name: {name: source} for name, source in synthetic_sources().items()})
+  print(f"{'corpus':<16} {'nodes':>8} {'built B/node':>13} {'loaded B/node':>14}")
+  for name, sources in corpora.items():
+    nodes, built, loaded = built_bytes(sources)
+    print(f"{name:<16} {nodes:>8} {built / nodes:>13.1f} {loaded / nodes:>14.1f}")
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,52 @@
+"""Times `collect_metrics` over the standard library and over a synthetic project of 50,000 functions.
+
+Run from the repository root with `python benchmarks/metrics_bench.py`. Graphs are built beforehand, and the cache of
+each graph's metrics is cleared between runs so every run walks every graph.
+"""
+from typing import Dict, Tuple
+import ast
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from pyssect import ASTtoCFG, PyssectGraph, collect_metrics, pyssect_dumps
+from corpus import stdlib_sources, many_functions, nested_blocks
+
+
+def project(functions: int, modules: int = 50) -> Dict[str, Dict[str, PyssectGraph]]:
+  """Returns the builds of modules mixing small functions with a few long nested ones"""
+  per_module = functions // modules
+  source = many_functions(per_module - 1) + '\n' + nested_blocks(40)
+  return {f"module_{i}.py": ASTtoCFG().build(ast.parse(source)) for i in range(modules)}
+
+
+def time_metrics(builds: Dict[str, Dict[str, PyssectGraph]], repeat: int = 3) -> Tuple[int, int, float, float]:
+  """Returns the graph and node counts of builds, with the best time of `collect_metrics` and of dumping its table"""
+  timings = []
+  for _ in range(repeat):
+    for cfg_dict in builds.values():
+      for cfg in cfg_dict.values():
+        cfg._analyses.pop('metrics', None)
+    start = time.perf_counter()
+    table = collect_metrics(builds)
+    timings.append(time.perf_counter() - start)
+  start = time.perf_counter()
+  pyssect_dumps(table, indent=None)
+  dumped = time.perf_counter() - start
+  return len(table), sum(table['nodes']), min(timings), dumped
+
+
+def main():
+  corpora = {
+    'stdlib': {name: ASTtoCFG().build(ast.parse(source)) for name, source in stdlib_sources().items()},
+    'project_50k': project(50000)
+  }
+  print(f"{'corpus':<12} {'graphs':>8} {'nodes':>9} {'metrics s':>10} {'dumps s':>8} {'us/graph':>9}")
+  for name, builds in corpora.items():
+    graphs, nodes, seconds, dumped = time_metrics(builds)
+    print(f"{name:<12} {graphs:>8} {nodes:>9} {seconds:>10.3f} {dumped:>8.3f} {seconds / graphs * 1e6:>9.1f}")
+
+
+if __name__ == '__main__':
+  main()
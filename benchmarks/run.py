@@ -0,0 +1,154 @@
+"""Benchmark harness for the build, clean, walk and serialize hot paths.
+
+Run from the repository root:
+
+  python benchmarks/run.py --save        # record a baseline to benchmarks/baseline.json
+  python benchmarks/run.py               # compare against the baseline, exit 1 on a regression
+
+Baselines depend on the machine and are not committed: record one before comparing, on the machine that compares.
+Comparing without a baseline exits 2, before running any case.
+
+Each case is timed as the best of `--repeat` runs, and its peak memory is measured in a separate run under
+tracemalloc. A case regresses when its time or peak memory grows by more than `--threshold` over the baseline.
+"""
+from typing import Any, Callable, Dict, List, Tuple
+import argparse
+import ast
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from pyssect import ASTtoCFG, PyssectGraph, pyssect_dumps, pyssect_loads
+from corpus import stdlib_sources, synthetic_sources
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def build_all(trees: List[ast.AST]) -> List[Dict[str, PyssectGraph]]:
+  return [ASTtoCFG().build(tree) for tree in trees]
+
+
+def clean_all(cfg_dicts: List[Dict[str, PyssectGraph]]) -> None:
+  for cfg_dict in cfg_dicts:
+    for cfg in cfg_dict.values():
+      cfg.clean_graph()
+
+
+def walk_all(cfg_dicts: List[Dict[str, PyssectGraph]]) -> None:
+  for cfg_dict in cfg_dicts:
+    for cfg in cfg_dict.values():
+      cfg.go_to_root()
+      for _ in cfg.walk():
+        pass
+
+
+def cases(sources: Dict[str, str]) -> List[Tuple[str, Callable[[], Any], Callable[[Any], Any]]]:
+  """Returns `(name, setup, run)` triples for one corpus. `setup` is untimed and its result is passed to `run`"""
+  trees = lambda: [ast.parse(source) for source in sources.values()]
+  built = lambda: build_all(trees())
+  return [
+    ('parse', lambda: list(sources.values()), lambda texts: [ast.parse(text) for text in texts]),
+    ('build', trees, build_all),
+    ('clean_graph', built, clean_all),
+    ('walk', built, walk_all),
+    ('dumps', built, lambda cfg_dicts: [pyssect_dumps(cfg_dict) for cfg_dict in cfg_dicts]),
+    (
+      'loads',
+      lambda: [pyssect_dumps(cfg_dict) for cfg_dict in built()],
+      lambda texts: [pyssect_loads(text) for text in texts]
+    )
+  ]
+
+
+def measure(setup: Callable[[], Any], run: Callable[[Any], Any], repeat: int) -> Dict[str, float]:
+  seconds = float('inf')
+  for _ in range(repeat):
+    arg = setup()
+    start = time.perf_counter()
+    run(arg)
+    seconds = min(seconds, time.perf_counter() - start)
+
+  arg = setup()
+  tracemalloc.start()
+  run(arg)
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  return {'seconds': seconds, 'peak_bytes': peak}
+
+
+def run_benchmarks(repeat: int, stdlib_limit: int, only: str) -> Dict[str, Dict[str, float]]:
+  corpora = {'stdlib': stdlib_sources(stdlib_limit)}
+  corpora.update({name: {name: source} for name, source in synthetic_sources().items()})
+
+  results = {}
+  for corpus_name, sources in corpora.items():
+    for case_name, setup, run in cases(sources):
+      name = f"{corpus_name}.{case_name}"
+      if only and only not in name:
+        continue
+      results[name] = measure(setup, run, repeat)
+      print(f"{name:<32} {results[name]['seconds']:>10.4f}s {results[name]['peak_bytes'] / 2 ** 20:>10.2f}MiB")
+  return results
+
+
+def regressions(
+  results: Dict[str, Dict[str, float]],
+  baseline: Dict[str, Dict[str, float]],
+  threshold: float,
+  noise: Dict[str, float]
+) -> List[str]:
+  """Returns the cases whose metrics grew by more than `threshold` relative to the baseline. Growth smaller than the
+  absolute `noise` floor of a metric is ignored, so sub-millisecond cases do not fail on timer jitter"""
+  found = []
+  for name, result in results.items():
+    if name not in baseline:
+      continue
+    for metric in ['seconds', 'peak_bytes']:
+      growth = result[metric] - baseline[name][metric]
+      if growth > baseline[name][metric] * threshold and growth > noise[metric]:
+        found.append(f"{name} {metric}: {baseline[name][metric]:.6g} -> {result[metric]:.6g}")
+  return found
+
+
+def main() -> int:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline json file')
+  parser.add_argument('--save', action='store_true', help='write the results as the new baseline')
+  parser.add_argument('--threshold', type=float, default=0.25, help='allowed relative growth before failing')
+  parser.add_argument('--min-seconds', type=float, default=0.005, help='ignore time growth below this many seconds')
+  parser.add_argument('--min-bytes', type=int, default=64 * 1024, help='ignore memory growth below this many bytes')
+  parser.add_argument('--repeat', type=int, default=3, help='timed runs per case')
+  parser.add_argument('--stdlib-limit', type=int, default=None, help='number of stdlib modules to use')
+  parser.add_argument('--only', default='', help='only run cases whose name contains this string')
+  args = parser.parse_args()
+
+  if not args.save and not os.path.exists(args.baseline):
+    print(f"No baseline at {args.baseline}, record one on this machine with --save first", file=sys.stderr)
+    return 2
+
+  results = run_benchmarks(args.repeat, args.stdlib_limit, args.only)
+  if args.save:
+    with open(args.baseline, 'w') as f:
+      json.dump({'python': platform.python_version(), 'results': results}, f, indent=2)
+    print(f"Saved baseline to {args.baseline}")
+    return 0
+
+  with open(args.baseline, 'r') as f:
+    baseline = json.load(f)
+  if baseline.get('python') != platform.python_version():
+    print(f"Baseline was recorded on python {baseline.get('python')}, comparing anyway")
+
+  floors = {'seconds': args.min_seconds, 'peak_bytes': args.min_bytes}
+  found = regressions(results, baseline['results'], args.threshold, floors)
+  for regression in found:
+    print(f"REGRESSION {regression}")
+  return 1 if found else 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
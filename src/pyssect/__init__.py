@@ -1,4 +1,21 @@
-from .node import PyssectNode, Location, ControlEvent
+from .node import PyssectNode, Location, ControlEvent, StatementRecord
 from .graph import PyssectGraph
-from .builders import ASTtoCFG, builds, builds_file
-from .serializers import pyssect_dumps, pyssect_loads
\ No newline at end of file
+from .dominators import DominatorTree
+from .frozen import FrozenGraph
+from .fingerprint import DedupStore, structural_hash, structural_hashes
+from .builders import (
+  ASTtoCFG, CodetoCFG, LazyCFG, builds, builds_file, builds_tree, builds_lazy, builds_code, builds_pyc
+)
+from .serializers import pyssect_dumps, pyssect_dump, pyssect_iterdumps, pyssect_loads, SchemaError
+from .cache import GraphCache
+from .binary import pyssect_bdumps, pyssect_bdump, pyssect_bloads, pyssect_bload, BinaryGraphStore
+from .incremental import IncrementalBuilder
+from .dataflow import DataflowAnalysis, BitsetAnalysis, solve, live_variables, reaching_definitions, def_use_chains
+from .callgraph import CallGraph, CallSite, module_imports
+from .instrumentation import Instrumentation, Sink, LoggingSink, JsonLinesSink, ReportSink
+from .trace import LineIndex, TraceOverlay
+from .locations import LocationIndex, NodeSpan
+from .aio import AsyncRunner, abuilds, abuilds_file, apyssect_dumps, apyssect_loads, apyssect_iterdumps, apyssect_dump
+from .diff import Patch, GraphPatch, diff, diff_graphs, apply_patch, apply_graph_patch
+from .records import drop_ast, rehydrate, rehydrate_file
+from .metrics import GraphMetrics, MetricsTable, graph_metrics, collect_metrics
\ No newline at end of file
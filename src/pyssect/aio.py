@@ -0,0 +1,190 @@
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Optional, TypeVar
+from weakref import WeakKeyDictionary
+from .builders import builds, builds_file
+from .cache import GraphCache
+from .graph import PyssectGraph
+from .serializers import pyssect_dumps, pyssect_iterdumps, pyssect_loads
+import asyncio
+import os
+
+
+T = TypeVar('T')
+
+
+class AsyncRunner:
+  """Runs builds and serialization off the event loop, on `executor`, with at most `max_concurrency` calls running or
+  queued in the executor at a time. Calls past the limit wait on the event loop without taking a worker.
+
+  With no executor, the runner starts its own pool of `max_concurrency` threads, which keeps the loop responsive but
+  shares the GIL. A `ProcessPoolExecutor` runs builds in parallel, at the cost of pickling their graphs back. Thread
+  pools run calls in a copy of the caller's context, so an active `Instrumentation` records them.
+
+  Cancelling a call that has not started yet removes it from the executor. A call already running cannot be
+  interrupted, and keeps its slot until it finishes so the limit holds, while its result is dropped. `iterdumps`
+  encodes one chunk per call, so it stops between chunks.
+  """
+  executor: Optional[Executor]
+  max_concurrency: int
+
+
+  def __init__(self, executor: Optional[Executor] = None, max_concurrency: Optional[int] = None):
+    self.executor = executor
+    self.max_concurrency = max_concurrency or os.cpu_count() or 1
+    self._own_executor: Optional[ThreadPoolExecutor] = None
+    self._semaphores: 'WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]' = WeakKeyDictionary()
+
+
+  async def builds(
+    self,
+    source: str,
+    do_clean: bool = False,
+    cache: Optional[GraphCache] = None
+  ) -> Dict[str, PyssectGraph]:
+    """Awaitable `builds`"""
+    return await self.run(builds, source, do_clean, cache)
+
+
+  async def builds_file(
+    self,
+    file: str,
+    do_clean: bool = False,
+    cache: Optional[GraphCache] = None
+  ) -> Dict[str, PyssectGraph]:
+    """Awaitable `builds_file`, reading the file in the executor as well"""
+    return await self.run(builds_file, file, do_clean, cache)
+
+
+  async def dumps(self, obj: Any, indent: int = 2, simple: bool = False) -> str:
+    """Awaitable `pyssect_dumps`"""
+    return await self.run(pyssect_dumps, obj, indent, simple)
+
+
+  async def loads(self, str: str) -> Any:
+    """Awaitable `pyssect_loads`"""
+    return await self.run(pyssect_loads, str)
+
+
+  async def iterdumps(
+    self,
+    obj: Any,
+    indent: int = 2,
+    simple: bool = False,
+    chunk_size: int = 65536
+  ) -> AsyncIterator[str]:
+    """Asynchronous `pyssect_iterdumps`, encoding each chunk in a thread. Chunks are encoded in the runner's own
+    threads when its executor runs processes, since a generator cannot be sent to another process"""
+    chunks = pyssect_iterdumps(obj, indent, simple, chunk_size)
+    while True:
+      chunk = await self.run(next, chunks, None, executor=self._threads())
+      if chunk is None:
+        return
+      yield chunk
+
+
+  async def dump(self, obj: Any, fp: Any, indent: int = 2, simple: bool = False, chunk_size: int = 65536) -> None:
+    """Asynchronous `pyssect_dump`. fp is either an `asyncio.StreamWriter`, drained after every chunk, or a text file
+    like object, written to in the executor"""
+    async for chunk in self.iterdumps(obj, indent, simple, chunk_size):
+      if isinstance(fp, asyncio.StreamWriter):
+        fp.write(chunk.encode('utf-8'))
+        await fp.drain()
+      else:
+        await self.run(fp.write, chunk, executor=self._threads())
+
+
+  async def run(self, function: Callable[..., T], *args: Any, executor: Optional[Executor] = None) -> T:
+    """Calls function with args in the executor, once one of the `max_concurrency` slots is free"""
+    loop = asyncio.get_running_loop()
+    semaphore = self._semaphores.get(loop)
+    if semaphore is None:
+      semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+
+    await semaphore.acquire()
+    try:
+      future = self._submit(executor or self.executor or self._own(), function, args)
+    except BaseException:
+      semaphore.release()
+      raise
+    future.add_done_callback(lambda _: _release(loop, semaphore))
+    return await asyncio.wrap_future(future)
+
+
+  def close(self) -> None:
+    """Shuts down the threads started by the runner. A given executor is left to its owner"""
+    if self._own_executor is not None:
+      self._own_executor.shutdown(wait=False, cancel_futures=True)
+      self._own_executor = None
+
+
+  def _own(self) -> ThreadPoolExecutor:
+    if self._own_executor is None:
+      self._own_executor = ThreadPoolExecutor(self.max_concurrency, thread_name_prefix='pyssect')
+    return self._own_executor
+
+
+  def _threads(self) -> Optional[Executor]:
+    """Returns the runner's own threads if its executor runs processes, for calls that cannot be sent to one"""
+    return self._own() if isinstance(self.executor, ProcessPoolExecutor) else None
+
+
+  def _submit(self, executor: Executor, function: Callable[..., T], args: Any) -> 'Future[T]':
+    if isinstance(executor, ProcessPoolExecutor):
+      return executor.submit(function, *args)
+    return executor.submit(copy_context().run, partial(function, *args))
+
+
+def _release(loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore) -> None:
+  if not loop.is_closed():
+    loop.call_soon_threadsafe(semaphore.release)
+
+
+_default: Optional[AsyncRunner] = None
+
+
+def default_runner() -> AsyncRunner:
+  """Returns the runner used by the module level functions, a thread pool of one thread per cpu"""
+  global _default
+  if _default is None:
+    _default = AsyncRunner()
+  return _default
+
+
+def set_default_runner(runner: AsyncRunner) -> None:
+  """Replaces the runner used by the module level functions"""
+  global _default
+  _default = runner
+
+
+async def abuilds(
+  source: str,
+  do_clean: bool = False,
+  cache: Optional[GraphCache] = None
+) -> Dict[str, PyssectGraph]:
+  return await default_runner().builds(source, do_clean, cache)
+
+
+async def abuilds_file(
+  file: str,
+  do_clean: bool = False,
+  cache: Optional[GraphCache] = None
+) -> Dict[str, PyssectGraph]:
+  return await default_runner().builds_file(file, do_clean, cache)
+
+
+async def apyssect_dumps(obj: Any, indent: int = 2, simple: bool = False) -> str:
+  return await default_runner().dumps(obj, indent, simple)
+
+
+async def apyssect_loads(str: str) -> Any:
+  return await default_runner().loads(str)
+
+
+def apyssect_iterdumps(obj: Any, indent: int = 2, simple: bool = False, chunk_size: int = 65536) -> AsyncIterator[str]:
+  return default_runner().iterdumps(obj, indent, simple, chunk_size)
+
+
+async def apyssect_dump(obj: Any, fp: Any, indent: int = 2, simple: bool = False, chunk_size: int = 65536) -> None:
+  await default_runner().dump(obj, fp, indent, simple, chunk_size)
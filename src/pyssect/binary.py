@@ -0,0 +1,192 @@
+from array import array
+from collections.abc import Mapping
+from typing import IO, Any, Dict, Iterator, List, Union
+from .frozen import FrozenGraph
+from .graph import PyssectGraph
+from .serializers import render_content
+import mmap
+import struct
+import sys
+
+
+MAGIC = b'PYSG'
+VERSION = 1
+_HEADER = struct.Struct('<4sHcx')
+_LENGTH = struct.Struct('<I')
+_BYTEORDER = b'<' if sys.byteorder == 'little' else b'>'
+
+# Layout, all sections are prefixed by their length as a little endian u32 and padded to four bytes:
+#   header: magic, u16 version, byte order of the sections
+#   string table: u32 offsets into the utf-8 blob, blob
+#   directory: u64 (key string id, byte offset of the graph) pairs
+#   per graph: u32 (name string id, root, cur), u32 name ids, u32 type ids, u32 successor offsets, u32 successor
+#   targets, u8 successor events, u32 predecessor offsets, u32 predecessor targets, u8 predecessor events,
+#   i32 locations, u32 content offsets, u32 content string ids
+
+
+def pyssect_bdumps(cfg_dict: Dict[str, Union[PyssectGraph, FrozenGraph]]) -> bytes:
+  """Returns the versioned binary representation of a dictionary of Control Flow Graphs. Node contents are stored as
+  their rendered source strings"""
+  strings: Dict[str, int] = {}
+
+  def sid(s: str) -> int:
+    return strings.setdefault(s, len(strings))
+
+  graphs = []
+  for key, graph in cfg_dict.items():
+    graphs.append((sid(key), _pack_graph(graph if isinstance(graph, FrozenGraph) else graph.freeze(), sid)))
+
+  offsets, blob = array('I', [0]), bytearray()
+  for s in strings:
+    blob += s.encode('utf-8')
+    offsets.append(len(blob))
+
+  out = bytearray(_HEADER.pack(MAGIC, VERSION, _BYTEORDER))
+  _write_section(out, offsets)
+  _write_section(out, blob)
+
+  # Graph offsets depend on the size of the directory, which has a fixed size per graph
+  base = len(out) + _LENGTH.size + 16 * len(graphs)
+  directory = array('Q')
+  for key_sid, packed in graphs:
+    directory.extend((key_sid, base))
+    base += len(packed)
+  _write_section(out, directory)
+  for _, packed in graphs:
+    out += packed
+  return bytes(out)
+
+
+def pyssect_bdump(cfg_dict: Dict[str, Union[PyssectGraph, FrozenGraph]], fp: IO[bytes]) -> None:
+  """Writes the binary representation of a dictionary of Control Flow Graphs to a binary file like object"""
+  fp.write(pyssect_bdumps(cfg_dict))
+
+
+def pyssect_bloads(buffer: Any) -> 'BinaryGraphStore':
+  """Returns a lazy mapping of Control Flow Graphs over a buffer holding their binary representation"""
+  return BinaryGraphStore(buffer)
+
+
+def pyssect_bload(file: str) -> 'BinaryGraphStore':
+  """Memory maps a binary graph file and returns a lazy mapping of its Control Flow Graphs"""
+  with open(file, 'rb') as f:
+    return BinaryGraphStore(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def _pack_graph(graph: FrozenGraph, sid) -> bytes:
+  content_offsets, content_ids = array('I', [0]), array('I')
+  for contents in graph.contents:
+    content_ids.extend(sid(render_content(content)) for content in contents)
+    content_offsets.append(len(content_ids))
+
+  out = bytearray()
+  for section in [
+    array('I', [sid(graph.name), graph.root, graph.cur]),
+    array('I', [sid(name) for name in graph.names]),
+    array('I', [sid(type) for type in graph.types]),
+    graph.succ_offsets, graph.succ_targets, graph.succ_events,
+    graph.pred_offsets, graph.pred_targets, graph.pred_events,
+    graph.locations, content_offsets, content_ids
+  ]:
+    _write_section(out, section)
+  return bytes(out)
+
+
+def _write_section(out: bytearray, section: Any) -> None:
+  payload = section.tobytes() if isinstance(section, array) else bytes(section)
+  out += _LENGTH.pack(len(payload))
+  out += payload
+  out += bytes(-len(payload) % 4)
+
+
+class BinaryGraphStore(Mapping):
+  """A read only mapping of graph names to `PyssectGraph`s, decoded lazily from a binary buffer such as a memory
+  mapped file. `frozen` returns a `FrozenGraph` whose arrays are views into the buffer rather than copies"""
+
+  def __init__(self, buffer: Any):
+    self._buffer = buffer
+    self._view = memoryview(buffer)
+    magic, version, byteorder = _HEADER.unpack_from(self._view)
+    if magic != MAGIC:
+      raise ValueError('Not a pyssect binary graph file')
+    if version != VERSION:
+      raise ValueError(f"Unsupported pyssect binary version {version}, expected {VERSION}")
+    if byteorder != _BYTEORDER:
+      raise ValueError('Pyssect binary graph file was written with a different byte order')
+
+    sections = self._read_sections(_HEADER.size, 3)
+    self._string_offsets = sections[0].cast('I')
+    self._string_blob = sections[1]
+    directory = sections[2].cast('Q')
+    self._offsets = {self._string(directory[i]): directory[i + 1] for i in range(0, len(directory), 2)}
+
+
+  def __getitem__(self, key: str) -> PyssectGraph:
+    return self.frozen(key).thaw()
+
+
+  def __iter__(self) -> Iterator[str]:
+    return iter(self._offsets)
+
+
+  def __len__(self) -> int:
+    return len(self._offsets)
+
+
+  def frozen(self, key: str) -> FrozenGraph:
+    """Decodes graph key into a `FrozenGraph` backed by the buffer"""
+    sections = self._read_sections(self._offsets[key], 12)
+    meta, names, types, succ_offsets, succ_targets, succ_events, \
+      pred_offsets, pred_targets, pred_events, locations, content_offsets, content_ids = sections
+    name, root, cur = meta.cast('I')
+    content_offsets, content_ids = content_offsets.cast('I'), content_ids.cast('I')
+    return FrozenGraph(
+      name=self._string(name),
+      root=root,
+      cur=cur,
+      names=tuple(self._string(i) for i in names.cast('I')),
+      types=tuple(self._string(i) for i in types.cast('I')),
+      succ_offsets=succ_offsets.cast('I'),
+      succ_targets=succ_targets.cast('I'),
+      succ_events=succ_events,
+      pred_offsets=pred_offsets.cast('I'),
+      pred_targets=pred_targets.cast('I'),
+      pred_events=pred_events,
+      locations=locations.cast('i'),
+      contents=tuple(
+        tuple(self._string(content_ids[j]) for j in range(content_offsets[i], content_offsets[i + 1]))
+        for i in range(len(content_offsets) - 1)
+      )
+    )
+
+
+  def close(self) -> None:
+    """Releases the buffer, closing it if it is a memory map. Frozen graphs taken from the store must be released
+    first"""
+    self._string_offsets.release()
+    self._string_blob.release()
+    self._view.release()
+    if isinstance(self._buffer, mmap.mmap):
+      self._buffer.close()
+
+
+  def __enter__(self) -> 'BinaryGraphStore':
+    return self
+
+
+  def __exit__(self, *args) -> None:
+    self.close()
+
+
+  def _string(self, i: int) -> str:
+    return str(self._string_blob[self._string_offsets[i]:self._string_offsets[i + 1]], 'utf-8')
+
+
+  def _read_sections(self, offset: int, count: int) -> List[memoryview]:
+    sections = []
+    for _ in range(count):
+      length, = _LENGTH.unpack_from(self._view, offset)
+      offset += _LENGTH.size
+      sections.append(self._view[offset:offset + length])
+      offset += length + (-length % 4)
+    return sections
@@ -1,16 +1,45 @@
-from dataclasses import dataclass
+from bisect import bisect_right
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from types import CodeType, FrameType, FunctionType
 from .graph import PyssectGraph
-from .node import PyssectNode, Location, ControlEvent
-from typing import Any, Iterator, List, Dict, Union
-from inspect import getsource
+from .node import PyssectNode, Location, ControlEvent, instruction_line
+from .serializers import pyssect_dumps, pyssect_loads
+from .cache import GraphCache
+from .records import drop_ast
+from .instrumentation import Instrumentation, current, phase
+from collections.abc import Mapping
+from typing import Any, Iterable, Iterator, List, Dict, Optional, Tuple, Union
+from inspect import CO_OPTIMIZED, getsource
+from itertools import islice
+from time import perf_counter
 import dis
 import ast
+import importlib.util
+import marshal
+import os
+import sys
+import textwrap
+
+
+Span = Tuple[int, int]
+Prebuilt = Dict[ast.AST, List[Tuple[str, PyssectGraph, Span]]]
 
 
 class ASTtoCFG(ast.NodeVisitor):
-  """Class that extends the ast Node Visitor class, builds a PyssectGraph from an ast"""
+  """Class that extends the ast Node Visitor class, builds a PyssectGraph from an ast.
+
+  Function graphs are keyed and named by their qualified name, as in `__qualname__`, so methods of different classes
+  and nested functions do not overwrite each other. `spans` maps each graph in `cfg_dict` to the first and last source
+  line of the definition that produced it. Graphs for function or class definitions found in `prebuilt` are taken
+  from it instead of being visited again.
+  """
   cfg_dict: Dict[str, PyssectGraph]
+  spans: Dict[str, Span]
+  prebuilt: Prebuilt
+  reusing: bool
+  lazy: bool
+  instrumentation: Optional[Instrumentation]
+  scope: List[str]
   cfg: PyssectGraph
   cur_event: ControlEvent
   interrupting: bool
@@ -23,36 +52,83 @@ class ASTtoCFG(ast.NodeVisitor):
     super().__init__()
 
 
-  def build(self, node: ast.AST, do_clean: bool = False) -> Dict[str, PyssectGraph]:
+  def build(
+    self,
+    node: ast.AST,
+    do_clean: bool = False,
+    prebuilt: Optional[Prebuilt] = None,
+    lazy: bool = False
+  ) -> Dict[str, PyssectGraph]:
+    """Builds the graphs of a module. A lazy build only builds `__main__`, with function definitions attached to it but
+    not visited, see `build_function`"""
     self._init_instances()
+    self.prebuilt = prebuilt or {}
+    self.lazy = self.reusing = lazy
     cfg = PyssectGraph('__main__', nodes={'root': PyssectNode('root')})
     self.cfg_dict['__main__'] = cfg
+    self.spans['__main__'] = (getattr(node, 'lineno', 1), _end_line(node))
     self.cfg = cfg
-    if hasattr(node, 'body'):
-      self._visit_block(node.body)
-    else:
-      self.visit(node)
-
+    with phase('visit'):
+      if hasattr(node, 'body'):
+        self._visit_block(node.body)
+      else:
+        self.visit(node)
+
+    reused = {name for graphs in self.prebuilt.values() for name, _, _ in graphs}
+    built = [cfg for name, cfg in self.cfg_dict.items() if name not in reused]
+    if self.instrumentation is not None:
+      self.instrumentation.count_graphs(built)
     if do_clean:
-      self.clean_graphs()
+      _clean(built)
 
     return self.cfg_dict
 
 
+  def build_function(self, node: ast.FunctionDef, scope: List[str], do_clean: bool = False) -> PyssectGraph:
+    """Builds the graph of a single function definition, nested in the classes and functions of scope as in
+    `__qualname__`. As in a lazy build, the definitions nested in the function are attached to it but not visited"""
+    self._init_instances()
+    self.lazy = True
+    self.scope = list(scope)
+
+    # The definition is attached to a placeholder graph standing in for its enclosing scope
+    self.cfg = self.cfg_dict[''] = PyssectGraph('', nodes={'root': PyssectNode('root')})
+    with phase('visit'):
+      self.visit(node)
+    cfg = self.cfg_dict['.'.join(self.scope + [node.name])]
+    if self.instrumentation is not None:
+      self.instrumentation.count_graphs([cfg])
+    if do_clean:
+      _clean([cfg])
+    return cfg
+
+
   def clean_graphs(self):
-    for cfg in self.cfg_dict.values():
-      cfg.clean_graph()
+    reused = {name for graphs in self.prebuilt.values() for name, _, _ in graphs}
+    _clean([cfg for name, cfg in self.cfg_dict.items() if name not in reused])
 
 
   def _init_instances(self):
+    self.instrumentation = current()
     self.cur_event = ControlEvent.PASS
     self.cfg_dict = {}
+    self.spans = {}
+    self.prebuilt = {}
+    self.reusing = False
+    self.lazy = False
+    self.scope = []
     self.interrupting = False
     self.headers = []
     self.exits = []
 
 
-  def _visit_block(self, nodes: List[Union[ast.stm, ast.expr]]) -> None:
+  def _reuse(self, node: ast.AST) -> None:
+    for name, cfg, span in self.prebuilt[node]:
+      self.cfg_dict[name] = cfg
+      self.spans[name] = span
+
+
+  def _visit_block(self, nodes: List[Union[ast.stmt, ast.expr]]) -> None:
     for node in nodes:
       if self.interrupting:
         break
@@ -70,7 +146,16 @@ class ASTtoCFG(ast.NodeVisitor):
 
 
   def visit_ClassDef(self, node: ast.ClassDef) -> Any:
-    self._visit_block(node.body)
+    self.scope.append(node.name)
+    if node not in self.prebuilt:
+      self._visit_block(node.body)
+    else:
+      # Method definitions are still attached to the enclosing graph, but their bodies are not visited
+      self._reuse(node)
+      reusing, self.reusing = self.reusing, True
+      self._visit_block(node.body)
+      self.reusing = reusing
+    self.scope.pop()
 
 
   def visit_FunctionDef(self, node: ast.FunctionDef) -> Any:
@@ -78,14 +163,29 @@ class ASTtoCFG(ast.NodeVisitor):
     cfg_node = self._build_node(node)
     self.cfg.attach_child(cfg_node, self.cur_event)
     self.cfg.go_to(cfg_node.name)
-
-    new_cfg = PyssectGraph(node.name, nodes={'root': PyssectNode()})
-    self.cfg_dict[node.name] = new_cfg
+    self.cur_event = ControlEvent.PASS
+    if node in self.prebuilt:
+      self._reuse(node)
+    if node in self.prebuilt or self.reusing:
+      return
+
+    started = perf_counter() if self.instrumentation is not None else 0.0
+    qualname = '.'.join(self.scope + [node.name])
+    new_cfg = PyssectGraph(qualname, nodes={'root': PyssectNode()})
+    self.cfg_dict[qualname] = new_cfg
+    self.spans[qualname] = (node.lineno, node.end_lineno)
     self.cfg = new_cfg
+    self.scope.extend([node.name, '<locals>'])
+    self.reusing = self.lazy
     self._visit_block(node.body)
+    self.reusing = False
+    del self.scope[-2:]
 
     self.cfg = self.cfg_dict[saved]
+    self.cur_event = ControlEvent.PASS
     self.interrupting = False
+    if self.instrumentation is not None:
+      self.instrumentation.function_built(qualname, new_cfg, perf_counter() - started)
 
 
   def visit_Import(self, node: ast.Import) -> Any:
@@ -235,7 +335,8 @@ class ASTtoCFG(ast.NodeVisitor):
 
   def _build_node(self, node: ast.AST, name: str = '') -> PyssectNode:
     return PyssectNode(
-      name=name or f"{node.__class__.__name__}_{node.lineno}_{node.col_offset}",
+      name=name or sys.intern(f"{node.__class__.__name__}_{node.lineno}_{node.col_offset}"),
+      type=node.__class__.__name__,
       start=Location.default_start(node),
       end=Location.default_end(node),
       contents=[node]
@@ -243,37 +344,385 @@ class ASTtoCFG(ast.NodeVisitor):
 
 
   def _build_empty_node(self,  name: str, location: Location) -> PyssectNode:
-    return PyssectNode(name=name, start=location, end=location)
+    return PyssectNode(name=sys.intern(name), start=location, end=location)
 
 
-@dataclass
-class CodetoCFG():
-  cfg: PyssectGraph
+def _clean(graphs: List[PyssectGraph]) -> None:
+  """Cleans graphs as one `clean` phase, counting the nodes removed when instrumented"""
+  instrumentation = current()
+  before = sum(len(cfg.nodes) for cfg in graphs) if instrumentation is not None else 0
+  with phase('clean'):
+    for cfg in graphs:
+      cfg.clean_graph()
+  if instrumentation is not None:
+    instrumentation.count('nodes_removed', before - sum(len(cfg.nodes) for cfg in graphs))
+
+
+def _end_line(node: ast.AST) -> int:
+  if hasattr(node, 'end_lineno'):
+    return node.end_lineno
+  return max((stmt.end_lineno for stmt in getattr(node, 'body', [])), default=1)
+
+
+class LazyCFG(Mapping):
+  """A read only mapping of qualified names to the graphs of a module, where each graph is built the first time it is
+  looked up and memoized. Creating the mapping only walks the statements `ASTtoCFG` would visit, to find the function
+  definitions and the scope each one is nested in"""
+
+  def __init__(self, tree: ast.AST, do_clean: bool = False):
+    self.tree = tree
+    self.do_clean = do_clean
+    index = _FunctionIndex()
+    index.visit_block(tree.body if hasattr(tree, 'body') else [tree])
+    self._functions = index.functions
+    self._built: Dict[str, PyssectGraph] = {}
+
+
+  def __getitem__(self, key: str) -> PyssectGraph:
+    cfg = self._built.get(key)
+    if cfg is None:
+      if key == '__main__':
+        cfg = ASTtoCFG().build(self.tree, self.do_clean, lazy=True)['__main__']
+      else:
+        node, scope = self._functions[key]
+        cfg = ASTtoCFG().build_function(node, scope, self.do_clean)
+      self._built[key] = cfg
+    return cfg
+
 
-  def build(self, code: CodeType) -> PyssectGraph:
-    self.cfg = PyssectGraph('test', 'root', 'root', {'root': PyssectNode('root')})
-    self._visit_code(dis.get_instructions(code))
-    return self.cfg
+  def __iter__(self) -> Iterator[str]:
+    yield '__main__'
+    yield from self._functions
 
-  def _visit_block(self, block: Iterator[dis.Instruction]):
-    for instruction in block:
-      self.visit(instruction)
 
+  def __len__(self) -> int:
+    return len(self._functions) + 1
 
-  def generic_visit(self, inst: dis.Instruction):
-    self.cfg.get_cur().append_contents(inst)
 
+  def __contains__(self, key: object) -> bool:
+    return key == '__main__' or key in self._functions
 
-  def visit(self, inst: dis.Instruction):
-    getattr(self, f'visit_{inst.opname.lower()}', self.generic_visit)(inst)
 
+class _FunctionIndex(ast.NodeVisitor):
+  """Finds the function definitions `ASTtoCFG` builds graphs for, visiting blocks the way it does, including skipping
+  the rest of a block after a statement that interrupts it"""
+
+  def __init__(self):
+    self.functions: Dict[str, Tuple[ast.FunctionDef, List[str]]] = {}
+    self.scope: List[str] = []
+    self.interrupting = False
 
-def builds(source: Union[str, CodeType, FrameType, FunctionType], do_clean: bool = False) -> Dict[str, PyssectGraph]:
-  """Takes a python source object and returns the corresponding PyssectGraph"""
-  return ASTtoCFG().build(ast.parse(source if isinstance(source, str) else getsource(source)), do_clean)
 
+  def visit_block(self, nodes: List[ast.stmt]) -> None:
+    for node in nodes:
+      if self.interrupting:
+        break
+      self.visit(node)
+
+
+  def generic_visit(self, node: ast.AST) -> Any:
+    pass
 
-def builds_file(file: str, do_clean: bool = False) -> Dict[str, PyssectGraph]:
+
+  def visit_ClassDef(self, node: ast.ClassDef) -> Any:
+    self.scope.append(node.name)
+    self.visit_block(node.body)
+    self.scope.pop()
+
+
+  def visit_FunctionDef(self, node: ast.FunctionDef) -> Any:
+    self.functions['.'.join(self.scope + [node.name])] = (node, list(self.scope))
+    self.scope.extend([node.name, '<locals>'])
+    self.visit_block(node.body)
+    del self.scope[-2:]
+    self.interrupting = False
+
+
+  def visit_If(self, node: Union[ast.If, ast.For, ast.While]) -> Any:
+    if node.body:
+      self.visit_block(node.body)
+      self.interrupting = False
+    if node.orelse:
+      self.visit_block(node.orelse)
+    self.interrupting = False
+
+
+  visit_For = visit_While = visit_If
+
+
+  def visit_Try(self, node: ast.Try) -> Any:
+    self.visit_block(node.body)
+    for handler in node.handlers:
+      self.visit_block(handler.body)
+    self.visit_block(node.orelse)
+    self.visit_block(node.finalbody)
+
+
+  def visit_Return(self, node: ast.stmt) -> Any:
+    self.interrupting = True
+
+
+  visit_Break = visit_Continue = visit_Return
+
+
+class CodetoCFG():
+  """Class that builds PyssectGraphs from a code object's bytecode, without needing its source. Instructions are split
+  into basic blocks at jump targets, exception handlers and after jumps, returns and raises. Nested code objects, such
+  as inner functions and comprehensions, are built into their own graphs keyed by qualified name"""
+  cfg_dict: Dict[str, PyssectGraph]
+  cfg: PyssectGraph
+
+
+  def __init__(self):
+    self.cfg_dict = {}
+
+
+  def build(self, code: CodeType, do_clean: bool = False, qualname: Optional[str] = None) -> Dict[str, PyssectGraph]:
+    """Builds the graphs of code and its nested code, qualname standing in for the root's qualified name when given"""
+    self.cfg_dict = {}
+    with phase('visit'):
+      for nested, qualname in code_qualnames(code, qualname):
+        self._visit_code(nested, qualname)
+
+    instrumentation = current()
+    if instrumentation is not None:
+      instrumentation.count_graphs(self.cfg_dict.values())
+    if do_clean:
+      _clean(list(self.cfg_dict.values()))
+
+    return self.cfg_dict
+
+
+  def _visit_code(self, code: CodeType, qualname: str) -> None:
+    name = '__main__' if code.co_name == '<module>' else qualname
+    if name in self.cfg_dict:
+      name = f"{name}_{code.co_firstlineno}"
+
+    instructions = list(dis.get_instructions(code))
+    handlers = getattr(dis.Bytecode(code), 'exception_entries', [])
+    blocks = self._split_blocks(instructions, handlers)
+    self.cfg = PyssectGraph(name, nodes={block.name: block for block in blocks})
+    self.cfg_dict[name] = self.cfg
+
+    starts = [block.contents[0].offset for block in blocks]
+    for i, block in enumerate(blocks):
+      self.cfg.go_to(block.name)
+      following = blocks[i + 1] if i + 1 < len(blocks) else None
+      for target, event in self._successors(block.contents[-1], following):
+        if target is not None:
+          self.cfg.attach_child(blocks[bisect_right(starts, target) - 1], event)
+      for handler in handlers:
+        if handler.start <= starts[i] < handler.end:
+          self.cfg.attach_child(blocks[bisect_right(starts, handler.target) - 1], ControlEvent.ONEXCEPTION)
+    self.cfg.go_to_root()
+
+
+  def _split_blocks(self, instructions: List[dis.Instruction], handlers: List[Any]) -> List[PyssectNode]:
+    leaders = {instructions[0].offset} if instructions else set()
+    for handler in handlers:
+      leaders.update((handler.start, handler.end, handler.target))
+    for inst, following in zip(instructions, instructions[1:]):
+      if inst.opcode in _JUMPS:
+        leaders.update((inst.argval, following.offset))
+      elif inst.opname in _TERMINATORS or inst.opname == 'YIELD_VALUE':
+        leaders.add(following.offset)
+
+    blocks: List[PyssectNode] = []
+    for inst in instructions:
+      if inst.offset in leaders or not blocks:
+        name = 'root' if not blocks else sys.intern(f"{inst.opname}_{inst.offset}")
+        blocks.append(PyssectNode(name=name, type=inst.opname))
+      blocks[-1].contents.append(inst)
+
+    # Compiler generated cleanup blocks have no positions, they are placed at the end of the preceding block
+    previous = Location()
+    for block in blocks:
+      start, end = _instruction_span(block.contents)
+      block.start, block.end = start or previous, end or previous
+      previous = block.end
+    return blocks
+
+
+  def _successors(self, last: dis.Instruction, following: Optional[PyssectNode]) -> List[Tuple[int, ControlEvent]]:
+    """Returns the `(offset, event)` pairs of the blocks that control can pass to after the instruction `last`"""
+    next_offset = following.contents[0].offset if following else None
+    opname = last.opname
+    if opname in _TERMINATORS:
+      return []
+    if opname in _EXCEPTION_SETUPS:
+      return [(next_offset, ControlEvent.PASS), (last.argval, ControlEvent.ONEXCEPTION)]
+    if last.opcode not in _JUMPS:
+      if following is None:
+        return []
+      return [(next_offset, ControlEvent.ONYIELD if opname == 'YIELD_VALUE' else ControlEvent.PASS)]
+    if opname in _UNCONDITIONAL_JUMPS:
+      return [(last.argval, ControlEvent.PASS)]
+    if opname == 'FOR_ITER':
+      return [(next_offset, ControlEvent.ONTRUE), (last.argval, ControlEvent.PASS)]
+    if opname.endswith(('IF_TRUE', 'IF_TRUE_OR_POP', 'IF_NONE')):
+      return [(last.argval, ControlEvent.ONTRUE), (next_offset, ControlEvent.ONFALSE)]
+    if opname.endswith(('IF_FALSE', 'IF_FALSE_OR_POP', 'IF_NOT_NONE', 'IF_NOT_EXC_MATCH')):
+      return [(next_offset, ControlEvent.ONTRUE), (last.argval, ControlEvent.ONFALSE)]
+    return [(next_offset, ControlEvent.PASS), (last.argval, ControlEvent.PASS)]
+
+
+_JUMPS = set(dis.hasjrel) | set(dis.hasjabs) | set(getattr(dis, 'hasjump', []))
+_UNCONDITIONAL_JUMPS = {
+  'JUMP_FORWARD', 'JUMP_BACKWARD', 'JUMP_ABSOLUTE', 'JUMP_BACKWARD_NO_INTERRUPT', 'JUMP', 'JUMP_NO_INTERRUPT'
+}
+_TERMINATORS = {'RETURN_VALUE', 'RETURN_CONST', 'RAISE_VARARGS', 'RERAISE'}
+_EXCEPTION_SETUPS = {'SETUP_FINALLY', 'SETUP_WITH', 'SETUP_ASYNC_WITH', 'SETUP_CLEANUP'}
+
+
+def code_qualnames(code: CodeType, qualname: Optional[str] = None) -> Iterator[Tuple[CodeType, str]]:
+  """Yields code and the code objects nested in it, depth first, each with its qualified name. That is `co_qualname`
+  since python 3.11, and before, the name built from the nesting as `__qualname__` is. The root's qualified name is
+  qualname when given"""
+  stack = [(code, qualname or getattr(code, 'co_qualname', code.co_name))]
+  while stack:
+    code, qualname = stack.pop()
+    yield code, qualname
+    nested = [const for const in code.co_consts if isinstance(const, CodeType)]
+    if code.co_name == '<module>':
+      parent = ''
+    elif code.co_flags & CO_OPTIMIZED:
+      parent = f"{qualname}.<locals>."
+    else:
+      parent = f"{qualname}."
+    stack.extend((const, getattr(const, 'co_qualname', parent + const.co_name)) for const in reversed(nested))
+
+
+def _instruction_span(instructions: List[dis.Instruction]) -> Tuple[Optional[Location], Optional[Location]]:
+  """Returns the start and end `Location` of a run of instructions, from their positions where available"""
+  start = end = None
+  for inst in instructions:
+    positions = getattr(inst, 'positions', None)
+    line = instruction_line(inst)
+    if positions is not None and positions.lineno is not None:
+      start = start or Location(positions.lineno, positions.col_offset or 0)
+      end = Location(positions.end_lineno or positions.lineno, positions.end_col_offset or 0)
+    elif line is not None:
+      start = start or Location(line, 0)
+      end = Location(line, 0)
+  return start, end
+
+
+def builds(
+  source: Union[str, CodeType, FrameType, FunctionType],
+  do_clean: bool = False,
+  cache: Optional[GraphCache] = None,
+  records: bool = False
+) -> Dict[str, PyssectGraph]:
+  """Takes a python source object and returns the corresponding PyssectGraph. When a `cache` is given, results are
+  loaded from and stored to it, and node contents are their rendered source strings. With records, ast contents are
+  replaced by `StatementRecord`s so the parsed tree is not kept alive, see `drop_ast`. Cached builds hold no ast to
+  replace, and raise a `ValueError` when asked for records"""
+  if cache is not None and records:
+    raise ValueError('Cached builds hold rendered contents rather than records, pass either cache or records')
+  source = source if isinstance(source, str) else textwrap.dedent(getsource(source))
+  if cache is None:
+    with phase('parse'):
+      tree = ast.parse(source)
+    cfg_dict = ASTtoCFG().build(tree, do_clean)
+    return drop_ast(cfg_dict) if records else cfg_dict
+  return pyssect_loads(_build_serialized(source, do_clean, cache))
+
+
+def builds_file(
+  file: str,
+  do_clean: bool = False,
+  cache: Optional[GraphCache] = None,
+  records: bool = False
+) -> Dict[str, PyssectGraph]:
   """Takes a python file and returns the corresponding PyssectGraph"""
   with open(file, 'r') as f:
-    return ASTtoCFG().build(ast.parse(f.read()), do_clean)
\ No newline at end of file
+    return builds(f.read(), do_clean, cache, records)
+
+
+def builds_lazy(source: str, do_clean: bool = False) -> LazyCFG:
+  """Returns a mapping of the Control Flow Graphs of a source string that builds each graph the first time it is
+  looked up"""
+  with phase('parse'):
+    tree = ast.parse(source)
+  return LazyCFG(tree, do_clean)
+
+
+def builds_code(code: Union[CodeType, FrameType, FunctionType], do_clean: bool = False) -> Dict[str, PyssectGraph]:
+  """Takes a code object, or the frame or function holding one, and returns the PyssectGraphs built from its
+  bytecode"""
+  qualname = None
+  if isinstance(code, FunctionType):
+    code, qualname = code.__code__, code.__qualname__
+  elif isinstance(code, FrameType):
+    code = code.f_code
+  return CodetoCFG().build(code, do_clean, qualname)
+
+
+def builds_pyc(file: str, do_clean: bool = False) -> Dict[str, PyssectGraph]:
+  """Takes a compiled `.pyc` file and returns the PyssectGraphs built from its bytecode"""
+  with open(file, 'rb') as f:
+    data = f.read()
+  if data[:4] != importlib.util.MAGIC_NUMBER:
+    raise ValueError(f"{file} was not compiled by this version of python")
+  return builds_code(marshal.loads(data[16:]), do_clean)
+
+
+def builds_tree(
+  paths: Iterable[str],
+  workers: Optional[int] = None,
+  do_clean: bool = False,
+  cache: Optional[GraphCache] = None
+) -> Iterator[Tuple[str, Union[Dict[str, PyssectGraph], Exception]]]:
+  """Builds every python file in `paths` on a pool of `workers` processes, yielding `(path, cfg_dict)` pairs in
+  completion order. Directories are searched recursively for `.py` files. Graphs are sent back from the workers as
+  compact json rather than pickled ast objects, so node contents are their rendered source strings. A file that fails
+  to build yields `(path, exception)` instead of stopping the batch.
+
+  At most two files per worker are queued at a time, and queued files are cancelled when the consumer stops early, so
+  closing the iterator only waits for the builds already running"""
+  files = _iter_source_files(paths)
+  limit = 2 * (workers or os.cpu_count() or 1)
+  with ProcessPoolExecutor(max_workers=workers) as executor:
+    try:
+      pending = {executor.submit(_build_file_serialized, path, do_clean, cache): path for path in islice(files, limit)}
+      while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for path in islice(files, len(done)):
+          pending[executor.submit(_build_file_serialized, path, do_clean, cache)] = path
+        for future in done:
+          path = pending.pop(future)
+          try:
+            yield path, pyssect_loads(future.result())
+          except Exception as e:
+            yield path, e
+    finally:
+      executor.shutdown(cancel_futures=True)
+
+
+def _build_file_serialized(file: str, do_clean: bool, cache: Optional[GraphCache]) -> str:
+  with open(file, 'r') as f:
+    return _build_serialized(f.read(), do_clean, cache)
+
+
+def _build_serialized(source: str, do_clean: bool, cache: Optional[GraphCache]) -> str:
+  """Returns the compact json form of a build, served from the cache when possible"""
+  key = cache.key(source, do_clean) if cache is not None else ''
+  serialized = cache.get(key) if cache is not None else None
+  if serialized is None:
+    with phase('parse'):
+      tree = ast.parse(source)
+    serialized = pyssect_dumps(ASTtoCFG().build(tree, do_clean), indent=None)
+    if cache is not None:
+      cache.put(key, serialized)
+  return serialized
+
+
+def _iter_source_files(paths: Iterable[str]) -> Iterator[str]:
+  for path in paths:
+    if os.path.isdir(path):
+      for dir_path, _, file_names in os.walk(path):
+        for file_name in sorted(file_names):
+          if file_name.endswith('.py'):
+            yield os.path.join(dir_path, file_name)
+    else:
+      yield path
@@ -0,0 +1,123 @@
+from typing import List, Optional, Tuple
+import hashlib
+import os
+import platform
+import tempfile
+import time
+
+
+# Version of the layout of cached builds, part of every key so entries written by older layouts miss rather than load
+VERSION = 2
+# Age in seconds past which a temporary file is taken for the leftover of a write that crashed
+STALE_SECONDS = 3600
+
+
+class GraphCache:
+  """A persistent, size bounded cache of serialized build results, stored as one json file per entry in `directory`.
+
+  Entries are keyed on a hash of the cache `VERSION`, the source text, the python version and the `do_clean` flag.
+  When `max_entries` or `max_bytes` is exceeded, the least recently used entries are evicted. Recency is tracked
+  through file modification times and every bound is checked against a scan of the directory when an entry is
+  stored, so the bounds hold for a directory shared between processes, like the workers of `builds_tree`. Temporary
+  files left by writes that crashed are swept when the cache is opened and when it evicts
+  """
+  directory: str
+  max_entries: Optional[int]
+  max_bytes: Optional[int]
+
+
+  def __init__(self, directory: str, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+    self.directory = directory
+    self.max_entries = max_entries
+    self.max_bytes = max_bytes
+    os.makedirs(directory, exist_ok=True)
+    self._scan()
+
+
+  def key(self, source: str, do_clean: bool = False) -> str:
+    """Returns the cache key of a source string"""
+    digest = hashlib.sha256(f"{VERSION}:{platform.python_version()}:{int(do_clean)}:".encode())
+    digest.update(source.encode())
+    return digest.hexdigest()
+
+
+  def get(self, key: str) -> Optional[str]:
+    """Returns the serialized build result stored under key, or None on a miss"""
+    path = self._path(key)
+    try:
+      with open(path, 'r') as f:
+        serialized = f.read()
+      self._touch(path)
+    except OSError:
+      return None
+    return serialized
+
+
+  def put(self, key: str, serialized: str) -> None:
+    """Stores a serialized build result under key, evicting old entries if the cache grows past its bounds"""
+    fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+      f.write(serialized)
+    self._touch(tmp)
+    os.replace(tmp, self._path(key))
+    if self.max_entries is not None or self.max_bytes is not None:
+      self._evict()
+
+
+  def clear(self) -> None:
+    """Invalidates every entry in the cache"""
+    for entry in os.scandir(self.directory):
+      if entry.name.endswith('.json'):
+        self._unlink(entry.path)
+
+
+  def __len__(self) -> int:
+    return len(self._scan())
+
+
+  def __contains__(self, key: str) -> bool:
+    return os.path.exists(self._path(key))
+
+
+  def _evict(self) -> None:
+    entries = self._scan()
+    total = sum(size for _, _, size in entries)
+    excess = len(entries) - self.max_entries if self.max_entries is not None else 0
+    for _, path, size in sorted(entries):
+      if excess <= 0 and (self.max_bytes is None or total <= self.max_bytes):
+        break
+      self._unlink(path)
+      excess -= 1
+      total -= size
+
+
+  def _scan(self) -> List[Tuple[int, str, int]]:
+    """Returns the modification time, path and size of every entry on disk, removing stale temporary files"""
+    entries, stale = [], time.time() - STALE_SECONDS
+    for entry in os.scandir(self.directory):
+      try:
+        stat = entry.stat()
+      except FileNotFoundError:
+        continue
+      if entry.name.endswith('.json'):
+        entries.append((stat.st_mtime_ns, entry.path, stat.st_size))
+      elif entry.name.endswith('.tmp') and stat.st_mtime < stale:
+        self._unlink(entry.path)
+    return entries
+
+
+  def _touch(self, path: str) -> None:
+    # File systems stamp writes with a coarse clock, so entries used in quick succession would tie
+    now = time.time_ns()
+    os.utime(path, ns=(now, now))
+
+
+  def _path(self, key: str) -> str:
+    return os.path.join(self.directory, f"{key}.json")
+
+
+  def _unlink(self, path: str) -> None:
+    try:
+      os.remove(path)
+    except FileNotFoundError:
+      pass
@@ -0,0 +1,265 @@
+from typing import Dict, Iterator, List, Mapping, NamedTuple, Optional, Set, Tuple
+from .builders import ASTtoCFG
+from .graph import PyssectGraph
+from .node import PyssectNode, ControlEvent
+import ast
+import os
+
+
+class CallSite(NamedTuple):
+  """A call found in the contents of node of graph caller, and the key of the graph it resolves to"""
+  caller: str
+  node: str
+  call: ast.Call
+  callee: Optional[str]
+
+
+class CallGraph:
+  """Index of the calls between the graphs of a dictionary built by `ASTtoCFG`, built once in a single pass over
+  every node's contents. `graph` holds one node per function graph with an `ONCALL` edge to each graph it calls, and
+  `resolve` looks up the target of a call site in constant time.
+
+  Calls are resolved statically and only within the dictionary: plain names are looked up through the enclosing
+  function scopes like python does, calling a class resolves to its `__init__`, and `self.name`, `cls.name` and
+  `Class.name` resolve to methods of the enclosing or named class. Other calls are kept as unresolved sites.
+
+  A dictionary can hold the graphs of a whole project, keyed `'<module>:<qualified name>'` as `for_tree` builds it,
+  with `imports` mapping each module to the dotted names its top level imports. Names a module does not define are
+  then looked up through its imports, so `helper()`, `module.helper()` and `module.Class.method()` resolve to the
+  graphs of other modules, following names a package re-exports
+  """
+  cfg_dict: Dict[str, PyssectGraph]
+  imports: Mapping[str, Dict[str, str]]
+  graph: PyssectGraph
+
+
+  def __init__(self, cfg_dict: Dict[str, PyssectGraph], imports: Optional[Mapping[str, Dict[str, str]]] = None):
+    self.cfg_dict = cfg_dict
+    self.imports = imports if imports is not None else {}
+    self.classes = _classes(cfg_dict)
+    root = '__main__' if '__main__' in cfg_dict else next(iter(cfg_dict), 'root')
+    self.graph = PyssectGraph('callgraph', root, root, {name: PyssectNode(name=name) for name in cfg_dict})
+    self._sites: Dict[str, List[CallSite]] = {}
+    self._targets: Dict[ast.Call, Optional[str]] = {}
+
+    for caller, cfg in cfg_dict.items():
+      sites = self._sites[caller] = []
+      module, qualname = _split(caller)
+      scopes = [module + scope for scope in _scopes(qualname)]
+      for node in cfg.nodes.values():
+        for call in _calls(node):
+          callee = self._resolve(call.func, caller, scopes)
+          sites.append(CallSite(caller, node.name, call, callee))
+          self._targets[call] = callee
+          if callee is not None:
+            self.graph.go_to(caller)
+            self.graph.attach_child(self.graph.nodes[callee], ControlEvent.ONCALL)
+    self.graph.go_to_root()
+
+
+  @staticmethod
+  def for_tree(root: str, do_clean: bool = False) -> 'CallGraph':
+    """Builds every python file under the directory root and indexes the calls within and across them. Modules are
+    named after their path relative to root, as python imports them with root on its path. Each file is parsed once,
+    in this process, as the index reads the ast contents that `builds_tree` does not send back from its workers. Files
+    that fail to parse are left out"""
+    cfg_dict, imports = {}, {}
+    for path in _source_files(root):
+      module = _module_name(path, root)
+      try:
+        with open(path, 'r') as f:
+          tree = ast.parse(f.read())
+      except (OSError, SyntaxError, ValueError):
+        continue
+      imports[module] = module_imports(tree, module, os.path.basename(path) == '__init__.py')
+      for qualname, cfg in ASTtoCFG().build(tree, do_clean).items():
+        cfg_dict[f"{module}:{qualname}"] = cfg
+    return CallGraph(cfg_dict, imports)
+
+
+  def resolve(self, call: ast.Call) -> Optional[PyssectGraph]:
+    """Returns the graph called by a call site found in one of the indexed graphs, if it was resolved"""
+    callee = self._targets.get(call)
+    return self.cfg_dict[callee] if callee is not None else None
+
+
+  def sites(self, caller: str) -> List[CallSite]:
+    """Returns the call sites of graph caller, in node order"""
+    return self._sites[caller]
+
+
+  def callees(self, name: str) -> List[str]:
+    return list(self.graph.nodes[name].children)
+
+
+  def callers(self, name: str) -> List[str]:
+    return list(self.graph.nodes[name].parents)
+
+
+  def _resolve(self, func: ast.expr, caller: str, scopes: List[str]) -> Optional[str]:
+    parts = _dotted(func)
+    if not parts:
+      return None
+
+    module, qualname = _split(caller)
+    owner = module + qualname.rpartition('.')[0]
+    if len(parts) == 2 and parts[0] in ('self', 'cls') and owner in self.classes:
+      target = f"{owner}.{parts[1]}"
+    else:
+      target = self._lookup(parts[0], scopes)
+      imports = self.imports.get(module[:-1], {})
+      if target is None and parts[0] in imports:
+        target = self._locate('.'.join([imports[parts[0]], *parts[1:]]), set())
+      elif target is not None and len(parts) > 1:
+        target = '.'.join([target, *parts[1:]]) if target in self.classes else None
+
+    if target in self.classes:
+      target = f"{target}.__init__"
+    return target if target in self.cfg_dict else None
+
+
+  def _lookup(self, name: str, scopes: List[str]) -> Optional[str]:
+    for scope in scopes:
+      if scope + name in self.cfg_dict or scope + name in self.classes:
+        return scope + name
+    return None
+
+
+  def _locate(self, dotted: str, seen: Set[str]) -> Optional[str]:
+    """Returns the key of the graph or class named by a dotted path, found in the longest indexed module prefixing it
+    or, when that module imports the name, where it was imported from"""
+    parts = dotted.split('.')
+    for i in range(len(parts) - 1, 0, -1):
+      module = '.'.join(parts[:i])
+      if module not in self.imports:
+        continue
+      name, rest = parts[i], parts[i + 1:]
+      key = f"{module}:{name}"
+      if key in self.cfg_dict or key in self.classes:
+        return '.'.join([key, *rest])
+      if name in self.imports[module] and dotted not in seen:
+        seen.add(dotted)
+        return self._locate('.'.join([self.imports[module][name], *rest]), seen)
+      return None
+    return None
+
+
+def module_imports(tree: ast.Module, module: str, package: bool = False) -> Dict[str, str]:
+  """Returns the names bound by the imports of a module's top level, outside of functions and classes, mapped to the
+  dotted names they refer to. Relative imports are resolved against module, itself a package when package is true"""
+  names = {}
+  stack = list(reversed(tree.body))
+  while stack:
+    stmt = stack.pop()
+    if isinstance(stmt, ast.Import):
+      for alias in stmt.names:
+        if alias.asname:
+          names[alias.asname] = alias.name
+        else:
+          names[alias.name.partition('.')[0]] = alias.name.partition('.')[0]
+    elif isinstance(stmt, ast.ImportFrom):
+      base = stmt.module or ''
+      if stmt.level:
+        parts = module.split('.') if package else module.split('.')[:-1]
+        parts = parts[:len(parts) - stmt.level + 1]
+        base = '.'.join([*parts, base] if base else parts)
+      for alias in stmt.names:
+        if alias.name != '*':
+          names[alias.asname or alias.name] = f"{base}.{alias.name}"
+    elif not isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+      for field in ('body', 'orelse', 'finalbody', 'handlers'):
+        stack.extend(reversed(getattr(stmt, field, [])))
+  return names
+
+
+def _classes(cfg_dict: Dict[str, PyssectGraph]) -> Set[str]:
+  """Qualified names of the classes holding the graphs of cfg_dict. Classes without methods have no graph and are not
+  found"""
+  classes = set()
+  for key in cfg_dict:
+    module, qualname = _split(key)
+    parts = qualname.split('.')
+    for i in range(1, len(parts)):
+      if parts[i - 1] != '<locals>' and parts[i] != '<locals>':
+        classes.add(module + '.'.join(parts[:i]))
+  return classes
+
+
+def _split(key: str) -> Tuple[str, str]:
+  """Splits the key of a graph into the prefix of its module, `'<module>:'` or empty, and its qualified name"""
+  module, _, qualname = key.rpartition(':')
+  return (f"{module}:" if module else ''), qualname
+
+
+def _dotted(expr: ast.expr) -> List[str]:
+  """Returns the names of an expression like `a.b.c`, or an empty list for other expressions"""
+  parts = []
+  while isinstance(expr, ast.Attribute):
+    parts.append(expr.attr)
+    expr = expr.value
+  if not isinstance(expr, ast.Name):
+    return []
+  parts.append(expr.id)
+  return parts[::-1]
+
+
+def _module_name(path: str, root: str) -> str:
+  name = os.path.splitext(os.path.relpath(path, root))[0].replace(os.sep, '.')
+  return name[:-len('.__init__')] if name.endswith('.__init__') else name
+
+
+def _source_files(root: str) -> Iterator[str]:
+  for dir_path, dir_names, file_names in os.walk(root):
+    dir_names.sort()
+    for file_name in sorted(file_names):
+      if file_name.endswith('.py'):
+        yield os.path.join(dir_path, file_name)
+
+
+def _scopes(qualname: str) -> List[str]:
+  """Prefixes a name called from graph qualname is looked up under, innermost first. Class bodies are not scopes of
+  the functions they hold"""
+  if qualname == '__main__':
+    return ['']
+  scopes = [f"{qualname}.<locals>."]
+  parts = qualname.split('.')
+  for i in range(len(parts) - 1, 0, -1):
+    if parts[i - 1] == '<locals>':
+      scopes.append('.'.join(parts[:i]) + '.')
+  scopes.append('')
+  return scopes
+
+
+def _calls(node: PyssectNode) -> Iterator[ast.Call]:
+  """Yields the calls evaluated by the contents of node. Statements that `ASTtoCFG` splits into several nodes only
+  contribute their header, and the bodies of nested definitions are skipped"""
+  for content in node.contents:
+    if not isinstance(content, ast.AST):
+      continue
+    stack = _evaluated_parts(content)
+    while stack:
+      expr = stack.pop()
+      if isinstance(expr, ast.Call):
+        yield expr
+      if isinstance(expr, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+        stack.extend(reversed(_evaluated_parts(expr)))
+      else:
+        stack.extend(reversed(list(ast.iter_child_nodes(expr))))
+
+
+def _evaluated_parts(stmt: ast.AST) -> List[ast.AST]:
+  if isinstance(stmt, (ast.If, ast.While)):
+    return [stmt.test]
+  if isinstance(stmt, (ast.For, ast.AsyncFor)):
+    return [stmt.iter]
+  if isinstance(stmt, ast.ExceptHandler):
+    return [stmt.type] if stmt.type else []
+  if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)):
+    return [*stmt.decorator_list, *stmt.args.defaults, *[d for d in stmt.args.kw_defaults if d]]
+  if isinstance(stmt, ast.ClassDef):
+    return [*stmt.decorator_list, *stmt.bases, *[keyword.value for keyword in stmt.keywords]]
+  if isinstance(stmt, ast.Lambda):
+    return [*stmt.args.defaults, *[d for d in stmt.args.kw_defaults if d]]
+  if isinstance(stmt, ast.Try):
+    return []
+  return [stmt]
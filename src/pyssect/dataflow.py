@@ -0,0 +1,432 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, Generic, Iterable, List, NamedTuple, Set, Tuple, TypeVar
+from .graph import PyssectGraph
+from .node import PyssectNode, ControlEvent
+from dis import Instruction
+import ast
+import heapq
+
+
+Fact = TypeVar('Fact')
+
+
+class DataflowAnalysis(ABC, Generic[Fact]):
+  """Base class for dataflow problems solved by `solve`. A problem defines its lattice through `initial`, `boundary`
+  and `join`, the effect of a node's contents through `transfer` and the effect of an edge through `edge`. Facts flow
+  along the edges of the graph when `forward` is true, and against them otherwise. Subclasses must define `initial`,
+  `join` and `transfer`
+  """
+  forward: bool = True
+
+
+  @abstractmethod
+  def initial(self, cfg: PyssectGraph) -> Fact:
+    """The fact every node starts from, the bottom of the lattice"""
+
+
+  def boundary(self, cfg: PyssectGraph) -> Fact:
+    """The fact flowing into the root of a forward problem, or out of the nodes without children of a backward one"""
+    return self.initial(cfg)
+
+
+  @abstractmethod
+  def join(self, a: Fact, b: Fact) -> Fact:
+    """Returns the least upper bound of two facts"""
+
+
+  @abstractmethod
+  def transfer(self, node: PyssectNode, fact: Fact) -> Fact:
+    """Returns the fact after node, or before it for a backward problem, given the fact on its other side"""
+
+
+  def edge(self, source: PyssectNode, target: PyssectNode, event: ControlEvent, fact: Fact) -> Fact:
+    """Returns the fact crossing the edge from source to target, which carries the fact leaving source in a forward
+    problem and the fact leaving target in a backward one"""
+    return fact
+
+
+@dataclass
+class DataflowResult(Generic[Fact]):
+  """The facts holding before and after each node reachable from the root, in program order"""
+  before: Dict[str, Fact] = field(default_factory=dict)
+  after: Dict[str, Fact] = field(default_factory=dict)
+
+
+def solve(cfg: PyssectGraph, analysis: DataflowAnalysis[Fact]) -> DataflowResult[Fact]:
+  """Computes the fixed point of analysis over the nodes of cfg reachable from its root. Nodes are taken from a
+  worklist ordered by reverse postorder, or postorder for backward problems, so most nodes are visited once per
+  loop nesting level"""
+  order = [node.name for node in cfg.reverse_postorder()]
+  if not analysis.forward:
+    order.reverse()
+  priority = {name: i for i, name in enumerate(order)}
+
+  # Facts on the side a node receives them from, and on the side its transfer function produces
+  inputs = {name: analysis.initial(cfg) for name in order}
+  outputs = {name: analysis.initial(cfg) for name in order}
+  boundary = analysis.boundary(cfg)
+
+  worklist = list(range(len(order)))
+  queued = set(worklist)
+  while worklist:
+    i = heapq.heappop(worklist)
+    queued.discard(i)
+    node = cfg.nodes[order[i]]
+
+    if analysis.forward:
+      sources = [(cfg.nodes[name], node, event, name) for name, event in node.parents.items() if name in priority]
+      fact = boundary if node.name == cfg.root else analysis.initial(cfg)
+    else:
+      sources = [(node, cfg.nodes[name], event, name) for name, event in node.children.items()]
+      fact = boundary if not node.children else analysis.initial(cfg)
+    for source, target, event, name in sources:
+      fact = analysis.join(fact, analysis.edge(source, target, event, outputs[name]))
+    inputs[node.name] = fact
+
+    output = analysis.transfer(node, fact)
+    if output != outputs[node.name]:
+      outputs[node.name] = output
+      for name in (node.children if analysis.forward else node.parents):
+        j = priority.get(name)
+        if j is not None and j not in queued:
+          queued.add(j)
+          heapq.heappush(worklist, j)
+
+  if analysis.forward:
+    return DataflowResult(inputs, outputs)
+  return DataflowResult(outputs, inputs)
+
+
+class BitsetAnalysis(DataflowAnalysis[int]):
+  """A gen and kill problem over a finite domain, with sets of domain elements encoded as the bits of an int. Union
+  problems join with `|` and start from the empty set, intersection problems join with `&` and start from the full
+  set. Subclasses fill in `domain`, `gen` and `kill` for each node"""
+  union: bool = True
+
+
+  def __init__(self, domain: Iterable[Any]):
+    self.domain = list(domain)
+    self.index = {element: i for i, element in enumerate(self.domain)}
+    self.gen: Dict[str, int] = {}
+    self.kill: Dict[str, int] = {}
+
+
+  def bits(self, elements: Iterable[Any]) -> int:
+    bits = 0
+    for element in elements:
+      bits |= 1 << self.index[element]
+    return bits
+
+
+  def elements(self, bits: int) -> Set[Any]:
+    elements = set()
+    while bits:
+      low = bits & -bits
+      elements.add(self.domain[low.bit_length() - 1])
+      bits ^= low
+    return elements
+
+
+  def initial(self, cfg: PyssectGraph) -> int:
+    return 0 if self.union else (1 << len(self.domain)) - 1
+
+
+  def boundary(self, cfg: PyssectGraph) -> int:
+    return 0
+
+
+  def join(self, a: int, b: int) -> int:
+    return a | b if self.union else a & b
+
+
+  def transfer(self, node: PyssectNode, fact: int) -> int:
+    return (fact & ~self.kill.get(node.name, 0)) | self.gen.get(node.name, 0)
+
+
+  def decode(self, result: DataflowResult[int]) -> DataflowResult[Set[Any]]:
+    """Returns result with each bitset replaced by the set of domain elements it holds"""
+    return DataflowResult(
+      {name: self.elements(bits) for name, bits in result.before.items()},
+      {name: self.elements(bits) for name, bits in result.after.items()}
+    )
+
+
+class Definition(NamedTuple):
+  """An assignment to variable by statement index of node"""
+  node: str
+  index: int
+  variable: str
+
+
+class Use(NamedTuple):
+  """A read of variable by statement index of node"""
+  node: str
+  index: int
+  variable: str
+
+
+class Liveness(BitsetAnalysis):
+  """Backward analysis of the variables that may be read before being assigned again. The target of a `for` loop is
+  assigned on the edge into the loop body rather than by the loop header"""
+  forward = False
+
+
+  def __init__(self, cfg: PyssectGraph):
+    effects = {name: _effects(node) for name, node in cfg.nodes.items()}
+    super().__init__(sorted({
+      variable for node in effects.values() for uses, defs, edge_defs in node for variable in uses + defs + edge_defs
+    }))
+    for name, statements in effects.items():
+      gen, kill = 0, 0
+      for uses, defs, _ in reversed(statements):
+        gen = (gen & ~self.bits(defs)) | self.bits(uses)
+        kill |= self.bits(defs)
+      self.gen[name], self.kill[name] = gen, kill
+    self.edge_kill = {name: self.bits(_edge_defs(statements)) for name, statements in effects.items()}
+
+
+  def edge(self, source: PyssectNode, target: PyssectNode, event: ControlEvent, fact: int) -> int:
+    if event == ControlEvent.ONTRUE:
+      return fact & ~self.edge_kill[source.name]
+    return fact
+
+
+class ReachingDefinitions(BitsetAnalysis):
+  """Forward analysis of the `Definition`s that may reach each node without an intervening assignment to their
+  variable. Parameters and names from enclosing scopes have no definition"""
+
+
+  def __init__(self, cfg: PyssectGraph):
+    effects = {name: _effects(node) for name, node in cfg.nodes.items()}
+    definitions = [
+      Definition(name, index, variable)
+      for name, statements in effects.items()
+      for index, (_, defs, edge_defs) in enumerate(statements)
+      for variable in dict.fromkeys(defs + edge_defs)
+    ]
+    super().__init__(definitions)
+    by_variable: Dict[str, int] = {}
+    for definition in definitions:
+      by_variable[definition.variable] = by_variable.get(definition.variable, 0) | self.bits([definition])
+
+    self.edge_gen, self.edge_kill = {}, {}
+    for name, statements in effects.items():
+      gen, kill = 0, 0
+      for index, (_, defs, _) in enumerate(statements):
+        for variable in defs:
+          kill |= by_variable[variable]
+          gen = (gen & ~by_variable[variable]) | self.bits([Definition(name, index, variable)])
+      self.gen[name], self.kill[name] = gen, kill
+
+      edge_defs = [(index, variable) for index, (_, _, defs) in enumerate(statements) for variable in defs]
+      self.edge_gen[name] = self.bits(Definition(name, index, variable) for index, variable in edge_defs)
+      self.edge_kill[name] = 0
+      for _, variable in edge_defs:
+        self.edge_kill[name] |= by_variable[variable]
+
+
+  def edge(self, source: PyssectNode, target: PyssectNode, event: ControlEvent, fact: int) -> int:
+    if event == ControlEvent.ONTRUE:
+      return (fact & ~self.edge_kill[source.name]) | self.edge_gen[source.name]
+    return fact
+
+
+@dataclass
+class DefUseChains:
+  """Links each `Use` to the `Definition`s that may reach it, and each `Definition` to the `Use`s it may reach"""
+  definitions: Dict[Use, Set[Definition]] = field(default_factory=dict)
+  uses: Dict[Definition, Set[Use]] = field(default_factory=dict)
+
+
+def live_variables(cfg: PyssectGraph) -> DataflowResult[Set[str]]:
+  """Returns the variables live before and after each node reachable from the root"""
+  analysis = Liveness(cfg)
+  return analysis.decode(solve(cfg, analysis))
+
+
+def reaching_definitions(cfg: PyssectGraph) -> DataflowResult[Set[Definition]]:
+  """Returns the definitions reaching the start and end of each node reachable from the root"""
+  analysis = ReachingDefinitions(cfg)
+  return analysis.decode(solve(cfg, analysis))
+
+
+def def_use_chains(cfg: PyssectGraph) -> DefUseChains:
+  """Returns the def-use and use-def chains of the variables of cfg, from its reaching definitions"""
+  analysis = ReachingDefinitions(cfg)
+  result = solve(cfg, analysis)
+  chains = DefUseChains()
+  for definition in analysis.domain:
+    chains.uses[definition] = set()
+
+  for name, reaching in result.before.items():
+    current: Dict[str, Set[Definition]] = {}
+    for definition in analysis.elements(reaching):
+      current.setdefault(definition.variable, set()).add(definition)
+    for index, (uses, defs, _) in enumerate(_effects(cfg.nodes[name])):
+      for variable in dict.fromkeys(uses):
+        use = Use(name, index, variable)
+        chains.definitions[use] = set(current.get(variable, ()))
+        for definition in chains.definitions[use]:
+          chains.uses[definition].add(use)
+      for variable in defs:
+        current[variable] = {Definition(name, index, variable)}
+  return chains
+
+
+Effects = Tuple[List[str], List[str], List[str]]
+
+
+def _effects(node: PyssectNode) -> List[Effects]:
+  """Returns the variables read, assigned, and assigned on the edge into a loop body by each statement of node"""
+  return [
+    _instruction_effects(content) if isinstance(content, Instruction) else _statement_effects(content)
+    for content in node.contents
+  ]
+
+
+def _edge_defs(statements: List[Effects]) -> List[str]:
+  return [variable for _, _, edge_defs in statements for variable in edge_defs]
+
+
+_LOADS = {
+  'LOAD_FAST', 'LOAD_FAST_CHECK', 'LOAD_FAST_AND_CLEAR', 'LOAD_FAST_LOAD_FAST', 'LOAD_NAME', 'LOAD_GLOBAL',
+  'LOAD_DEREF', 'LOAD_CLASSDEREF'
+}
+_STORES = {
+  'STORE_FAST', 'STORE_FAST_STORE_FAST', 'STORE_NAME', 'STORE_GLOBAL', 'STORE_DEREF', 'DELETE_FAST', 'DELETE_NAME',
+  'DELETE_GLOBAL', 'DELETE_DEREF'
+}
+
+
+def _instruction_effects(inst: Instruction) -> Effects:
+  """The superinstructions of python 3.13 name two variables in a tuple `argval`"""
+  if inst.opname == 'STORE_FAST_LOAD_FAST':
+    stored, loaded = inst.argval
+    return [loaded] if loaded != stored else [], [stored], []
+  names = list(inst.argval) if isinstance(inst.argval, tuple) else [inst.argval]
+  if inst.opname in _LOADS and all(isinstance(name, str) for name in names):
+    return names, [], []
+  if inst.opname in _STORES:
+    return [], names, []
+  return [], [], []
+
+
+def _statement_effects(stmt: ast.AST) -> Effects:
+  """Statements split into several nodes by `ASTtoCFG` only contribute their header, other statements are held whole
+  by a single node"""
+  names = _Names()
+  edge_defs: List[str] = []
+  if isinstance(stmt, (ast.If, ast.While)):
+    names.visit(stmt.test)
+  elif isinstance(stmt, (ast.For, ast.AsyncFor)):
+    names.visit(stmt.iter)
+    targets = _Names()
+    targets.visit(stmt.target)
+    names.uses.extend(targets.uses)
+    edge_defs = targets.defs
+  elif isinstance(stmt, ast.ExceptHandler):
+    if stmt.type:
+      names.visit(stmt.type)
+    if stmt.name:
+      names.defs.append(stmt.name)
+  elif isinstance(stmt, (ast.Try, ast.ClassDef)) or (hasattr(ast, 'TryStar') and isinstance(stmt, ast.TryStar)):
+    pass
+  else:
+    names.visit(stmt)
+  return names.uses, names.defs, edge_defs
+
+
+class _Names(ast.NodeVisitor):
+  """Collects the names read and assigned by an ast, in evaluation order. Names bound by comprehensions and lambdas
+  are local to them, and the bodies of nested functions and classes are not visited"""
+
+  def __init__(self):
+    self.uses: List[str] = []
+    self.defs: List[str] = []
+    self.bound: List[Set[str]] = []
+
+
+  def visit_Name(self, node: ast.Name) -> Any:
+    if isinstance(node.ctx, ast.Load):
+      if not any(node.id in bound for bound in self.bound):
+        self.uses.append(node.id)
+    elif not any(node.id in bound for bound in self.bound):
+      self.defs.append(node.id)
+
+
+  def visit_Assign(self, node: ast.Assign) -> Any:
+    self.visit(node.value)
+    for target in node.targets:
+      self.visit(target)
+
+
+  def visit_AugAssign(self, node: ast.AugAssign) -> Any:
+    self.visit(node.value)
+    if isinstance(node.target, ast.Name):
+      self.uses.append(node.target.id)
+    self.visit(node.target)
+
+
+  def visit_AnnAssign(self, node: ast.AnnAssign) -> Any:
+    if node.value:
+      self.visit(node.value)
+    self.visit(node.target)
+
+
+  def visit_NamedExpr(self, node: ast.NamedExpr) -> Any:
+    self.visit(node.value)
+    self.defs.append(node.target.id)
+
+
+  def visit_Import(self, node: ast.Import) -> Any:
+    self.defs.extend(alias.asname or alias.name.split('.')[0] for alias in node.names)
+
+
+  def visit_ImportFrom(self, node: ast.ImportFrom) -> Any:
+    self.defs.extend(alias.asname or alias.name for alias in node.names if alias.name != '*')
+
+
+  def visit_FunctionDef(self, node: ast.FunctionDef) -> Any:
+    for expr in node.decorator_list + node.args.defaults + [d for d in node.args.kw_defaults if d]:
+      self.visit(expr)
+    self.defs.append(node.name)
+
+
+  def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> Any:
+    self.visit_FunctionDef(node)
+
+
+  def visit_ClassDef(self, node: ast.ClassDef) -> Any:
+    for expr in node.decorator_list + node.bases + [keyword.value for keyword in node.keywords]:
+      self.visit(expr)
+    self.defs.append(node.name)
+
+
+  def visit_Lambda(self, node: ast.Lambda) -> Any:
+    for expr in node.args.defaults + [d for d in node.args.kw_defaults if d]:
+      self.visit(expr)
+    args = node.args.posonlyargs + node.args.args + node.args.kwonlyargs + [node.args.vararg, node.args.kwarg]
+    self.bound.append({arg.arg for arg in args if arg})
+    self.visit(node.body)
+    self.bound.pop()
+
+
+  def _visit_comprehension(self, node: ast.AST) -> Any:
+    # The first iterable is evaluated in the enclosing scope
+    self.visit(node.generators[0].iter)
+    bound: Set[str] = set()
+    self.bound.append(bound)
+    for i, generator in enumerate(node.generators):
+      if i:
+        self.visit(generator.iter)
+      bound.update(name.id for name in ast.walk(generator.target) if isinstance(name, ast.Name))
+      for condition in generator.ifs:
+        self.visit(condition)
+    for child in ('key', 'value', 'elt'):
+      if hasattr(node, child):
+        self.visit(getattr(node, child))
+    self.bound.pop()
+
+
+  visit_ListComp = visit_SetComp = visit_DictComp = visit_GeneratorExp = _visit_comprehension
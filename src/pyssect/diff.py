@@ -0,0 +1,241 @@
+from dataclasses import dataclass, field
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from .graph import PyssectGraph
+from .node import PyssectNode, ControlEvent, Location, shift_name
+
+
+Signature = Tuple[str, ...]
+
+
+@dataclass
+class GraphPatch:
+  """The changes turning one build of a graph into the next, in the order they are applied: nodes are removed, then
+  matched nodes are renamed and updated, new nodes are added, and finally edges are removed and added.
+
+  `moved_nodes` and `changed_nodes` are keyed by the previous name of a node. A moved node only shifted by a number of
+  lines, its name following its start as in `shift_graph`, which is what edits above a node do to it. Otherwise
+  `changed_nodes` holds the fields that differ, with `name` present when the node was renamed. Added nodes carry no
+  edges, every edge they have is in `added_edges`. Edges are named as in the new build, and an edge whose
+  `ControlEvent` changed is only added again with its new event. Edges of removed nodes go with them
+  """
+  root: str
+  cur: str
+  removed_nodes: List[str] = field(default_factory=list)
+  moved_nodes: Dict[str, int] = field(default_factory=dict)
+  changed_nodes: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+  added_nodes: List[PyssectNode] = field(default_factory=list)
+  removed_edges: List[Tuple[str, str]] = field(default_factory=list)
+  added_edges: List[Tuple[str, str, ControlEvent]] = field(default_factory=list)
+
+
+  def __bool__(self) -> bool:
+    return bool(
+      self.removed_nodes or self.moved_nodes or self.changed_nodes or self.added_nodes or self.removed_edges or
+      self.added_edges
+    )
+
+
+@dataclass
+class Patch:
+  """The changes turning one build of a module into the next: graphs removed and added whole, and a `GraphPatch` for
+  each graph that both builds have and that changed"""
+  removed: List[str] = field(default_factory=list)
+  added: Dict[str, PyssectGraph] = field(default_factory=dict)
+  changed: Dict[str, GraphPatch] = field(default_factory=dict)
+
+
+  def __bool__(self) -> bool:
+    return bool(self.removed or self.added or self.changed)
+
+
+def diff(old: Dict[str, PyssectGraph], new: Dict[str, PyssectGraph]) -> Patch:
+  """Returns the patch turning the build old into the build new. Graphs are matched by key, and nodes within them by
+  `match_nodes`, so lines inserted above a node rename it rather than replacing it"""
+  patch = Patch(removed=[key for key in old if key not in new])
+  for key, cfg in new.items():
+    if key not in old:
+      patch.added[key] = cfg
+      continue
+    graph_patch = diff_graphs(old[key], cfg)
+    if graph_patch or graph_patch.root != old[key].root or graph_patch.cur != old[key].cur:
+      patch.changed[key] = graph_patch
+  return patch
+
+
+def diff_graphs(old: PyssectGraph, new: PyssectGraph) -> GraphPatch:
+  """Returns the patch turning the graph old into the graph new"""
+  old_signatures, new_signatures = content_signatures(old), content_signatures(new)
+  matches = match_nodes(old, new, old_signatures, new_signatures)
+  patch = GraphPatch(new.root, new.cur)
+  patch.removed_nodes = [name for name in old.nodes if name not in matches]
+
+  matched = set()
+  for old_name, new_name in matches.items():
+    matched.add(new_name)
+    old_node, new_node = old.nodes[old_name], new.nodes[new_name]
+    changes: Dict[str, Any] = {}
+    if old_name != new_name:
+      changes['name'] = new_name
+    if old_node.type != new_node.type:
+      changes['type'] = new_node.type
+    if old_node.start != new_node.start:
+      changes['start'] = new_node.start
+    if old_node.end != new_node.end:
+      changes['end'] = new_node.end
+    if old_signatures[old_name] != new_signatures[new_name]:
+      changes['contents'] = list(new_node.contents)
+    delta = new_node.start.line - old_node.start.line
+    if changes.keys() == {'name', 'start', 'end'} and _is_shift(old_name, old_node, changes, delta):
+      patch.moved_nodes[old_name] = delta
+    elif changes:
+      patch.changed_nodes[old_name] = changes
+
+  for name, node in new.nodes.items():
+    if name not in matched:
+      patch.added_nodes.append(PyssectNode(name, node.type, node.start, node.end, contents=list(node.contents)))
+
+  old_edges = {}
+  for name, node in old.nodes.items():
+    if name in matches:
+      for child, event in node.children.items():
+        if child in matches:
+          old_edges[matches[name], matches[child]] = event
+  for name, node in new.nodes.items():
+    for child, event in node.children.items():
+      if old_edges.get((name, child)) != event:
+        patch.added_edges.append((name, child, event))
+  patch.removed_edges = [edge for edge in old_edges if edge[1] not in new.nodes[edge[0]].children]
+  return patch
+
+
+def _is_shift(name: str, node: PyssectNode, changes: Dict[str, Any], delta: int) -> bool:
+  return (
+    changes['name'] == shift_name(name, delta) and
+    changes['start'] == Location(node.start.line + delta, node.start.column) and
+    changes['end'] == Location(node.end.line + delta, node.end.column)
+  )
+
+
+def match_nodes(
+  old: PyssectGraph,
+  new: PyssectGraph,
+  old_signatures: Optional[Dict[str, Signature]] = None,
+  new_signatures: Optional[Dict[str, Signature]] = None
+) -> Dict[str, str]:
+  """Matches the nodes of two builds of a graph, returning the new name of each matched node of old. Names are not
+  compared, since they derive from locations.
+
+  The roots are matched first, then each node whose type and rendered contents appear exactly once in both graphs.
+  Matches are then spread along edges: the unmatched children, and then parents, of a matched pair are grouped by
+  edge event and node type, and groups of the same size on both sides are matched in order. Every step visits each
+  node and edge a bounded number of times, so matching runs in time linear in the size of the graphs
+  """
+  matches: Dict[str, str] = {}
+  taken = set()
+  queue = deque()
+
+  def match(old_name: str, new_name: str) -> None:
+    matches[old_name] = new_name
+    taken.add(new_name)
+    queue.append((old_name, new_name))
+
+  if old.root in old.nodes and new.root in new.nodes:
+    match(old.root, new.root)
+
+  old_keys = _unique_keys(old, old_signatures or content_signatures(old))
+  new_keys = _unique_keys(new, new_signatures or content_signatures(new))
+  for key, old_name in old_keys.items():
+    new_name = new_keys.get(key)
+    if old_name is not None and new_name is not None and old_name not in matches and new_name not in taken:
+      match(old_name, new_name)
+
+  while queue:
+    old_name, new_name = queue.popleft()
+    old_node, new_node = old.nodes[old_name], new.nodes[new_name]
+    for old_edges, new_edges in [(old_node.children, new_node.children), (old_node.parents, new_node.parents)]:
+      old_groups = _groups(old_edges, old, lambda name: name not in matches)
+      new_groups = _groups(new_edges, new, lambda name: name not in taken)
+      for key, old_group in old_groups.items():
+        new_group = new_groups.get(key, [])
+        if len(old_group) == len(new_group):
+          for pair in zip(old_group, new_group):
+            match(*pair)
+  return matches
+
+
+def _groups(
+  edges: Dict[str, ControlEvent],
+  cfg: PyssectGraph,
+  free: Callable[[str], bool]
+) -> Dict[Tuple[ControlEvent, str], List[str]]:
+  groups: Dict[Tuple[ControlEvent, str], List[str]] = {}
+  for name, event in edges.items():
+    if free(name):
+      groups.setdefault((event, cfg.nodes[name].type), []).append(name)
+  return groups
+
+
+def _unique_keys(cfg: PyssectGraph, signatures: Dict[str, Signature]) -> Dict[Hashable, Optional[str]]:
+  """Maps the type and content signature of each node to its name, or to None when several nodes share them. Nodes
+  without contents are left out, having nothing to tell them apart"""
+  keys: Dict[Hashable, Optional[str]] = {}
+  for name, node in cfg.nodes.items():
+    if node.contents:
+      key = (node.type, signatures[name])
+      keys[key] = None if key in keys else name
+  return keys
+
+
+def content_signatures(cfg: PyssectGraph) -> Dict[str, Signature]:
+  """Returns the contents of each node of a graph rendered as text, which leaves out their locations"""
+  from .serializers import render_content
+  return {name: tuple(render_content(content) for content in node.contents) for name, node in cfg.nodes.items()}
+
+
+def apply_patch(cfg_dict: Dict[str, PyssectGraph], patch: Patch) -> Dict[str, PyssectGraph]:
+  """Applies a patch to the build it was made from, in place, and returns it. Nodes keep their order where they
+  survive, with added nodes after them"""
+  for key in patch.removed:
+    del cfg_dict[key]
+  for key, graph_patch in patch.changed.items():
+    apply_graph_patch(cfg_dict[key], graph_patch)
+  cfg_dict.update(patch.added)
+  return cfg_dict
+
+
+def apply_graph_patch(cfg: PyssectGraph, patch: GraphPatch) -> PyssectGraph:
+  """Applies a graph patch to the graph it was made from, in place, and returns it"""
+  cfg._invalidate()
+  removed = set(patch.removed_nodes)
+  renames = {old: changes['name'] for old, changes in patch.changed_nodes.items() if 'name' in changes}
+  renames.update((old, shift_name(old, delta)) for old, delta in patch.moved_nodes.items())
+
+  nodes: Dict[str, PyssectNode] = {}
+  for name, node in cfg.nodes.items():
+    if name in removed:
+      continue
+    if name in patch.moved_nodes:
+      delta = patch.moved_nodes[name]
+      node.name = renames[name]
+      node.start = Location(node.start.line + delta, node.start.column)
+      node.end = Location(node.end.line + delta, node.end.column)
+    for key, value in patch.changed_nodes.get(name, {}).items():
+      setattr(node, key, value)
+    node.parents = {renames.get(name, name): event for name, event in node.parents.items() if name not in removed}
+    node.children = {renames.get(name, name): event for name, event in node.children.items() if name not in removed}
+    nodes[node.name] = node
+  for node in patch.added_nodes:
+    nodes[node.name] = PyssectNode(node.name, node.type, node.start, node.end, contents=list(node.contents))
+
+  for parent, child in patch.removed_edges:
+    nodes[parent].remove_child(child)
+    nodes[child].remove_parent(parent)
+  for parent, child, event in patch.added_edges:
+    nodes[parent].add_child(child, event)
+    nodes[child].add_parent(parent, event)
+
+  cfg.nodes = nodes
+  cfg.root = patch.root
+  cfg.cur = patch.cur
+  return cfg
@@ -0,0 +1,137 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class DominatorTree:
+  """The dominator tree of the nodes of a graph reachable from a start node, computed with the Cooper, Harvey and
+  Kennedy iterative algorithm over integer node ids. Nodes are numbered along a depth first walk of the tree, so
+  `dominates` is two comparisons rather than a walk up the tree.
+
+  A post dominator tree is the dominator tree of the reversed graph, started from a virtual exit joining every node
+  without children. Nodes immediately post dominated by the virtual exit report no immediate dominator.
+  """
+  names: Tuple[str, ...]
+  ids: Dict[str, int]
+  idom: List[int]
+
+
+  def __init__(self, names: Sequence[str], idom: List[int], roots: Sequence[int]):
+    """Takes the node names, per node id the id of its immediate dominator, and the roots of the tree. Unreachable
+    nodes and roots use -1 as their immediate dominator"""
+    self.names = tuple(names)
+    self.ids = {name: i for i, name in enumerate(self.names)}
+    self.idom = idom
+    self._children: List[List[int]] = [[] for _ in self.names]
+    for i, parent in enumerate(idom):
+      if parent >= 0:
+        self._children[parent].append(i)
+
+    # Entry and exit numbers of a depth first walk of the tree, -1 for nodes outside of the tree
+    self._entry = [-1] * len(self.names)
+    self._exit = [-1] * len(self.names)
+    counter = 0
+    for root in roots:
+      stack = [(root, iter(self._children[root]))]
+      self._entry[root] = counter
+      counter += 1
+      while stack:
+        node, children = stack[-1]
+        child = next(children, None)
+        if child is None:
+          stack.pop()
+          self._exit[node] = counter
+          counter += 1
+        else:
+          self._entry[child] = counter
+          counter += 1
+          stack.append((child, iter(self._children[child])))
+
+
+  @classmethod
+  def build(
+    cls,
+    names: Sequence[str],
+    successors: Sequence[Iterable[int]],
+    predecessors: Sequence[Iterable[int]],
+    starts: Sequence[int]
+  ) -> 'DominatorTree':
+    """Computes the dominator tree of a graph given as successor and predecessor lists over node ids. With more than
+    one start node a virtual start joins them, and the nodes it immediately dominates become roots of the tree"""
+    n = len(names)
+    virtual = n
+    succs = [list(s) for s in successors] + [list(starts)]
+    preds = [list(p) for p in predecessors] + [[]]
+    for start in starts:
+      preds[start].append(virtual)
+
+    # Postorder numbers of the nodes reachable from the start, iteratively
+    order: List[int] = []
+    number = [-1] * (n + 1)
+    visited = [False] * (n + 1)
+    visited[virtual] = True
+    stack = [(virtual, iter(succs[virtual]))]
+    while stack:
+      node, children = stack[-1]
+      child = next(children, None)
+      if child is None:
+        stack.pop()
+        number[node] = len(order)
+        order.append(node)
+      elif not visited[child]:
+        visited[child] = True
+        stack.append((child, iter(succs[child])))
+
+    idom = [-1] * (n + 1)
+    idom[virtual] = virtual
+    changed = True
+    while changed:
+      changed = False
+      for node in reversed(order[:-1]):
+        new = -1
+        for pred in preds[node]:
+          if idom[pred] < 0:
+            continue
+          new = pred if new < 0 else _intersect(pred, new, idom, number)
+        if idom[node] != new:
+          idom[node] = new
+          changed = True
+
+    return cls(names, [-1 if d == virtual else d for d in idom[:n]], [i for i in range(n) if idom[i] == virtual])
+
+
+  def __contains__(self, name: str) -> bool:
+    """Whether node name is reachable, and so part of the tree"""
+    return name in self.ids and self._entry[self.ids[name]] >= 0
+
+
+  def __len__(self) -> int:
+    return sum(1 for entry in self._entry if entry >= 0)
+
+
+  def immediate(self, name: str) -> Optional[str]:
+    """Returns the immediate dominator of node name, or None for roots of the tree and unreachable nodes"""
+    parent = self.idom[self.ids[name]]
+    return self.names[parent] if parent >= 0 else None
+
+
+  def children(self, name: str) -> List[str]:
+    """Returns the nodes immediately dominated by node name"""
+    return [self.names[i] for i in self._children[self.ids[name]]]
+
+
+  def dominates(self, a: str, b: str) -> bool:
+    """Whether every path from the start to node b passes through node a. A node dominates itself"""
+    i, j = self.ids[a], self.ids[b]
+    return 0 <= self._entry[i] <= self._entry[j] and self._exit[j] <= self._exit[i]
+
+
+  def strictly_dominates(self, a: str, b: str) -> bool:
+    return a != b and self.dominates(a, b)
+
+
+def _intersect(a: int, b: int, idom: List[int], number: List[int]) -> int:
+  while a != b:
+    while number[a] < number[b]:
+      a = idom[a]
+    while number[b] < number[a]:
+      b = idom[b]
+  return a
@@ -0,0 +1,148 @@
+from collections.abc import Mapping
+from dataclasses import replace
+from typing import Any, Dict, Iterator, List, NamedTuple, Tuple
+from .frozen import FrozenGraph
+from .graph import PyssectGraph
+from .node import StatementRecord
+from dis import Instruction
+import hashlib
+
+
+def canonical_order(cfg: PyssectGraph) -> List[str]:
+  """Returns the node names of cfg in breadth first order from the root, following children in insertion order, then
+  the nodes unreachable from the root in the same way. The order does not depend on node names, so graphs of the same
+  shape built by the same builder list corresponding nodes at the same positions"""
+  order = [node.name for node in cfg.bfs()] if cfg.root in cfg.nodes else []
+  seen = set(order)
+  for name in cfg.nodes:
+    if name not in seen:
+      for node in cfg.bfs(name):
+        if node.name not in seen:
+          seen.add(node.name)
+          order.append(node.name)
+  return order
+
+
+def canonical_freeze(cfg: PyssectGraph) -> FrozenGraph:
+  """Freezes cfg with its nodes numbered in `canonical_order`, the root being node 0"""
+  nodes = {name: cfg.nodes[name] for name in canonical_order(cfg)}
+  return PyssectGraph(cfg.name, cfg.root, cfg.cur, nodes).freeze()
+
+
+def structural_hash(cfg: PyssectGraph, contents: bool = False) -> str:
+  """Returns a hash of the shape of cfg: its edges in canonical node order, in both directions, and their
+  `ControlEvent` labels. Node names, locations and contents are left out, unless contents is true, in which case the
+  type of each node's contents is included. The hash is cached until the graph changes"""
+  key = ('structural_hash', contents)
+  if key not in cfg._analyses:
+    cfg._analyses[key] = _frozen_hash(canonical_freeze(cfg), contents)
+  return cfg._analyses[key]
+
+
+def structural_hashes(cfg_dict: Dict[str, PyssectGraph], contents: bool = False) -> Dict[str, str]:
+  """Returns the structural hash of every graph of a dictionary"""
+  return {name: structural_hash(cfg, contents) for name, cfg in cfg_dict.items()}
+
+
+def _frozen_hash(frozen: FrozenGraph, contents: bool) -> str:
+  digest = hashlib.sha256()
+  for section in [
+    frozen.succ_offsets, frozen.succ_targets, frozen.succ_events,
+    frozen.pred_offsets, frozen.pred_targets, frozen.pred_events
+  ]:
+    data = bytes(section)
+    digest.update(len(data).to_bytes(8, 'little'))
+    digest.update(data)
+  if contents:
+    for node_contents in frozen.contents:
+      digest.update((','.join(_content_type(content) for content in node_contents) + ';').encode('utf-8'))
+  return digest.hexdigest()
+
+
+def _content_type(content: Any) -> str:
+  if isinstance(content, Instruction):
+    return content.opname
+  if isinstance(content, StatementRecord):
+    return content.type
+  return type(content).__name__
+
+
+class GraphInstance(NamedTuple):
+  """What a graph of a `DedupStore` keeps apart from its shape: everything but the edges"""
+  shape: str
+  name: str
+  cur: int
+  names: Tuple[str, ...]
+  types: Tuple[str, ...]
+  locations: Any
+  contents: Tuple[Tuple[Any, ...], ...]
+
+
+class DedupStore(Mapping):
+  """A mapping of keys to graphs that stores the edges of graphs with the same structural hash once. `shapes` holds a
+  canonical `FrozenGraph` per hash, the first graph added with it, and each key holds a `GraphInstance` with its own
+  names, types, locations and contents. Graphs are rebuilt on lookup with their nodes in canonical order"""
+  shapes: Dict[str, FrozenGraph]
+  instances: Dict[str, GraphInstance]
+
+
+  def __init__(self, contents: bool = False):
+    self.contents = contents
+    self.shapes = {}
+    self.instances = {}
+
+
+  def add(self, key: str, cfg: PyssectGraph) -> str:
+    """Adds cfg under key, returning its structural hash"""
+    frozen = canonical_freeze(cfg)
+    shape = _frozen_hash(frozen, self.contents)
+    self.shapes.setdefault(shape, frozen)
+    self.instances[key] = GraphInstance(
+      shape, frozen.name, frozen.cur, frozen.names, frozen.types, frozen.locations, frozen.contents
+    )
+    return shape
+
+
+  def update(self, cfg_dict: Dict[str, PyssectGraph]) -> None:
+    """Adds every graph of a dictionary under its key"""
+    for key, cfg in cfg_dict.items():
+      self.add(key, cfg)
+
+
+  def frozen(self, key: str) -> FrozenGraph:
+    """Returns the graph stored under key as a `FrozenGraph` sharing the edge arrays of its shape"""
+    instance = self.instances[key]
+    return replace(
+      self.shapes[instance.shape],
+      name=instance.name,
+      cur=instance.cur,
+      names=instance.names,
+      types=instance.types,
+      locations=instance.locations,
+      contents=instance.contents
+    )
+
+
+  def __getitem__(self, key: str) -> PyssectGraph:
+    return self.frozen(key).thaw()
+
+
+  def __iter__(self) -> Iterator[str]:
+    return iter(self.instances)
+
+
+  def __len__(self) -> int:
+    return len(self.instances)
+
+
+  def shape_of(self, key: str) -> str:
+    return self.instances[key].shape
+
+
+  def keys_by_shape(self) -> Dict[str, List[str]]:
+    """Groups the keys of the store by the structural hash of their graph"""
+    groups: Dict[str, List[str]] = {}
+    for key, instance in self.instances.items():
+      groups.setdefault(instance.shape, []).append(key)
+    return groups
+
@@ -0,0 +1,146 @@
+from array import array
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .graph import PyssectGraph
+from .node import PyssectNode, Location, ControlEvent
+
+
+EVENTS: List[ControlEvent] = list(ControlEvent)
+EVENT_CODES: Dict[ControlEvent, int] = {event: code for code, event in enumerate(EVENTS)}
+
+
+@dataclass(frozen=True)
+class FrozenGraph:
+  """A compact, read only form of a `PyssectGraph`, created with `PyssectGraph.freeze()`.
+
+  Nodes are numbered `0..n-1` in the graph's insertion order. Edges are stored once per direction in CSR layout: the
+  successors of node `i` are `succ_targets[succ_offsets[i]:succ_offsets[i + 1]]`, labelled by the `ControlEvent`
+  codes at the same positions of `succ_events`, and likewise for predecessors. `locations` packs the start line,
+  start column, end line and end column of node `i` at `locations[4 * i:4 * i + 4]`.
+  """
+  name: str
+  root: int
+  cur: int
+  names: Tuple[str, ...]
+  types: Tuple[str, ...]
+  succ_offsets: array
+  succ_targets: array
+  succ_events: bytes
+  pred_offsets: array
+  pred_targets: array
+  pred_events: bytes
+  locations: array
+  contents: Tuple[Tuple[Any, ...], ...]
+
+
+  @staticmethod
+  def from_graph(graph: PyssectGraph) -> 'FrozenGraph':
+    ids = {name: i for i, name in enumerate(graph.nodes)}
+    nodes = graph.nodes.values()
+    succ_offsets, succ_targets, succ_events = FrozenGraph._pack_edges(ids, (node.children for node in nodes))
+    pred_offsets, pred_targets, pred_events = FrozenGraph._pack_edges(ids, (node.parents for node in nodes))
+    locations = array('i')
+    for node in nodes:
+      locations.extend((node.start.line, node.start.column, node.end.line, node.end.column))
+
+    return FrozenGraph(
+      name=graph.name,
+      root=ids[graph.root],
+      cur=ids.get(graph.cur, ids[graph.root]),
+      names=tuple(graph.nodes),
+      types=tuple(node.type for node in nodes),
+      succ_offsets=succ_offsets,
+      succ_targets=succ_targets,
+      succ_events=succ_events,
+      pred_offsets=pred_offsets,
+      pred_targets=pred_targets,
+      pred_events=pred_events,
+      locations=locations,
+      contents=tuple(tuple(node.contents) for node in nodes)
+    )
+
+
+  @staticmethod
+  def _pack_edges(ids: Dict[str, int], edge_maps: Iterator[Dict[str, ControlEvent]]) -> Tuple[array, array, bytes]:
+    offsets, targets, events = array('I', [0]), array('I'), bytearray()
+    for edges in edge_maps:
+      for name, event in edges.items():
+        targets.append(ids[name])
+        events.append(EVENT_CODES[event])
+      offsets.append(len(targets))
+    return offsets, targets, bytes(events)
+
+
+  def thaw(self) -> PyssectGraph:
+    """Returns a mutable `PyssectGraph` equal to the graph this was frozen from"""
+    return PyssectGraph(
+      name=self.name,
+      root=self.names[self.root],
+      cur=self.names[self.cur],
+      nodes={name: self.node(i) for i, name in enumerate(self.names)}
+    )
+
+
+  def __len__(self) -> int:
+    return len(self.names)
+
+
+  @property
+  def num_edges(self) -> int:
+    return len(self.succ_targets)
+
+
+  @cached_property
+  def ids(self) -> Dict[str, int]:
+    """Maps node names to node ids"""
+    return {name: i for i, name in enumerate(self.names)}
+
+
+  def successors(self, i: int) -> Iterator[Tuple[int, ControlEvent]]:
+    """Yields the `(id, event)` pairs of the children of node i"""
+    for j in range(self.succ_offsets[i], self.succ_offsets[i + 1]):
+      yield self.succ_targets[j], EVENTS[self.succ_events[j]]
+
+
+  def predecessors(self, i: int) -> Iterator[Tuple[int, ControlEvent]]:
+    """Yields the `(id, event)` pairs of the parents of node i"""
+    for j in range(self.pred_offsets[i], self.pred_offsets[i + 1]):
+      yield self.pred_targets[j], EVENTS[self.pred_events[j]]
+
+
+  def start(self, i: int) -> Location:
+    return Location(self.locations[4 * i], self.locations[4 * i + 1])
+
+
+  def end(self, i: int) -> Location:
+    return Location(self.locations[4 * i + 2], self.locations[4 * i + 3])
+
+
+  def node(self, i: int) -> PyssectNode:
+    """Materializes node i as a `PyssectNode`"""
+    return PyssectNode(
+      name=self.names[i],
+      type=self.types[i],
+      start=self.start(i),
+      end=self.end(i),
+      parents={self.names[j]: event for j, event in self.predecessors(i)},
+      children={self.names[j]: event for j, event in self.successors(i)},
+      contents=list(self.contents[i])
+    )
+
+
+  def walk(self, start: Optional[int] = None) -> Iterator[int]:
+    """Yields the ids of all nodes reachable from start, defaulting to the root, in breadth first order"""
+    from collections import deque
+    start = self.root if start is None else start
+    queue = deque([start])
+    visited = bytearray(len(self.names))
+    visited[start] = 1
+    while queue:
+      i = queue.popleft()
+      yield i
+      for j in self.succ_targets[self.succ_offsets[i]:self.succ_offsets[i + 1]]:
+        if not visited[j]:
+          visited[j] = 1
+          queue.append(j)
@@ -1,14 +1,29 @@
 from dataclasses import dataclass, field
-from typing import Dict
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .dominators import DominatorTree
 from .node import PyssectNode, ControlEvent
 
 
+# Counts the edits made to all graphs, so indexes over many graphs can tell in constant time that none of them changed
+_edits = 0
+
+
+def edit_count() -> int:
+  """Returns the number of edits made to all graphs so far"""
+  return _edits
+
+
 @dataclass
 class PyssectGraph:
   name: str
   root: str = 'root'
   cur: str = 'root'
   nodes: Dict[str, PyssectNode] = field(default_factory=dict)
+  # Analyses computed from the graph's structure, cleared whenever a graph method changes its edges
+  _analyses: Dict[str, Any] = field(default_factory=dict, init=False, repr=False, compare=False)
+  # Counts the edits made to the graph, so indexes over it can tell whether it changed since they were built
+  _version: int = field(default=0, init=False, repr=False, compare=False)
 
 
   def next(self) -> None:
@@ -28,6 +43,7 @@ class PyssectGraph:
 
   def attach_child(self, node: PyssectNode, event: ControlEvent = ControlEvent.PASS) -> None:
     """Add a child node to the current node"""
+    self._invalidate()
     self._conditional_add(node)
     self.nodes[self.cur].add_child(node.name, event)
     self.nodes[node.name].add_parent(self.cur, event)
@@ -35,6 +51,7 @@ class PyssectGraph:
 
   def attach_parent(self, node: PyssectNode, event: ControlEvent = ControlEvent.PASS) -> None:
     """Add a parent node to the current node"""
+    self._invalidate()
     self._conditional_add(node)
     self.nodes[self.cur].add_parent(node.name, event)
     self.nodes[node.name].add_child(self.cur, event)
@@ -42,6 +59,7 @@ class PyssectGraph:
 
   def insert_child(self, node: PyssectNode, event: ControlEvent = ControlEvent.PASS) -> None:
     """Inserts a child node to the current node, replacing node connections from the children to the new parent"""
+    self._invalidate()
     self._conditional_add(node)
     self.attach_child(node)
 
@@ -64,6 +82,7 @@ class PyssectGraph:
 
   def merge_nodes(self, parent: PyssectNode, child: PyssectNode) -> None:
     """Merges the two nodes parent and child, attaching all grandchild nodes to the new parent"""
+    self._invalidate()
     parent.extend_contents(child.contents)
     parent.end = child.end
 
@@ -76,6 +95,44 @@ class PyssectGraph:
     del self.nodes[child.name]
 
 
+  def dominators(self) -> DominatorTree:
+    """Returns the dominator tree of the nodes reachable from the root. The tree is cached until the graph changes"""
+    if 'dominators' not in self._analyses:
+      names, ids = list(self.nodes), {name: i for i, name in enumerate(self.nodes)}
+      successors = [[ids[child] for child in node.children] for node in self.nodes.values()]
+      predecessors = [[ids[parent] for parent in node.parents] for node in self.nodes.values()]
+      starts = [ids[self.root]] if self.root in ids else []
+      self._analyses['dominators'] = DominatorTree.build(names, successors, predecessors, starts)
+    return self._analyses['dominators']
+
+
+  def post_dominators(self) -> DominatorTree:
+    """Returns the post dominator tree of the nodes that reach a node without children. The tree is cached until the
+    graph changes"""
+    if 'post_dominators' not in self._analyses:
+      names, ids = list(self.nodes), {name: i for i, name in enumerate(self.nodes)}
+      successors = [[ids[parent] for parent in node.parents] for node in self.nodes.values()]
+      predecessors = [[ids[child] for child in node.children] for node in self.nodes.values()]
+      exits = [ids[name] for name, node in self.nodes.items() if not node.children]
+      self._analyses['post_dominators'] = DominatorTree.build(names, successors, predecessors, exits)
+    return self._analyses['post_dominators']
+
+
+  def _invalidate(self) -> None:
+    """Drops cached analyses, graph methods call this before changing edges. Code editing nodes directly must call it
+    as well"""
+    global _edits
+    _edits += 1
+    self._version += 1
+    self._analyses.clear()
+
+
+  def freeze(self) -> 'FrozenGraph':
+    """Returns a compact, read only copy of the graph with integer node ids, see `FrozenGraph`"""
+    from .frozen import FrozenGraph
+    return FrozenGraph.from_graph(self)
+
+
   def get_cur(self) -> PyssectNode:
     return self.nodes[self.cur]
 
@@ -89,8 +146,8 @@ class PyssectGraph:
   def walk(self):
     """Walks along a control flow graph starting with the current node, yielding all descendant nodes,
     in breadth first order. Extending the queue is done after the each node is yielded, allowing for
-    inplace editing of the graph as it is being traversed"""
-    from collections import deque
+    inplace editing of the graph as it is being traversed. The current node is moved to each yielded node, see
+    `bfs` for a traversal that leaves the graph untouched"""
     nodes = deque([self.nodes[self.cur]])
     visited = set()
     while nodes:
@@ -102,27 +159,114 @@ class PyssectGraph:
         nodes.extend(self.iter_child_nodes())
 
 
+  def bfs(self, start: Optional[str] = None) -> Iterator[PyssectNode]:
+    """Yields the nodes reachable from node start, defaulting to the root, in breadth first order. The graph is not
+    modified, so traversals can be interleaved and shared between threads"""
+    start = start or self.root
+    queue = deque([start])
+    visited = {start}
+    while queue:
+      node = self.nodes[queue.popleft()]
+      yield node
+      for child in node.children:
+        if child not in visited:
+          visited.add(child)
+          queue.append(child)
+
+
+  def dfs(self, start: Optional[str] = None) -> Iterator[PyssectNode]:
+    """Yields the nodes reachable from node start, defaulting to the root, in depth first preorder without modifying
+    the graph"""
+    start = start or self.root
+    stack = [iter([start])]
+    visited = set()
+    while stack:
+      name = next(stack[-1], None)
+      if name is None:
+        stack.pop()
+      elif name not in visited:
+        visited.add(name)
+        node = self.nodes[name]
+        yield node
+        stack.append(iter(node.children))
+
+
+  def postorder(self, start: Optional[str] = None) -> Iterator[PyssectNode]:
+    """Yields the nodes reachable from node start, defaulting to the root, in depth first postorder without modifying
+    the graph"""
+    for name in reversed(self._reverse_postorder(start or self.root)):
+      yield self.nodes[name]
+
+
+  def reverse_postorder(self, start: Optional[str] = None) -> Iterator[PyssectNode]:
+    """Yields the nodes reachable from node start, defaulting to the root, in reverse postorder, where every node
+    comes before its successors other than along back edges. The order is cached until the graph changes"""
+    for name in self._reverse_postorder(start or self.root):
+      yield self.nodes[name]
+
+
+  def _reverse_postorder(self, start: str) -> Tuple[str, ...]:
+    key = ('reverse_postorder', start)
+    order = self._analyses.get(key)
+    if order is None:
+      postorder: List[str] = []
+      stack = [(start, iter(self.nodes[start].children))]
+      visited = {start}
+      while stack:
+        name, children = stack[-1]
+        child = next(children, None)
+        if child is None:
+          stack.pop()
+          postorder.append(name)
+        elif child not in visited:
+          visited.add(child)
+          stack.append((child, iter(self.nodes[child].children)))
+      order = self._analyses[key] = tuple(reversed(postorder))
+    return order
+
+
   def clean_graph(self) -> None:
+    """Removes empty nodes with at most one parent and one child from the graph. Nodes are visited breadth first
+    from the root using a worklist, removals reconnect the node's parent to its children without restarting the
+    traversal, and already visited neighbours of a removed node are rechecked, so cleaning runs in O(V + E)"""
+    queue = deque([self.root])
+    visited = set()
+    while queue:
+      name = queue.popleft()
+      if name in visited or name not in self.nodes:
+        continue
+      visited.add(name)
+      queue.extend(self.nodes[name].children)
+
+      removals = [name]
+      while removals:
+        name = removals.pop()
+        if name in self.nodes and self._can_remove(self.nodes[name]):
+          neighbours = [*self.nodes[name].parents, *self.nodes[name].children]
+          self._remove_node(name)
+          removals.extend(n for n in neighbours if n in visited)
     self.go_to_root()
-    for node in self.walk():
-      if self._can_remove(node):
-        self._remove_node()
 
 
-  def _remove_node(self) -> None:
-    """Removes the current node from the graph"""
+  def _remove_node(self, name: Optional[str] = None) -> None:
+    """Removes node name from the graph, defaulting to the current node, connecting its parents to its children.
+    Removing the current node sets the current node to the root"""
+    self._invalidate()
+    name = name or self.cur
+    node = self.nodes[name]
 
-    for parent, p_event in self.nodes[self.cur].parents.items():
-      del self.nodes[parent].children[self.cur]
-      for child, c_event in self.nodes[self.cur].children.items():
+    for parent, p_event in node.parents.items():
+      del self.nodes[parent].children[name]
+      for child, c_event in node.children.items():
         self.nodes[parent].add_child(child, p_event)
         self.nodes[child].add_parent(parent, c_event)
 
-    for child in self.nodes[self.cur].children.keys():
-      del self.nodes[child].parents[self.cur]
+    for child in node.children.keys():
+      del self.nodes[child].parents[name]
 
-    del self.nodes[self.cur]
-    self.go_to_root()
+    del self.nodes[name]
+    if name == self.cur:
+      self.go_to_root()
 
 
   def _can_remove(self, node: PyssectNode) -> bool:
@@ -0,0 +1,109 @@
+from typing import Dict, List, Tuple
+from .builders import ASTtoCFG, Prebuilt, Span
+from .graph import PyssectGraph
+from .node import Location, shift_name
+import ast
+
+
+class IncrementalBuilder:
+  """Keeps the result of a build along with the source span of each graph, and updates it after edits to the source.
+
+  An update parses the new source, then rebuilds only the top level function and class definitions that overlap the
+  edited lines. Every other graph is reused, with its node names, `Location`s and ast contents shifted by the change
+  in line count. `__main__` is always rebuilt, but the definitions it contains are not visited again.
+  """
+  cfg_dict: Dict[str, PyssectGraph]
+  spans: Dict[str, Span]
+  do_clean: bool
+
+
+  def __init__(self, source: str, do_clean: bool = False):
+    self.do_clean = do_clean
+    self._units: Dict[Span, Tuple[ast.stmt, List[str]]] = {}
+    self._build(source, ast.parse(source), {}, {})
+
+
+  def update(self, source: str, start_line: int, end_line: int) -> Dict[str, PyssectGraph]:
+    """Takes the full new source, where lines `start_line` to `end_line` (one indexed and inclusive, numbered as in the
+    previous source) were replaced, and returns the updated build"""
+    tree = ast.parse(source)
+    delta = _line_count(source) - self._line_count
+    prebuilt: Prebuilt = {}
+    reused: Dict[ast.stmt, ast.stmt] = {}
+
+    for stmt in _definitions(tree):
+      start, end = _definition_span(stmt)
+      if end < start_line:
+        shift = 0
+      elif start > end_line + delta:
+        shift = delta
+      else:
+        continue
+
+      previous, names = self._units.get((start - shift, end - shift), (None, []))
+      if type(previous) is not type(stmt) or previous.name != stmt.name:
+        continue
+
+      if shift:
+        ast.increment_lineno(previous, shift)
+        for name in names:
+          shift_graph(self.cfg_dict[name], shift)
+      prebuilt[stmt] = [(name, self.cfg_dict[name], _shift_span(self.spans[name], shift)) for name in names]
+      reused[stmt] = previous
+
+    self._build(source, tree, prebuilt, reused)
+    return self.cfg_dict
+
+
+  def _build(self, source: str, tree: ast.Module, prebuilt: Prebuilt, reused: Dict[ast.stmt, ast.stmt]) -> None:
+    builder = ASTtoCFG()
+    self.cfg_dict = builder.build(tree, self.do_clean, prebuilt)
+    self.spans = builder.spans
+    self._line_count = _line_count(source)
+
+    # Graphs that were reused still hold the previous ast, which is the one to shift on later updates
+    self._units = {}
+    for stmt in _definitions(tree):
+      start, end = _definition_span(stmt)
+      names = [
+        name for name, (span_start, span_end) in self.spans.items()
+        if name != '__main__' and start <= span_start and span_end <= end
+      ]
+      self._units[(start, end)] = (reused.get(stmt, stmt), names)
+
+
+def shift_graph(cfg: PyssectGraph, delta: int) -> None:
+  """Moves every node of a graph built from source by delta lines, renaming nodes to match their new locations. The
+  start of a root node is not taken from the source and stays in place"""
+  names = {name: shift_name(name, delta) for name in cfg.nodes}
+  nodes = {}
+  for name, node in cfg.nodes.items():
+    node.name = names[name]
+    if name != cfg.root:
+      node.start = Location(node.start.line + delta, node.start.column)
+    if name != cfg.root or node.contents:
+      node.end = Location(node.end.line + delta, node.end.column)
+    node.parents = {names[parent]: event for parent, event in node.parents.items()}
+    node.children = {names[child]: event for child, event in node.children.items()}
+    nodes[node.name] = node
+
+  cfg._invalidate()
+  cfg.nodes = nodes
+  cfg.root = names[cfg.root]
+  cfg.cur = names.get(cfg.cur, cfg.root)
+
+
+def _shift_span(span: Span, delta: int) -> Span:
+  return (span[0] + delta, span[1] + delta)
+
+
+def _definitions(tree: ast.Module) -> List[ast.stmt]:
+  return [stmt for stmt in tree.body if isinstance(stmt, (ast.FunctionDef, ast.ClassDef))]
+
+
+def _definition_span(stmt: ast.stmt) -> Span:
+  return (min([stmt.lineno] + [decorator.lineno for decorator in stmt.decorator_list]), stmt.end_lineno)
+
+
+def _line_count(source: str) -> int:
+  return source.count('\n') + 1
@@ -0,0 +1,201 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+from time import perf_counter
+from typing import IO, Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Union
+import json
+import logging
+import sys
+
+
+Record = Dict[str, Any]
+
+
+@dataclass
+class PhaseStats:
+  calls: int = 0
+  seconds: float = 0.0
+
+
+class Sink(ABC):
+  """Receives the records of an `Instrumentation`: one `function` record per function graph built, then a `summary`
+  record with the phase timings and counters when the instrumentation is flushed. Subclasses must define `emit`"""
+
+  @abstractmethod
+  def emit(self, record: Record) -> None:
+    """Handles one record"""
+
+
+  def close(self) -> None:
+    pass
+
+
+class LoggingSink(Sink):
+  """Logs summaries at level, and function records at debug level"""
+
+  def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO):
+    self.logger = logger or logging.getLogger('pyssect')
+    self.level = level
+
+
+  def emit(self, record: Record) -> None:
+    level = self.level if record['event'] == 'summary' else logging.DEBUG
+    self.logger.log(level, 'pyssect %s %s', record['event'], json.dumps(record))
+
+
+class JsonLinesSink(Sink):
+  """Writes each record as a line of json to a file, given as a path or a text file like object. A path is opened in
+  append mode when the first record arrives and closed with the sink"""
+
+  def __init__(self, file: Union[str, IO[str]]):
+    self.file = file
+    self.fp = None if isinstance(file, str) else file
+
+
+  def emit(self, record: Record) -> None:
+    if self.fp is None:
+      self.fp = open(self.file, 'a')
+    self.fp.write(json.dumps(record) + '\n')
+
+
+  def close(self) -> None:
+    if self.fp is None:
+      return
+    if isinstance(self.file, str):
+      self.fp.close()
+      self.fp = None
+    else:
+      self.fp.flush()
+
+
+class ReportSink(Sink):
+  """Prints summaries as a table in the style of `cProfile`'s reports, sorted by total time"""
+
+  def __init__(self, stream: Optional[IO[str]] = None):
+    self.stream = stream
+
+
+  def emit(self, record: Record) -> None:
+    if record['event'] != 'summary':
+      return
+    stream = self.stream or sys.stdout
+    phases = sorted(record['phases'].items(), key=lambda item: item[1]['seconds'], reverse=True)
+    calls = sum(stats['calls'] for _, stats in phases)
+    seconds = sum(stats['seconds'] for _, stats in phases)
+    print(f"         {calls} phase calls in {seconds:.3f} seconds\n", file=stream)
+    print('   ncalls  tottime  percall phase', file=stream)
+    for name, stats in phases:
+      percall = stats['seconds'] / stats['calls'] if stats['calls'] else 0.0
+      print(f"{stats['calls']:>9} {stats['seconds']:>8.3f} {percall:>8.3f} {name}", file=stream)
+    if record['counters']:
+      print('\n    count counter', file=stream)
+      for name, value in record['counters'].items():
+        print(f"{value:>9} {name}", file=stream)
+    print(file=stream)
+
+
+class Instrumentation:
+  """Collects phase timings, counters and per function build records while active as a context manager. The
+  builders and serializers look up the active instrumentation once per call, so nothing is recorded and next to no
+  time is spent when none is active.
+
+  Phases are `parse`, `visit`, `clean` and `serialize`. Counters are `graphs`, `nodes` and `edges` created by a build
+  and `nodes_removed` by cleaning, counted from graph sizes at the end of each phase rather than on every edit.
+  Builds run by `builds_tree` happen in worker processes and are not recorded.
+  """
+  phases: Dict[str, PhaseStats]
+  counters: Dict[str, int]
+
+
+  def __init__(self, *sinks: Sink, on_function: Optional[Callable[[str, Any, float], None]] = None):
+    self.sinks = list(sinks)
+    self.on_function = on_function
+    self.phases = {}
+    self.counters = {}
+    self._tokens: List[Any] = []
+
+
+  def __enter__(self) -> 'Instrumentation':
+    self._tokens.append(_current.set(self))
+    return self
+
+
+  def __exit__(self, *args) -> None:
+    _current.reset(self._tokens.pop())
+    if not self._tokens:
+      self.flush()
+
+
+  @contextmanager
+  def phase(self, name: str) -> Iterator[None]:
+    """Times the enclosed block as one call of phase name"""
+    started = perf_counter()
+    try:
+      yield
+    finally:
+      stats = self.phases.setdefault(name, PhaseStats())
+      stats.calls += 1
+      stats.seconds += perf_counter() - started
+
+
+  def count(self, name: str, value: int = 1) -> None:
+    self.counters[name] = self.counters.get(name, 0) + value
+
+
+  def count_graphs(self, graphs: Iterable[Any]) -> None:
+    """Counts the graphs built by a phase, along with their nodes and edges"""
+    for cfg in graphs:
+      self.count('graphs')
+      self.count('nodes', len(cfg.nodes))
+      self.count('edges', sum(len(node.children) for node in cfg.nodes.values()))
+
+
+  def function_built(self, qualname: str, cfg: Any, seconds: float) -> None:
+    """Called by `ASTtoCFG` after building the graph of each function, including the time spent on nested ones"""
+    if self.on_function is not None:
+      self.on_function(qualname, cfg, seconds)
+    if self.sinks:
+      self._emit({
+        'event': 'function',
+        'name': qualname,
+        'nodes': len(cfg.nodes),
+        'edges': sum(len(node.children) for node in cfg.nodes.values()),
+        'seconds': seconds
+      })
+
+
+  def summary(self) -> Record:
+    return {
+      'event': 'summary',
+      'phases': {name: {'calls': stats.calls, 'seconds': stats.seconds} for name, stats in self.phases.items()},
+      'counters': dict(self.counters)
+    }
+
+
+  def flush(self) -> None:
+    """Sends the summary to the sinks and closes them, then starts collecting again"""
+    self._emit(self.summary())
+    for sink in self.sinks:
+      sink.close()
+    self.phases = {}
+    self.counters = {}
+
+
+  def _emit(self, record: Record) -> None:
+    for sink in self.sinks:
+      sink.emit(record)
+
+
+_current: ContextVar[Optional[Instrumentation]] = ContextVar('pyssect_instrumentation', default=None)
+
+
+def current() -> Optional[Instrumentation]:
+  """Returns the active instrumentation, if any"""
+  return _current.get()
+
+
+def phase(name: str) -> ContextManager[None]:
+  """Times the enclosed block as phase name of the active instrumentation, doing nothing when none is active"""
+  instrumentation = _current.get()
+  return instrumentation.phase(name) if instrumentation is not None else nullcontext()
@@ -0,0 +1,184 @@
+from typing import Dict, Generic, Iterable, List, Mapping, NamedTuple, Optional, Tuple, TypeVar
+from .graph import PyssectGraph, edit_count
+from .node import Location, PyssectNode, StatementRecord
+import ast
+import heapq
+
+
+T = TypeVar('T')
+Interval = Tuple[int, int, T]
+
+
+# Bits given to the column in a point key, columns past the largest are clamped to it
+COLUMN_BITS = 20
+MAX_COLUMN = (1 << COLUMN_BITS) - 1
+
+
+def point_key(line: int, column: int) -> int:
+  """Encodes a line and column as one integer ordered like the pair"""
+  return (line << COLUMN_BITS) | min(max(column, 0), MAX_COLUMN)
+
+
+class IntervalTree(Generic[T]):
+  """A static interval tree over closed intervals with integer bounds. Intervals are sorted by start and the sorted
+  array is read as a balanced binary search tree, the middle of each range holding the largest end of that range, so
+  overlap queries take O(log n + k) time for k results"""
+  starts: List[int]
+  ends: List[int]
+  values: List[T]
+
+
+  def __init__(self, intervals: Iterable[Interval]):
+    intervals = sorted(intervals, key=_bounds)
+    self.starts = [interval[0] for interval in intervals]
+    self.ends = [interval[1] for interval in intervals]
+    self.values = [interval[2] for interval in intervals]
+    self._max_ends = list(self.ends)
+    self._augment(0, len(intervals))
+
+
+  def overlapping(self, start: int, end: int) -> List[T]:
+    """Returns the values of the intervals overlapping [start, end], in order of start"""
+    found: List[T] = []
+    self._collect(0, len(self.starts), start, end, found)
+    return found
+
+
+  def __len__(self) -> int:
+    return len(self.starts)
+
+
+  def _augment(self, lo: int, hi: int) -> int:
+    if lo >= hi:
+      return -1
+    mid = (lo + hi) // 2
+    self._max_ends[mid] = max(self.ends[mid], self._augment(lo, mid), self._augment(mid + 1, hi))
+    return self._max_ends[mid]
+
+
+  def _collect(self, lo: int, hi: int, start: int, end: int, found: List[T]) -> None:
+    if lo >= hi:
+      return
+    mid = (lo + hi) // 2
+    if self._max_ends[mid] < start:
+      return
+    self._collect(lo, mid, start, end, found)
+    if self.starts[mid] > end:
+      return
+    if self.ends[mid] >= start:
+      found.append(self.values[mid])
+    self._collect(mid + 1, hi, start, end, found)
+
+
+class NodeSpan(NamedTuple):
+  """The source span of node name of graph key"""
+  graph: str
+  node: str
+  start: Location
+  end: Location
+
+
+  def width(self) -> Tuple[int, int]:
+    return (self.end.line - self.start.line, self.end.column - self.start.column)
+
+
+def code_start(node: PyssectNode) -> Location:
+  """Returns where the code of a node starts, which is the start of its first content when that is an ast node or a
+  `StatementRecord`. Roots keep the default `start` of line 1 whichever statement they begin with, and exits start
+  where their block ends rather than at the statements that follow it"""
+  if node.contents:
+    first = node.contents[0]
+    if isinstance(first, StatementRecord):
+      return first.start
+    if isinstance(first, ast.AST) and hasattr(first, 'lineno'):
+      return Location.default_start(first)
+  return node.start
+
+
+def node_spans(key: str, cfg: PyssectGraph) -> List[NodeSpan]:
+  """Returns the spans of the nodes of cfg that have contents, from `code_start` to their `end`, cached until the graph
+  changes. Nodes without contents, like the exits of loops, run no code and have no span of their own"""
+  cache_key = ('node_spans', key)
+  if cache_key not in cfg._analyses:
+    cfg._analyses[cache_key] = [
+      NodeSpan(key, name, code_start(node), node.end) for name, node in cfg.nodes.items() if node.contents
+    ]
+  return cfg._analyses[cache_key]
+
+
+class LocationIndex:
+  """Finds the nodes of the graphs of a dictionary at a source location in O(log n) time, through an `IntervalTree`
+  over the `start` and `end` of every node with contents. Spans are closed: a node holds every location from its
+  start to its end.
+
+  The tree is built on the first query. Later queries check in constant time whether any graph was edited through its
+  methods, or built, since, or whether the dictionary's size changed. Only then are the graphs of the dictionary
+  compared with the edit counts they had, and the tree rebuilt if one of them changed, recomputing the spans of the
+  changed graphs alone and merging them with the sorted spans of the others. Replacing a graph by one built before the
+  last query goes unnoticed, call `refresh` after such changes
+  """
+  cfg_dict: Mapping[str, PyssectGraph]
+
+
+  def __init__(self, cfg_dict: Mapping[str, PyssectGraph]):
+    self.cfg_dict = cfg_dict
+    self._tree: Optional[IntervalTree[NodeSpan]] = None
+    self._edits = edit_count()
+    # The graph under each key when the tree was built, its edit count then and its spans, sorted
+    self._spans: Dict[str, Tuple[PyssectGraph, int, List[Interval[NodeSpan]]]] = {}
+
+
+  def refresh(self) -> None:
+    """Rebuilds the tree on the next query"""
+    self._tree = None
+    self._spans = {}
+
+
+  def containing(self, line: int, column: Optional[int] = None) -> List[NodeSpan]:
+    """Returns the spans holding a location, narrowest first. Without a column, returns the spans holding any part of
+    line. A statement's node is narrower than the node of a compound statement or function definition around it"""
+    if column is None:
+      spans = self.tree().overlapping(point_key(line, 0), point_key(line, MAX_COLUMN))
+    else:
+      point = point_key(line, column)
+      spans = self.tree().overlapping(point, point)
+    return sorted(spans, key=lambda span: (span.width(), -span.start.line, -span.start.column))
+
+
+  def at(self, line: int, column: Optional[int] = None) -> Optional[NodeSpan]:
+    """Returns the narrowest span holding a location, see `containing`"""
+    spans = self.containing(line, column)
+    return spans[0] if spans else None
+
+
+  def overlapping(self, start: Location, end: Location) -> List[NodeSpan]:
+    """Returns the spans overlapping the range from start to end, in order of their start"""
+    return self.tree().overlapping(point_key(start.line, start.column), point_key(end.line, end.column))
+
+
+  def tree(self) -> IntervalTree[NodeSpan]:
+    """Returns the interval tree over the current spans, rebuilding it if a graph changed"""
+    if self._tree is not None and self._edits == edit_count() and len(self._spans) == len(self.cfg_dict):
+      return self._tree
+
+    self._edits = edit_count()
+    spans = {}
+    for key, cfg in self.cfg_dict.items():
+      seen = self._spans.get(key)
+      if seen is None or seen[0] is not cfg or seen[1] != cfg._version:
+        seen = (cfg, cfg._version, sorted(_intervals(key, cfg), key=_bounds))
+      spans[key] = seen
+    changed = len(spans) != len(self._spans) or any(spans[key] is not self._spans.get(key) for key in spans)
+    self._spans = spans
+    if self._tree is None or changed:
+      self._tree = IntervalTree(heapq.merge(*(intervals for _, _, intervals in spans.values()), key=_bounds))
+    return self._tree
+
+
+def _intervals(key: str, cfg: PyssectGraph) -> Iterable[Interval[NodeSpan]]:
+  for span in node_spans(key, cfg):
+    yield point_key(span.start.line, span.start.column), point_key(span.end.line, span.end.column), span
+
+
+def _bounds(interval: Interval) -> Tuple[int, int]:
+  return interval[0], interval[1]
@@ -0,0 +1,164 @@
+from array import array
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple, Union
+from .frozen import EVENTS, EVENT_CODES
+from .graph import PyssectGraph
+from .node import ControlEvent, PyssectNode
+
+
+Point = Tuple[int, int]
+# Start and end of a compound statement, with whether it continues the chain of an `If` as the `If` of an `elif`
+Span = Tuple[Point, Point, bool]
+
+
+# Types of the statements whose nodes open a nested block
+COMPOUND = frozenset(['If', 'For', 'AsyncFor', 'While', 'Try', 'TryStar', 'With', 'AsyncWith', 'Match'])
+COLUMNS: Tuple[str, ...] = (
+  'nodes', 'edges', 'cyclomatic', 'max_nesting', 'loops', *(f"edges_{event.name.lower()}" for event in EVENTS)
+)
+
+
+class GraphMetrics(NamedTuple):
+  """Metrics of the part of a graph reachable from its root.
+
+  `cyclomatic` is one plus, for every node, the edges leaving it beyond the first, which is `edges - nodes + 2` when
+  the graph has a single exit and does not undercount functions that return early. `loops` counts loop headers, the
+  targets of back edges of a depth first walk, so `continue` adds no loop. `max_nesting` is the deepest chain of
+  compound statements, like `if` and `for`, nested in one another, told apart by their `type`. An `If` that is the
+  sole statement of the `else` of another continues its chain rather than nesting, as in `elif`. It is told from the
+  graph alone, as the `ONFALSE` child of an `If` ending with it, so graphs holding `StatementRecord`s or rendered
+  contents give the same metrics as graphs holding the ast. `events` counts edges by `ControlEvent`, in declaration
+  order
+  """
+  nodes: int
+  edges: int
+  cyclomatic: int
+  max_nesting: int
+  loops: int
+  events: Tuple[int, ...]
+
+
+def graph_metrics(cfg: PyssectGraph) -> GraphMetrics:
+  """Computes the metrics of a graph in one depth first walk from its root, cached until the graph changes"""
+  if 'metrics' in cfg._analyses:
+    return cfg._analyses['metrics']
+  nodes, codes = cfg.nodes, EVENT_CODES
+  events = [0] * len(EVENTS)
+  edges = branches = 0
+  headers = set()
+  spans: List[Tuple[Point, Point, str]] = []
+  # Names of the `If` nodes continuing the chain of another
+  elifs = set()
+
+  # Nodes on the walk's stack are True, finished nodes False
+  active = {cfg.root: True} if cfg.root in nodes else {}
+  stack = [iter(nodes[cfg.root].children)] if active else []
+  path = [cfg.root]
+  while stack:
+    for child in stack[-1]:
+      if child not in active:
+        active[child] = True
+        path.append(child)
+        stack.append(iter(nodes[child].children))
+        break
+      if active[child]:
+        headers.add(child)
+    else:
+      stack.pop()
+      name = path.pop()
+      active[name] = False
+      node = nodes[name]
+      children = node.children
+      if len(children) > 1:
+        branches += len(children) - 1
+      edges += len(children)
+      for event in children.values():
+        events[codes[event]] += 1
+      if node.type in COMPOUND:
+        spans.append(((node.start.line, node.start.column), (node.end.line, node.end.column), name))
+        if node.type == 'If':
+          elifs.update(_chained(node, nodes))
+
+  nesting = _max_nesting([(start, end, name in elifs) for start, end, name in spans])
+  metrics = GraphMetrics(len(active), edges, branches + 1, nesting, len(headers), tuple(events))
+  cfg._analyses['metrics'] = metrics
+  return metrics
+
+
+def _chained(node: PyssectNode, nodes: Dict[str, PyssectNode]) -> List[str]:
+  """Returns the `If` that is the sole statement of the `else` of the `If` node, if any. The first statement of the
+  `else` is the `ONFALSE` child of the node, and the last one ends with it"""
+  return [
+    child for child, event in node.children.items()
+    if event is ControlEvent.ONFALSE and nodes[child].type == 'If' and nodes[child].end == node.end
+  ]
+
+
+def _max_nesting(spans: List[Span]) -> int:
+  """Returns the deepest chain of spans containing one another, spans of statements being nested or disjoint"""
+  spans.sort(key=lambda span: (span[0], (-span[1][0], -span[1][1])))
+  # The end and depth of the spans around the current one
+  around: List[Tuple[Point, int]] = []
+  deepest = 0
+  for start, end, chained in spans:
+    while around and around[-1][0] <= start:
+      around.pop()
+    depth = around[-1][1] if around else 0
+    if not chained:
+      depth += 1
+    around.append((end, depth))
+    deepest = max(deepest, depth)
+  return deepest
+
+
+class MetricsTable:
+  """The metrics of many graphs in columns, one `array` per entry of `COLUMNS` plus the list of `keys`, so the table
+  of a whole project loads into dataframes and dashboards as is. Row i holds the metrics of the graph `keys[i]`.
+  `pyssect_dumps` writes a table as an object of one list per column
+  """
+
+  def __init__(self):
+    self.keys: List[str] = []
+    self.columns: Dict[str, array] = {column: array('l') for column in COLUMNS}
+    self._metrics = [self.columns[column] for column in COLUMNS[:5]]
+    self._events = [self.columns[column] for column in COLUMNS[5:]]
+
+
+  def __len__(self) -> int:
+    return len(self.keys)
+
+
+  def __getitem__(self, column: str) -> array:
+    return self.columns[column]
+
+
+  def add(self, key: str, cfg: PyssectGraph) -> None:
+    """Appends the metrics of cfg as the row key"""
+    metrics = graph_metrics(cfg)
+    self.keys.append(key)
+    for column, value in zip(self._metrics, metrics):
+      column.append(value)
+    for column, count in zip(self._events, metrics.events):
+      column.append(count)
+
+
+  def row(self, key: str) -> Dict[str, int]:
+    """Returns the metrics of the row key by column name, in linear time"""
+    i = self.keys.index(key)
+    return {column: values[i] for column, values in self.columns.items()}
+
+
+def collect_metrics(
+  builds: Union[Mapping[str, PyssectGraph], Mapping[str, Mapping[str, PyssectGraph]]],
+  table: Optional[MetricsTable] = None
+) -> MetricsTable:
+  """Computes the metrics of every graph of a build, keyed by qualified name, or of a mapping of builds, like modules
+  keyed by path, with the rows of each graph keyed by `'<build key>:<qualified name>'`. Rows are appended to table
+  when one is given"""
+  table = table if table is not None else MetricsTable()
+  for key, value in builds.items():
+    if isinstance(value, PyssectGraph):
+      table.add(key, value)
+    else:
+      for qualname, cfg in value.items():
+        table.add(f"{key}:{qualname}", cfg)
+  return table
@@ -1,8 +1,9 @@
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Type
+from typing import List, Dict, Any, Optional, Type
 from enum import Enum
 from dis import Instruction
 import ast
+import re
 
 
 class ControlEvent(Enum):
@@ -39,11 +40,11 @@ def ast_to_marshalled_ast(type: Type) -> MarshalledASTType:
     return MarshalledASTType.Return
 
 
-@dataclass
+@dataclass(slots=True)
 class Location:
   """A class that describes a single location in a file, with line and column fields.
   As described by the python AST class, `line` is one indexed whereas `column` is
-  zero indexed
+  zero indexed. Slotted, so a location takes no more memory than a pair
   """
   line: int = 1
   column: int = 0
@@ -58,10 +59,41 @@ class Location:
     return Location(getattr(node, 'end_lineno', 1), getattr(node, 'end_col_offset', 0))
 
 
-@dataclass
+@dataclass(slots=True)
+class StatementRecord:
+  """Stands in for an ast statement in node contents, keeping its type and source span and, optionally, its header
+  rendered as `render_ast` does, so the ast itself can be freed. See `pyssect.records`"""
+  type: str
+  start: Location
+  end: Location
+  header: Optional[str] = None
+
+
+def instruction_line(inst: Instruction) -> Optional[int]:
+  """Returns the source line of an instruction, from `line_number` since python 3.13, where `starts_line` became a
+  flag, and from `starts_line`, set on the first instruction of each line, before"""
+  if hasattr(inst, 'line_number'):
+    return inst.line_number
+  return inst.starts_line
+
+
+_LOCATED_NAME = re.compile(r'^(.*)_(\d+)_(\d+)$')
+
+
+def shift_name(name: str, delta: int) -> str:
+  """Returns the name a node named after its location takes when moved by delta lines"""
+  match = _LOCATED_NAME.match(name)
+  if not match:
+    return name
+  prefix, line, column = match.groups()
+  return f"{prefix}_{int(line) + delta}_{column}"
+
+
+@dataclass(slots=True)
 class PyssectNode:
   """Represents a single Node in a Control Flow Graph, with a name, a `Location` start and end,
-  a dictionary of parent and child nodes, and a list of contents.
+  a dictionary of parent and child nodes, and a list of contents. Nodes are slotted and have no
+  `__dict__`, as a graph holds one per statement or block.
 
   AST nodes follow a naming convention of `<AST class>_<start line>_<start column>`, for example
   `'If_5_2'`.
@@ -105,12 +137,20 @@ class PyssectNode:
   def append_contents(self, contents: Any) -> None:
     """Append anything to contents"""
     self.contents.append(contents)
-    if isinstance(contents, ast.AST):
+    if isinstance(contents, StatementRecord):
+      if len(self.contents) == 1:
+        self.type = contents.type
+      self.end = contents.end
+    elif isinstance(contents, ast.AST):
       if len(self.contents) == 1:
         self.type = type(contents).__name__
       self.end = Location.default_end(contents)
     elif isinstance(contents, Instruction):
-      self.end = contents.starts_line or 0
+      if len(self.contents) == 1:
+        self.type = contents.opname
+      line = instruction_line(contents)
+      if line is not None:
+        self.end = Location(line, 0)
 
 
   def next(self) -> str:
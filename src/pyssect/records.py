@@ -0,0 +1,70 @@
+from typing import Dict, Mapping, Tuple
+from .graph import PyssectGraph
+from .node import Location, StatementRecord
+from .serializers import render_ast
+import ast
+
+
+RecordKey = Tuple[str, int, int, int, int]
+
+
+def to_record(node: ast.AST, header: bool = True) -> StatementRecord:
+  """Returns the record of an ast statement, with its header rendered if header is true"""
+  return StatementRecord(
+    type(node).__name__,
+    Location.default_start(node),
+    Location.default_end(node),
+    render_ast(node) if header else None
+  )
+
+
+def drop_ast(cfg_dict: Mapping[str, PyssectGraph], headers: bool = True) -> Mapping[str, PyssectGraph]:
+  """Replaces the ast nodes held in the contents of every graph by `StatementRecord`s, in place, and returns the
+  graphs. Once nothing else refers to the parsed tree, it can be garbage collected: a `For` or `If` node otherwise
+  keeps its whole body alive.
+
+  With headers, records keep the rendered text of their statement, and the graphs serialize exactly as before.
+  Analyses that read statements, like `live_variables` or `CallGraph`, need the ast back, see `rehydrate`
+  """
+  for cfg in cfg_dict.values():
+    for node in cfg.nodes.values():
+      node.contents = [
+        to_record(content, headers) if isinstance(content, ast.AST) else content for content in node.contents
+      ]
+  return cfg_dict
+
+
+def rehydrate(cfg_dict: Mapping[str, PyssectGraph], source: str) -> Mapping[str, PyssectGraph]:
+  """Replaces the `StatementRecord`s in the contents of every graph by the ast nodes they were made from, in place,
+  parsing source once. source must be the text the graphs were built from. Raises a `ValueError` naming the first
+  record that has no statement of the same type and span in source"""
+  index = _span_index(ast.parse(source))
+  for cfg in cfg_dict.values():
+    for node in cfg.nodes.values():
+      if any(isinstance(content, StatementRecord) for content in node.contents):
+        node.contents = [_lookup(index, content, cfg.name, node.name) for content in node.contents]
+  return cfg_dict
+
+
+def rehydrate_file(cfg_dict: Mapping[str, PyssectGraph], file: str) -> Mapping[str, PyssectGraph]:
+  """Rehydrates graphs built from a python file, see `rehydrate`"""
+  with open(file, 'r') as f:
+    return rehydrate(cfg_dict, f.read())
+
+
+def _span_index(tree: ast.AST) -> Dict[RecordKey, ast.AST]:
+  index = {}
+  for node in ast.walk(tree):
+    if hasattr(node, 'lineno'):
+      start, end = Location.default_start(node), Location.default_end(node)
+      index.setdefault((type(node).__name__, start.line, start.column, end.line, end.column), node)
+  return index
+
+
+def _lookup(index: Dict[RecordKey, ast.AST], content: object, graph: str, node: str) -> object:
+  if not isinstance(content, StatementRecord):
+    return content
+  span = (content.type, content.start.line, content.start.column, content.end.line, content.end.column)
+  if span not in index:
+    raise ValueError(f"No {content.type} statement at {span[1:]} for node {node} of graph {graph}")
+  return index[span]
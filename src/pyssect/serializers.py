@@ -1,35 +1,296 @@
-from .node import PyssectNode, ControlEvent, Location
+from .node import PyssectNode, ControlEvent, Location, StatementRecord
 from .graph import PyssectGraph
-from typing import Set, Dict
+from .frozen import FrozenGraph
+from .fingerprint import DedupStore
+from .diff import GraphPatch, Patch
+from .metrics import COLUMNS, MetricsTable
+from .instrumentation import phase
+from typing import IO, Any, Iterator, List, Optional, Sequence, Set, Dict
+from dis import Instruction
+from weakref import WeakKeyDictionary
 import ast
+import copy
 import json
 
 
-def pyssect_loads(str: str):
-  """Takes in a JSON string and returns a corresponding Control Flow Graph, Node, or Location"""
+# Version of the graph layout, written by `pyssect_dumps` in every graph as `version`. Graphs without it were written
+# before the layout was versioned and are read as version 1, which differs only in lacking the field
+SCHEMA_VERSION = 2
+_EVENTS: Dict[str, ControlEvent] = {event.value: event for event in ControlEvent}
+_KINDS = ('build', 'graph', 'node', 'location')
 
-  def _object_hook(obj):
-    # TODO implement strict rules for json conversion, with errors
-    if 'name' in obj and 'cur' in obj and 'root' in obj:
-      return PyssectGraph(**obj)
-    if 'line' in obj and 'column' in obj:
-      return Location(obj['line'], obj['column'])
-    if 'parents' in obj and 'children' in obj:
-      return PyssectNode(**obj)
-    return obj
 
-  return json.loads(str, object_hook=_object_hook)
+class SchemaError(ValueError):
+  """Raised by `pyssect_loads` when json does not follow the layout written by `pyssect_dumps`. `path` locates the
+  offending value, as a `$` rooted chain of keys"""
+
+  def __init__(self, path: str, message: str):
+    super().__init__(f"{path}: {message}")
+    self.path = path
+
+
+def pyssect_loads(str: str, kind: Optional[str] = None):
+  """Takes in a JSON string and returns the corresponding dictionary of Control Flow Graphs, Control Flow Graph, Node,
+  or Location, as written by `pyssect_dumps` in its full or simple form.
+
+  The json is parsed as is and then decoded along the schema in one pass, so only values the schema places there
+  become graphs, nodes and locations. kind is one of `'build'`, `'graph'`, `'node'` and `'location'`, and is told from
+  the keys of the top level object when omitted. Graphs of any `version` up to `SCHEMA_VERSION` are read, those
+  without one as version 1. Only these layouts are decoded: the json `pyssect_dumps` writes for a `MetricsTable`,
+  `DedupStore`, `Patch` or `GraphPatch` is rejected. Raises a `SchemaError` when the json does not match the schema"""
+  obj = json.loads(str)
+  kind = kind or _kind_of(obj)
+  if kind in ('build', 'graph'):
+    try:
+      return {key: _graph(graph) for key, graph in obj.items()} if kind == 'build' else _graph(obj)
+    except (_Mismatch, KeyError, TypeError, AttributeError):
+      # The fast path converts edges in place, the json is parsed again to find out where it breaks the schema
+      obj = json.loads(str)
+    if kind == 'build':
+      _expect(obj, dict, '$')
+      return {key: _decode_graph(graph, f"$.{key}") for key, graph in obj.items()}
+    return _decode_graph(obj, '$')
+  if kind == 'node':
+    _expect(obj, dict, '$')
+    return _decode_node(obj.get('name', ''), obj, '$')
+  if kind == 'location':
+    return _decode_location(obj, '$')
+  raise SchemaError('$', f"unknown kind {kind!r}, expected one of {', '.join(_KINDS)}")
+
+
+def _kind_of(obj: Any) -> str:
+  if not isinstance(obj, dict):
+    raise SchemaError('$', f"expected an object, found {type(obj).__name__}")
+  if 'nodes' in obj and isinstance(obj.get('root'), str):
+    return 'graph'
+  if 'parents' in obj and 'children' in obj:
+    return 'node'
+  if obj.keys() == {'line', 'column'}:
+    return 'location'
+  if not all(type(graph) is dict and 'nodes' in graph for graph in obj.values()):
+    for layout, fields in _OTHER_LAYOUTS.items():
+      if obj.keys() >= fields:
+        raise SchemaError('$', f"found the layout of a {layout}, only builds, graphs, nodes and locations are decoded")
+  return 'build'
+
+
+# Fields of the layouts `pyssect_dumps` writes for objects `pyssect_loads` does not decode
+_OTHER_LAYOUTS = {
+  'MetricsTable': {'keys', *COLUMNS},
+  'DedupStore': {'shapes', 'graphs'},
+  'GraphPatch': {'root', 'cur', 'removed_nodes', 'moved_nodes', 'changed_nodes', 'added_nodes'},
+  'Patch': {'removed', 'added', 'changed'}
+}
+
+
+def _expect(value: Any, expected: type, path: str) -> None:
+  if not isinstance(value, expected) or isinstance(value, bool):
+    raise SchemaError(path, f"expected {_JSON_TYPES[expected]}, found {_json_type(value)}")
+
+
+_JSON_TYPES = {dict: 'an object', list: 'an array', str: 'a string', int: 'an integer'}
+
+
+def _json_type(value: Any) -> str:
+  if value is None:
+    return 'null'
+  if isinstance(value, bool):
+    return 'a boolean'
+  return _JSON_TYPES.get(type(value), f"a {type(value).__name__}")
+
+
+class _Mismatch(Exception):
+  """Raised by `_graph` on json it cannot decode, which is then decoded again along its path to report why"""
+
+
+def _decode_graph(obj: Any, path: str) -> PyssectGraph:
+  _expect(obj, dict, path)
+  try:
+    name, root, cur, nodes = obj['name'], obj['root'], obj['cur'], obj['nodes']
+  except KeyError as e:
+    raise SchemaError(path, f"missing graph field {e.args[0]!r}") from None
+  _expect(name, str, f"{path}.name")
+  _expect(root, str, f"{path}.root")
+  _expect(cur, str, f"{path}.cur")
+  _expect(nodes, dict, f"{path}.nodes")
+  version = obj.get('version', 1)
+  _expect(version, int, f"{path}.version")
+  if not 1 <= version <= SCHEMA_VERSION:
+    raise SchemaError(f"{path}.version", f"unsupported schema version {version}, expected at most {SCHEMA_VERSION}")
+  decoded = {key: _decode_node(key, node, f"{path}.nodes.{key}") for key, node in nodes.items()}
+  for key, node in decoded.items():
+    for edges, field in [(node.parents, 'parents'), (node.children, 'children')]:
+      for other in edges:
+        if other not in decoded:
+          raise SchemaError(f"{path}.nodes.{key}.{field}", f"edge to missing node {other!r}")
+  return PyssectGraph(name, root, cur, decoded)
+
+
+def _graph(obj: Dict[str, Any]) -> PyssectGraph:
+  """Decodes a graph with every check of `_decode_graph` inlined and no paths kept, nodes being the bulk of a file.
+  Raises on anything `_decode_graph` would reject. Edge dictionaries are reused, their events replaced in place, and the
+  dictionaries of nodes are emptied, so obj is left partly consumed when decoding fails"""
+  events = _EVENTS
+  name, root, cur, version = obj['name'], obj['root'], obj['cur'], obj.get('version', 1)
+  if type(name) is not str or type(root) is not str or type(cur) is not str:
+    raise _Mismatch
+  if type(version) is not int or not 1 <= version <= SCHEMA_VERSION:
+    raise _Mismatch
+  nodes = {}
+  for key, node in obj['nodes'].items():
+    start, end, contents, type_ = node.get('start'), node.get('end'), node['contents'], node.get('type', '')
+    parents, children = node['parents'], node['children']
+    if node.get('name', key) != key or type(type_) is not str or type(contents) is not list:
+      raise _Mismatch
+    if type(parents) is not dict or type(children) is not dict:
+      raise _Mismatch
+    for other, event in parents.items():
+      parents[other] = events[event]
+    for other, event in children.items():
+      children[other] = events[event]
+    if start is None:
+      start = Location()
+    elif start.keys() != _LOCATION_FIELDS or type(start['line']) is not int or type(start['column']) is not int:
+      raise _Mismatch
+    else:
+      start = Location(start['line'], start['column'])
+    if end is None:
+      end = Location()
+    elif end.keys() != _LOCATION_FIELDS or type(end['line']) is not int or type(end['column']) is not int:
+      raise _Mismatch
+    else:
+      end = Location(end['line'], end['column'])
+    for content in contents:
+      if type(content) is not str:
+        try:
+          contents = _decode_contents(contents, '')
+        except SchemaError:
+          raise _Mismatch from None
+        break
+    nodes[key] = PyssectNode(
+      key,
+      type_,
+      start,
+      end,
+      parents,
+      children,
+      contents
+    )
+    # Frees the location objects right away, sparing the collector from tracking them along with the graphs
+    node.clear()
+  for node in nodes.values():
+    if not (nodes.keys() >= node.parents.keys() and nodes.keys() >= node.children.keys()):
+      raise _Mismatch
+  return PyssectGraph(name, root, cur, nodes)
+
+
+def _decode_node(key: str, obj: Any, path: str) -> PyssectNode:
+  """Decodes a node stored under key. Nodes written in the simple form have no name, type or locations"""
+  _expect(obj, dict, path)
+  if obj.get('name', key) != key:
+    raise SchemaError(f"{path}.name", f"node {obj['name']!r} is stored under {key!r}")
+  try:
+    node = PyssectNode(
+      key,
+      obj.get('type', ''),
+      _decode_location(obj['start'], f"{path}.start") if 'start' in obj else Location(),
+      _decode_location(obj['end'], f"{path}.end") if 'end' in obj else Location(),
+      _decode_edges(obj['parents'], f"{path}.parents"),
+      _decode_edges(obj['children'], f"{path}.children"),
+      _decode_contents(obj['contents'], f"{path}.contents")
+    )
+  except KeyError as e:
+    raise SchemaError(path, f"missing node field {e.args[0]!r}") from None
+  _expect(node.type, str, f"{path}.type")
+  return node
+
+
+_LOCATION_FIELDS = {'line', 'column'}
+
+
+def _decode_location(obj: Any, path: str) -> Location:
+  if type(obj) is not dict or obj.keys() != _LOCATION_FIELDS:
+    raise SchemaError(path, 'expected an object with exactly the fields line and column')
+  line, column = obj['line'], obj['column']
+  _expect(line, int, f"{path}.line")
+  _expect(column, int, f"{path}.column")
+  return Location(line, column)
+
+
+def _decode_edges(obj: Any, path: str) -> Dict[str, ControlEvent]:
+  _expect(obj, dict, path)
+  for name, event in obj.items():
+    if type(event) is not str or event not in _EVENTS:
+      raise SchemaError(f"{path}.{name}", f"unknown control event {event!r}")
+  return {name: _EVENTS[event] for name, event in obj.items()}
+
+
+def _decode_contents(obj: Any, path: str) -> List[Any]:
+  """Contents are otherwise opaque, only objects laid out as a `StatementRecord` without a header are decoded"""
+  _expect(obj, list, path)
+  return [
+    _decode_record(content, f"{path}[{i}]") if type(content) is dict and content.keys() == _RECORD_FIELDS else content
+    for i, content in enumerate(obj)
+  ]
+
+
+_RECORD_FIELDS = {'type', 'start', 'end'}
+
+
+def _decode_record(obj: Dict[str, Any], path: str) -> StatementRecord:
+  _expect(obj['type'], str, f"{path}.type")
+  return StatementRecord(
+    obj['type'], _decode_location(obj['start'], f"{path}.start"), _decode_location(obj['end'], f"{path}.end")
+  )
+
+
+_rendered: 'WeakKeyDictionary[ast.AST, str]' = WeakKeyDictionary()
+
+
+def render_ast(node: ast.AST) -> str:
+  """Returns the source of an ast node with its nested blocks elided to `...`. Renders are memoized per node, and the
+  node itself is never modified"""
+  rendered = _rendered.get(node)
+  if rendered is None:
+    rendered = ast.unparse(_try_no_recurse(node) if isinstance(node, ast.Try) else _ast_no_recurse(node))
+    _rendered[node] = rendered
+  return rendered
+
+
+def render_instruction(inst: Instruction) -> str:
+  """Returns the `dis` style text of a bytecode instruction"""
+  return f"{inst.opname} {inst.argrepr}".rstrip()
+
+
+def render_content(content: Any) -> str:
+  """Returns the text of any node content: rendered ast nodes and instructions, the header of a `StatementRecord` or
+  its type when it has none, and anything else as a string"""
+  if isinstance(content, ast.AST):
+    return render_ast(content)
+  if isinstance(content, Instruction):
+    return render_instruction(content)
+  if isinstance(content, StatementRecord):
+    return content.header if content.header is not None else content.type
+  return str(content)
+
+
+def _json_contents(contents: Sequence[Any]) -> Sequence[Any]:
+  """Renders bytecode instructions, which as named tuples would otherwise be encoded field by field"""
+  if contents and isinstance(contents[0], Instruction):
+    return [render_instruction(inst) if isinstance(inst, Instruction) else inst for inst in contents]
+  return contents
 
 
 def _ast_no_recurse(node: ast.AST) -> ast.AST:
-  """Turns an AST node with nested nodes into a flattened node for string representation."""
+  """Returns a shallow copy of an AST node with nested nodes flattened for string representation."""
   l = ast.Expr(value=ast.Ellipsis())
+  node = copy.copy(node)
   if hasattr(node, 'body') and not isinstance(node, ast.ExceptHandler):
-    node.__setattr__('body', [l])
+    node.body = [l]
   if hasattr(node, 'orelse'):
-    node.__setattr__('orelse', [l] if node.orelse else [])
+    node.orelse = [l] if node.orelse else []
   if hasattr(node, 'finalbody'):
-    node.__setattr__('finalbody', [l] if node.finalbody else [])
+    node.finalbody = [l] if node.finalbody else []
   return node
 
 
@@ -43,26 +304,147 @@ def _try_no_recurse(node: ast.Try) -> ast.AST:
   )
 
 
-def pyssect_dumps(obj, indent: int=2, simple: bool = False) -> str:
-  """Returns a json string representation of the Control Flow Graph"""
+def _frozen_graph_dict(graph: FrozenGraph, simple: bool) -> Dict:
+  """Lays out a frozen graph in the same json shape as a `PyssectGraph`, without thawing it"""
+  nodes = {}
+  for i, name in enumerate(graph.names):
+    children = {graph.names[j]: event.value for j, event in graph.successors(i)}
+    parents = {graph.names[j]: event.value for j, event in graph.predecessors(i)}
+    if simple:
+      nodes[name] = {'contents': _json_contents(graph.contents[i]), 'children': children, 'parents': parents}
+    else:
+      start_line, start_column, end_line, end_column = graph.locations[4 * i:4 * i + 4]
+      nodes[name] = {
+        'name': name,
+        'type': graph.types[i],
+        'start': {'line': start_line, 'column': start_column},
+        'end': {'line': end_line, 'column': end_column},
+        'parents': parents,
+        'children': children,
+        'contents': _json_contents(graph.contents[i])
+      }
+  return {
+    'version': SCHEMA_VERSION,
+    'name': graph.name,
+    'root': graph.names[graph.root],
+    'cur': graph.names[graph.cur],
+    'nodes': nodes
+  }
+
+
+def _dedup_store_dict(store: DedupStore, simple: bool) -> Dict:
+  """Lays out a dedup store as its shapes, with edges as `[target, event]` pairs per canonical node id, and the graphs
+  referring to them by structural hash, with one list per node field indexed by canonical node id. Locations are
+  flattened as in `FrozenGraph`"""
+  shapes = {}
+  for shape, frozen in store.shapes.items():
+    shapes[shape] = {
+      'root': frozen.root,
+      'children': [[[j, event.value] for j, event in frozen.successors(i)] for i in range(len(frozen))],
+      'parents': [[[j, event.value] for j, event in frozen.predecessors(i)] for i in range(len(frozen))]
+    }
+
+  graphs = {}
+  for key, instance in store.instances.items():
+    graph = {'shape': instance.shape, 'name': instance.name, 'cur': instance.cur, 'names': instance.names}
+    if not simple:
+      graph['types'] = instance.types
+      graph['locations'] = instance.locations.tolist()
+    graph['contents'] = [_json_contents(contents) for contents in instance.contents]
+    graphs[key] = graph
+  return {'shapes': shapes, 'graphs': graphs}
 
-  def _default(obj):
-    if type(obj) in [PyssectNode, PyssectGraph, Location]:
-      if simple and isinstance(obj, PyssectNode):
+
+def _public_fields(obj: Any) -> Dict[str, Any]:
+  return {key: value for key, value in obj.__dict__.items() if not key.startswith('_')}
+
+
+def _node_dict(node: PyssectNode) -> Dict[str, Any]:
+  """Lays out a node field by field, nodes being slotted"""
+  return {
+    'name': node.name,
+    'type': node.type,
+    'start': node.start,
+    'end': node.end,
+    'parents': node.parents,
+    'children': node.children,
+    'contents': _json_contents(node.contents)
+  }
+
+
+class _PyssectEncoder(json.JSONEncoder):
+  """Json encoder for graphs, nodes, locations and the ast nodes held in node contents"""
+
+  def __init__(self, simple: bool = False, **kwargs):
+    super().__init__(**kwargs)
+    self.simple = simple
+
+
+  def default(self, obj):
+    if type(obj) is PyssectNode:
+      if self.simple:
         return {
-          'contents': obj.contents,
+          'contents': _json_contents(obj.contents),
           'children': obj.children,
           'parents': obj.parents
         }
-      return obj.__dict__
+      return _node_dict(obj)
+    if type(obj) is Location:
+      return {'line': obj.line, 'column': obj.column}
+    if type(obj) is PyssectGraph:
+      return {'version': SCHEMA_VERSION, **_public_fields(obj)}
+    if isinstance(obj, FrozenGraph):
+      return _frozen_graph_dict(obj, self.simple)
+    if isinstance(obj, DedupStore):
+      return _dedup_store_dict(obj, self.simple)
+    if isinstance(obj, GraphPatch):
+      return {
+        **_public_fields(obj),
+        'changed_nodes': {
+          name: {**changes, 'contents': _json_contents(changes['contents'])} if 'contents' in changes else changes
+          for name, changes in obj.changed_nodes.items()
+        }
+      }
+    if isinstance(obj, Patch):
+      return _public_fields(obj)
+    if isinstance(obj, MetricsTable):
+      return {'keys': obj.keys, **{column: values.tolist() for column, values in obj.columns.items()}}
     if isinstance(obj, Set):
       return list(obj)
     if isinstance(obj, ControlEvent):
       return obj.value
     if isinstance(obj, ast.AST):
-      if isinstance(obj, ast.Try):
-        return ast.unparse(_try_no_recurse(obj))
-      return ast.unparse(_ast_no_recurse(obj))
-    return json.JSONEncoder.default(obj)
+      return render_ast(obj)
+    if isinstance(obj, StatementRecord):
+      if obj.header is not None:
+        return obj.header
+      return {'type': obj.type, 'start': obj.start, 'end': obj.end}
+    return super().default(obj)
+
+
+def pyssect_dumps(obj, indent: int=2, simple: bool = False) -> str:
+  """Returns a json string representation of the Control Flow Graph"""
+  with phase('serialize'):
+    return _PyssectEncoder(simple=simple, indent=indent).encode(obj)
+
+
+def pyssect_iterdumps(obj, indent: int = 2, simple: bool = False, chunk_size: int = 65536) -> Iterator[str]:
+  """Yields the json representation of the Control Flow Graph in chunks of at least `chunk_size` characters.
+  Nodes are encoded as the chunks are consumed, so the first chunk is available before the whole graph is rendered"""
+  chunk: List[str] = []
+  size = 0
+  for piece in _PyssectEncoder(simple=simple, indent=indent).iterencode(obj):
+    chunk.append(piece)
+    size += len(piece)
+    if size >= chunk_size:
+      yield ''.join(chunk)
+      chunk, size = [], 0
+  if chunk:
+    yield ''.join(chunk)
+
 
-  return json.dumps(obj, default=_default, indent=indent)
\ No newline at end of file
+def pyssect_dump(obj, fp: IO[str], indent: int = 2, simple: bool = False, chunk_size: int = 65536) -> None:
+  """Writes the json representation of the Control Flow Graph to the file like object `fp`, one chunk at a time"""
+  with phase('serialize'):
+    for chunk in pyssect_iterdumps(obj, indent, simple, chunk_size):
+      fp.write(chunk)
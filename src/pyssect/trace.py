@@ -0,0 +1,243 @@
+from collections import deque
+from threading import get_ident
+from types import CodeType, FunctionType
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from .builders import builds, code_qualnames
+from .graph import PyssectGraph
+from .locations import code_start
+from .node import ControlEvent
+import sys
+
+
+Edge = Tuple[str, str, ControlEvent]
+
+
+class LineIndex:
+  """Maps the source lines of a graph to the node that runs them, precomputed from each node's `start` and `end`
+  `Location`s. A line inside several nodes, such as the body of an `if` inside the `If` node's span, belongs to the
+  narrowest one. Nodes start at their first statement, see `code_start`. Nodes without contents run no code and are
+  left out. `offset` is added to every line, for graphs built from a snippet of a larger file"""
+
+  def __init__(self, cfg: PyssectGraph, offset: int = 0):
+    self.lines: Dict[int, str] = {}
+    widths: Dict[int, int] = {}
+    for name, node in cfg.nodes.items():
+      if not node.contents:
+        continue
+      start = code_start(node)
+      width = node.end.line - start.line
+      for line in range(start.line + offset, node.end.line + offset + 1):
+        if width <= widths.get(line, width):
+          widths[line] = width
+          self.lines[line] = name
+
+
+  def node(self, line: int) -> Optional[str]:
+    return self.lines.get(line)
+
+
+class TraceOverlay:
+  """Records which nodes of a set of graphs run, and which edges are taken between them, while code runs. Each graph
+  is tied to the code object it was built from. Line events are mapped to nodes through a `LineIndex`, and a move to
+  another node counts as one hit of that node and of the edges leading to it. Nodes without contents that lie between
+  two nodes, such as the exits of loops and ifs, count as passed through.
+
+  Tracing uses `sys.monitoring` where available, with line events enabled only on the traced code objects of every
+  thread. Older pythons fall back to `sys.settrace`, which only traces the thread calling `start`. Under
+  `sys.monitoring` there is one current node per code object and thread rather than per frame, so recursive calls and
+  interleaved generators can record spurious moves, but concurrent threads do not
+  """
+  graphs: Dict[CodeType, PyssectGraph]
+
+
+  def __init__(self, graphs: Dict[CodeType, PyssectGraph], offsets: Optional[Dict[CodeType, int]] = None):
+    self.graphs = graphs
+    offsets = offsets or {}
+    self._lines = {code: LineIndex(cfg, offsets.get(code, 0)).lines for code, cfg in graphs.items()}
+    self._hits: Dict[CodeType, Dict[str, int]] = {code: {} for code in graphs}
+    self._moves: Dict[CodeType, Dict[Tuple[Optional[str], str], int]] = {code: {} for code in graphs}
+    self._paths: Dict[Tuple[CodeType, str, str], Optional[List[Edge]]] = {}
+    self._current: Dict[Tuple[int, CodeType], Optional[str]] = {}
+    self._tool: Optional[int] = None
+    self._previous_trace: Optional[Callable] = None
+
+
+  @staticmethod
+  def for_code(cfg_dict: Dict[str, PyssectGraph], code: CodeType, offset: int = 0, prefix: str = '') -> 'TraceOverlay':
+    """Ties the graphs of a build to code and the code objects nested in it, matching qualified names against the keys
+    of cfg_dict, with the module's code as `__main__`. prefix is removed from qualified names first, for code
+    compiled from a larger file than the build"""
+    graphs, offsets = {}, {}
+    for nested, key in code_qualnames(code):
+      if nested.co_name == '<module>':
+        key = '__main__'
+      else:
+        key = key[len(prefix):] if key.startswith(prefix) else key
+      if key in cfg_dict:
+        graphs[nested] = cfg_dict[key]
+        offsets[nested] = offset
+    return TraceOverlay(graphs, offsets)
+
+
+  @staticmethod
+  def for_functions(*functions: FunctionType) -> 'TraceOverlay':
+    """Builds each function from its source and ties the graphs to its code and nested code"""
+    graphs, offsets = {}, {}
+    for function in functions:
+      code = function.__code__
+      prefix = function.__qualname__[:-len(function.__name__)]
+      overlay = TraceOverlay.for_code(builds(function), code, code.co_firstlineno - 1, prefix)
+      graphs.update(overlay.graphs)
+      offsets.update({code: code.co_firstlineno - 1 for code in overlay.graphs})
+    return TraceOverlay(graphs, offsets)
+
+
+  def __enter__(self) -> 'TraceOverlay':
+    self.start()
+    return self
+
+
+  def __exit__(self, *args) -> None:
+    self.stop()
+
+
+  def start(self) -> None:
+    """Starts recording, adding to the hits recorded so far"""
+    self._current = {}
+    monitoring = getattr(sys, 'monitoring', None)
+    if monitoring is None:
+      self._previous_trace = sys.gettrace()
+      sys.settrace(self._trace_call)
+      return
+
+    for tool in (monitoring.PROFILER_ID, 3, 4):
+      try:
+        monitoring.use_tool_id(tool, 'pyssect')
+      except ValueError:
+        continue
+      self._tool = tool
+      break
+    else:
+      raise RuntimeError('No sys.monitoring tool id is free for tracing')
+
+    events = monitoring.events
+    monitoring.register_callback(self._tool, events.LINE, self._monitor_line)
+    monitoring.register_callback(self._tool, events.PY_START, self._monitor_start)
+    for code in self.graphs:
+      monitoring.set_local_events(self._tool, code, events.LINE | events.PY_START)
+
+
+  def stop(self) -> None:
+    monitoring = getattr(sys, 'monitoring', None)
+    if monitoring is None:
+      sys.settrace(self._previous_trace)
+      self._previous_trace = None
+      return
+    if self._tool is None:
+      return
+
+    for code in self.graphs:
+      monitoring.set_local_events(self._tool, code, 0)
+    monitoring.register_callback(self._tool, monitoring.events.LINE, None)
+    monitoring.register_callback(self._tool, monitoring.events.PY_START, None)
+    monitoring.free_tool_id(self._tool)
+    self._tool = None
+
+
+  def _monitor_start(self, code: CodeType, offset: int) -> Any:
+    self._current[get_ident(), code] = None
+
+
+  def _monitor_line(self, code: CodeType, line: int) -> Any:
+    node = self._lines[code].get(line)
+    if node is None:
+      return sys.monitoring.DISABLE
+    key = (get_ident(), code)
+    previous = self._current.get(key)
+    if node != previous:
+      self._current[key] = node
+      self._record(code, previous, node)
+
+
+  def _trace_call(self, frame, event: str, arg: Any) -> Optional[Callable]:
+    code = frame.f_code
+    lines = self._lines.get(code)
+    if lines is None:
+      return None
+    current = [None]
+
+    def trace_line(frame, event: str, arg: Any) -> Optional[Callable]:
+      if event == 'line':
+        node = lines.get(frame.f_lineno)
+        if node is not None and node != current[0]:
+          self._record(code, current[0], node)
+          current[0] = node
+      return trace_line
+
+    return trace_line
+
+
+  def _record(self, code: CodeType, previous: Optional[str], node: str) -> None:
+    hits = self._hits[code]
+    hits[node] = hits.get(node, 0) + 1
+    moves = self._moves[code]
+    moves[previous, node] = moves.get((previous, node), 0) + 1
+
+
+  def node_hits(self, code: CodeType) -> Dict[str, int]:
+    """Returns how many times each node of the graph tied to code was entered"""
+    hits = dict(self._hits[code])
+    for edge, count in self.edge_hits(code).items():
+      if not self.graphs[code].nodes[edge[1]].contents:
+        hits[edge[1]] = hits.get(edge[1], 0) + count
+    return hits
+
+
+  def edge_hits(self, code: CodeType) -> Dict[Edge, int]:
+    """Returns how many times each edge of the graph tied to code was taken. Moves between nodes that no path of edges
+    through nodes without contents explains, such as a jump to an exception handler, are left out"""
+    edges: Dict[Edge, int] = {}
+    for (previous, node), count in self._moves[code].items():
+      if previous is None:
+        continue
+      for edge in self._path(code, previous, node) or []:
+        edges[edge] = edges.get(edge, 0) + count
+    return edges
+
+
+  def overlays(self) -> Iterator[Tuple[PyssectGraph, Dict[str, int], Dict[Edge, int]]]:
+    """Yields each traced graph with its node and edge hits"""
+    for code, cfg in self.graphs.items():
+      yield cfg, self.node_hits(code), self.edge_hits(code)
+
+
+  def _path(self, code: CodeType, source: str, target: str) -> Optional[List[Edge]]:
+    """Finds the shortest path of edges from source to target whose inner nodes have no contents, memoized"""
+    key = (code, source, target)
+    if key in self._paths:
+      return self._paths[key]
+
+    cfg = self.graphs[code]
+    parents: Dict[str, Tuple[str, ControlEvent]] = {}
+    queue = deque([source])
+    path = None
+    while queue:
+      name = queue.popleft()
+      for child, event in cfg.nodes[name].children.items():
+        if child in parents or child == source:
+          continue
+        parents[child] = (name, event)
+        if child == target:
+          path = []
+          while child != source:
+            parent, event = parents[child]
+            path.append((parent, child, event))
+            child = parent
+          path.reverse()
+          queue.clear()
+          break
+        if not cfg.nodes[child].contents:
+          queue.append(child)
+    self._paths[key] = path
+    return path
+
@@ -0,0 +1,135 @@
+from pyssect import (
+  AsyncRunner, Instrumentation, abuilds, abuilds_file, apyssect_dumps, apyssect_loads, builds, pyssect_dumps
+)
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import io
+import os
+import tempfile
+import threading
+import unittest
+
+
+class AioTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(AioTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_builds_and_serializes(self):
+    async def main():
+      cfg_dict = await abuilds(PROGRAM)
+      serialized = await apyssect_dumps(cfg_dict)
+      return cfg_dict, serialized, await apyssect_loads(serialized)
+
+    cfg_dict, serialized, loaded = asyncio.run(main())
+    self.assertEqual(pyssect_dumps(builds(PROGRAM)), serialized)
+    self.assertEqual(set(cfg_dict), set(loaded))
+
+
+  def test_builds_file(self):
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, 'program.py')
+      with open(path, 'w') as f:
+        f.write(PROGRAM)
+      cfg_dict = asyncio.run(abuilds_file(path))
+    self.assertEqual(pyssect_dumps(builds(PROGRAM)), pyssect_dumps(cfg_dict))
+
+
+  def test_concurrency_limit(self):
+    runner = AsyncRunner(max_concurrency=2)
+    lock, running, peak = threading.Lock(), [0], [0]
+    release = threading.Event()
+
+    def work(i):
+      with lock:
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+      release.wait(5)
+      with lock:
+        running[0] -= 1
+      return i
+
+    async def main():
+      tasks = [asyncio.create_task(runner.run(work, i)) for i in range(6)]
+      await asyncio.sleep(0.05)
+      release.set()
+      return await asyncio.gather(*tasks)
+
+    self.assertEqual(list(range(6)), asyncio.run(main()))
+    self.assertEqual(2, peak[0])
+    runner.close()
+
+
+  def test_cancellation(self):
+    runner = AsyncRunner(max_concurrency=1)
+    started, release = threading.Event(), threading.Event()
+    ran = []
+
+    def block():
+      started.set()
+      release.wait(5)
+
+    async def main():
+      blocking = asyncio.create_task(runner.run(block))
+      queued = asyncio.create_task(runner.run(ran.append, 'queued'))
+      await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+      queued.cancel()
+      blocking.cancel()
+      release.set()
+      await asyncio.gather(blocking, queued, return_exceptions=True)
+      return await runner.run(ran.append, 'after')
+
+    asyncio.run(main())
+    self.assertEqual(['after'], ran)
+    runner.close()
+
+
+  def test_dump_and_instrumentation(self):
+    runner = AsyncRunner()
+    cfg_dict = builds(PROGRAM)
+    fp = io.StringIO()
+
+    async def main():
+      with Instrumentation() as instrumentation:
+        await runner.builds(PROGRAM)
+        await runner.dump(cfg_dict, fp, chunk_size=64)
+        return instrumentation.summary()
+
+    summary = asyncio.run(main())
+    self.assertEqual(pyssect_dumps(cfg_dict), fp.getvalue())
+    self.assertEqual(1, summary['phases']['visit']['calls'])
+    runner.close()
+
+
+  def test_process_executor(self):
+    with ProcessPoolExecutor(max_workers=2) as executor:
+      runner = AsyncRunner(executor)
+
+      async def main():
+        results = await asyncio.gather(runner.builds(PROGRAM), runner.builds(PROGRAM, do_clean=True))
+        chunks = [chunk async for chunk in runner.iterdumps(results[0], chunk_size=64)]
+        return results, chunks
+
+      (cfg_dict, _), chunks = asyncio.run(main())
+      runner.close()
+    self.assertEqual(pyssect_dumps(builds(PROGRAM)), ''.join(chunks))
+    self.assertEqual(pyssect_dumps(builds(PROGRAM)), pyssect_dumps(cfg_dict))
+
+
+PROGRAM = """
+def f(xs):
+  total = 0
+  for x in xs:
+    if x > 2:
+      total += x
+  return total
+
+class C:
+  def m(self):
+    return f([1, 2, 3])
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()
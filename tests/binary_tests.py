@@ -0,0 +1,67 @@
+from pyssect import builds, pyssect_dumps, pyssect_loads, pyssect_bdumps, pyssect_bdump, pyssect_bloads, pyssect_bload
+import os
+import tempfile
+import unittest
+
+
+class BinaryFormatTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(BinaryFormatTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_round_trip_matches_json(self):
+    cfg_dict = builds(PROGRAM)
+    store = pyssect_bloads(pyssect_bdumps(cfg_dict))
+    self.assertEqual(list(cfg_dict), list(store))
+    for name, cfg in cfg_dict.items():
+      self.assertEqual(pyssect_dumps(cfg), pyssect_dumps(store[name]))
+
+
+  def test_round_trip_matches_json_loads(self):
+    cfg_dict = pyssect_loads(pyssect_dumps(builds(PROGRAM, do_clean=True)))
+    store = pyssect_bloads(pyssect_bdumps(cfg_dict))
+    self.assertEqual(cfg_dict, dict(store))
+
+
+  def test_memory_mapped_file(self):
+    cfg_dict = builds(PROGRAM)
+    with tempfile.TemporaryDirectory() as dir:
+      path = os.path.join(dir, 'graphs.bin')
+      with open(path, 'wb') as f:
+        pyssect_bdump(cfg_dict, f)
+
+      with pyssect_bload(path) as store:
+        frozen = store.frozen('f')
+        self.assertIsInstance(frozen.succ_targets, memoryview)
+        self.assertEqual(pyssect_dumps(cfg_dict['f']), pyssect_dumps(frozen))
+        del frozen
+
+
+  def test_rejects_other_versions(self):
+    data = bytearray(pyssect_bdumps(builds(PROGRAM)))
+    data[4] += 1
+    with self.assertRaises(ValueError):
+      pyssect_bloads(bytes(data))
+    with self.assertRaises(ValueError):
+      pyssect_bloads(b'JSON' + bytes(data[4:]))
+
+
+PROGRAM = """
+def f(x):
+  try:
+    x += 1
+  except ValueError:
+    x = 0
+  while x < 10:
+    if x == 5:
+      break
+    x += 2
+  return x
+
+print(f(1))
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()
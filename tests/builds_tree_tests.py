@@ -0,0 +1,79 @@
+from pyssect import builds_tree, ControlEvent, GraphCache
+import os
+import tempfile
+import unittest
+
+
+class BuildsTreeTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(BuildsTreeTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def setUp(self):
+    self.dir = tempfile.TemporaryDirectory()
+    self._write('good.py', GOOD)
+    self._write(os.path.join('pkg', 'inner.py'), GOOD)
+    self._write('bad.py', BAD)
+    self._write('notes.txt', 'not python')
+
+
+  def tearDown(self):
+    self.dir.cleanup()
+
+
+  def test_builds_directory(self):
+    results = dict(builds_tree([self.dir.name], workers=2))
+    self.assertEqual(
+      {'good.py', os.path.join('pkg', 'inner.py'), 'bad.py'},
+      {os.path.relpath(path, self.dir.name) for path in results}
+    )
+
+
+  def test_failure_is_isolated(self):
+    results = dict(builds_tree([self.dir.name], workers=2))
+    self.assertIsInstance(results[os.path.join(self.dir.name, 'bad.py')], SyntaxError)
+    graphs = results[os.path.join(self.dir.name, 'good.py')]
+    self.assertEqual({'__main__', 'f'}, set(graphs))
+
+
+  def test_graphs_are_deserialized(self):
+    path = os.path.join(self.dir.name, 'good.py')
+    graphs = dict(builds_tree([path], workers=1))[path]
+    self.assertEqual(['if x:\n    ...'], graphs['f'].nodes['If_3_2'].contents)
+    self.assertEqual(ControlEvent.ONTRUE, graphs['f'].nodes['If_3_2'].children['AugAssign_4_4'])
+
+
+  def test_stopping_early_cancels_queued_builds(self):
+    for i in range(40):
+      self._write(os.path.join('many', f"module_{i}.py"), GOOD + f"\ny = {i}\n")
+    cache = GraphCache(os.path.join(self.dir.name, 'cache'))
+    results = builds_tree([os.path.join(self.dir.name, 'many')], workers=1, cache=cache)
+    next(results)
+    results.close()
+    self.assertLessEqual(len([name for name in os.listdir(cache.directory) if name.endswith('.json')]), 3)
+
+
+  def _write(self, name: str, source: str):
+    path = os.path.join(self.dir.name, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+      f.write(source)
+
+
+GOOD = """
+def f(x):
+  if x:
+    x += 1
+  return x
+"""
+
+
+BAD = """
+def f(x)
+  return x
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,113 @@
+from pyssect import builds, pyssect_dumps, GraphCache
+from unittest import mock
+import os
+import tempfile
+import unittest
+
+
+class GraphCacheTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(GraphCacheTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def setUp(self):
+    self.dir = tempfile.TemporaryDirectory()
+
+
+  def tearDown(self):
+    self.dir.cleanup()
+
+
+  def test_warm_build_skips_parse(self):
+    cache = GraphCache(self.dir.name)
+    cold = builds(PROGRAM, cache=cache)
+    with mock.patch('pyssect.builders.ast.parse') as parse:
+      warm = builds(PROGRAM, cache=cache)
+      parse.assert_not_called()
+    self.assertEqual(pyssect_dumps(cold), pyssect_dumps(warm))
+
+
+  def test_key_depends_on_clean_flag(self):
+    cache = GraphCache(self.dir.name)
+    builds(PROGRAM, cache=cache)
+    builds(PROGRAM, do_clean=True, cache=cache)
+    self.assertEqual(2, len(cache))
+    self.assertNotEqual(cache.key(PROGRAM, False), cache.key(PROGRAM, True))
+
+
+  def test_lru_eviction(self):
+    cache = GraphCache(self.dir.name, max_entries=2)
+    for i in range(3):
+      cache.put(f"k{i}", '{}')
+      cache.get('k0')
+
+    self.assertIn('k0', cache)
+    self.assertNotIn('k1', cache)
+    self.assertIn('k2', cache)
+
+
+  def test_size_bound(self):
+    cache = GraphCache(self.dir.name, max_bytes=10)
+    cache.put('a', '12345')
+    cache.put('b', '12345')
+    cache.put('c', '12345')
+    self.assertEqual(2, len(cache))
+    self.assertNotIn('a', cache)
+
+
+  def test_clear(self):
+    cache = GraphCache(self.dir.name)
+    builds(PROGRAM, cache=cache)
+    cache.clear()
+    self.assertEqual(0, len(cache))
+    self.assertEqual([], os.listdir(self.dir.name))
+
+
+  def test_bounds_hold_across_instances(self):
+    first = GraphCache(self.dir.name, max_entries=2)
+    second = GraphCache(self.dir.name, max_entries=2)
+    first.put('a', '{}')
+    second.put('b', '{}')
+    first.put('c', '{}')
+    second.put('d', '{}')
+    self.assertEqual(2, len(first))
+    self.assertEqual(2, len(second))
+    self.assertEqual(['c', 'd'], [key for key in 'abcd' if key in first])
+
+
+  def test_length_follows_the_disk(self):
+    cache = GraphCache(self.dir.name)
+    cache.put('a', '{}')
+    GraphCache(self.dir.name).clear()
+    self.assertEqual(0, len(cache))
+    self.assertNotIn('a', cache)
+
+
+  def test_stale_temporary_files_are_swept(self):
+    stale, fresh = os.path.join(self.dir.name, 'stale.tmp'), os.path.join(self.dir.name, 'fresh.tmp')
+    for path in (stale, fresh):
+      open(path, 'w').close()
+    os.utime(stale, (0, 0))
+    GraphCache(self.dir.name)
+    self.assertEqual(['fresh.tmp'], os.listdir(self.dir.name))
+
+
+  def test_key_depends_on_cache_version(self):
+    cache = GraphCache(self.dir.name)
+    with mock.patch('pyssect.cache.VERSION', 1):
+      old = cache.key(PROGRAM)
+    self.assertNotEqual(old, cache.key(PROGRAM))
+
+
+PROGRAM = """
+x = 1
+while x < 5:
+  if x == 3:
+    break
+  x += 1
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()
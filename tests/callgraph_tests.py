@@ -0,0 +1,136 @@
+from pyssect import builds, CallGraph, ControlEvent, module_imports
+import ast
+import os
+import tempfile
+import unittest
+
+
+class CallGraphTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(CallGraphTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_qualified_names(self):
+    cfg_dict = builds(PROGRAM)
+    self.assertEqual(
+      ['__main__', 'helper', 'A.run', 'A.step', 'B.run', 'B.__init__', 'outer', 'outer.<locals>.helper'],
+      list(cfg_dict)
+    )
+    self.assertEqual('A.run', cfg_dict['A.run'].name)
+
+
+  def test_edges(self):
+    calls = CallGraph(builds(PROGRAM))
+    self.assertEqual(['B.__init__', 'outer'], calls.callees('__main__'))
+    self.assertEqual(['A.step'], calls.callees('A.run'))
+    self.assertEqual(['A.step', 'helper'], calls.callees('B.run'))
+    self.assertEqual(['outer.<locals>.helper'], calls.callees('outer'))
+    self.assertEqual(['A.run', 'B.run'], calls.callers('A.step'))
+    self.assertEqual(ControlEvent.ONCALL, calls.graph.nodes['outer'].children['outer.<locals>.helper'])
+
+
+  def test_sites(self):
+    cfg_dict = builds(PROGRAM)
+    calls = CallGraph(cfg_dict)
+    sites = calls.sites('B.run')
+    self.assertEqual(['While_14_4', 'Return_16_4', 'Return_16_4'], [site.node for site in sites])
+    self.assertEqual(['A.step', 'helper', None], [site.callee for site in sites])
+    for site in sites:
+      self.assertIs(cfg_dict.get(site.callee), calls.resolve(site.call))
+
+
+  def test_project(self):
+    with tempfile.TemporaryDirectory() as root:
+      for path, source in PROJECT.items():
+        os.makedirs(os.path.dirname(os.path.join(root, path)), exist_ok=True)
+        with open(os.path.join(root, path), 'w') as f:
+          f.write(source)
+      calls = CallGraph.for_tree(root)
+
+    self.assertTrue({'app:__main__', 'app:main', 'pkg:__main__', 'pkg.util:helper'} <= set(calls.cfg_dict))
+    self.assertEqual(['pkg.util:Box.__init__', 'pkg.util:helper', 'pkg.util:Box.get'], calls.callees('app:main'))
+    self.assertEqual(['app:main', 'pkg.util:Box.get'], calls.callers('pkg.util:helper'))
+    self.assertEqual(
+      ['pkg.util:Box.__init__', 'pkg.util:helper', None, 'pkg.util:Box.get', None, 'pkg.util:helper'],
+      [site.callee for site in calls.sites('app:main')]
+    )
+
+
+  def test_module_imports(self):
+    tree = ast.parse(PROJECT['app.py'])
+    self.assertEqual(
+      {'u': 'pkg.util', 'helper': 'pkg.helper', 'Box': 'pkg.util.Box', 'os': 'os', 'sibling': 'pkg.sibling'},
+      module_imports(tree, 'app')
+    )
+    tree = ast.parse('from . import util\nfrom ..base import Base\n')
+    self.assertEqual({'util': 'pkg.sub.util', 'Base': 'pkg.base.Base'}, module_imports(tree, 'pkg.sub', True))
+    self.assertEqual({'util': 'pkg.util', 'Base': 'base.Base'}, module_imports(tree, 'pkg.sub'))
+
+
+PROGRAM = """
+def helper(x):
+  return x
+
+class A:
+  def run(self):
+    return self.step()
+
+  def step(self):
+    return 1
+
+class B:
+  def run(self, n):
+    while A.step(self) < n:
+      n -= 1
+    return helper(n) + print(n)
+
+  def __init__(self):
+    pass
+
+def outer():
+  def helper():
+    return 2
+  return helper()
+
+B().run(outer())
+"""
+
+
+PROJECT = {
+  'app.py': """
+import pkg.util as u
+from pkg import helper
+from pkg.util import Box
+import os
+try:
+  from pkg import sibling
+except ImportError:
+  sibling = None
+
+def main():
+  box = Box()
+  u.helper(box.get())
+  u.Box.get(box)
+  os.getcwd()
+  return helper(2)
+""",
+  os.path.join('pkg', '__init__.py'): """
+from .util import helper
+""",
+  os.path.join('pkg', 'util.py'): """
+def helper(x):
+  return x
+
+class Box:
+  def __init__(self):
+    pass
+
+  def get(self):
+    return helper(1)
+"""
+}
+
+
+if __name__ == '__main__':
+  unittest.main()
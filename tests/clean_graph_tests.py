@@ -0,0 +1,80 @@
+from pyssect import builds
+import unittest
+
+
+class CleanGraphTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(CleanGraphTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_nested_loops(self):
+    cfg = builds(NESTED_LOOPS)['f']
+    cfg.clean_graph()
+    self.assertEqual(NESTED_LOOPS_CHILDREN, self._children(cfg))
+    self.assertEqual('root', cfg.cur)
+
+
+  def test_removes_chains_of_empty_nodes(self):
+    cfg = builds(EMPTY_CHAIN)['f']
+    cfg.clean_graph()
+    self.assertEqual(EMPTY_CHAIN_CHILDREN, self._children(cfg))
+
+
+  def test_no_removable_nodes_remain(self):
+    cfg = builds(EMPTY_CHAIN)['f']
+    cfg.clean_graph()
+    self.assertFalse([node.name for node in cfg.nodes.values() if cfg._can_remove(node)])
+
+
+  def _children(self, cfg):
+    return {name: {child: event.value for child, event in node.children.items()} for name, node in cfg.nodes.items()}
+
+
+NESTED_LOOPS = """
+def f(x):
+  x = 1
+  for i in x:
+    if i:
+      for j in i:
+        x += j
+  return x
+"""
+NESTED_LOOPS_CHILDREN = {
+  "root": {"For_4_2": ""},
+  "For_4_2": {"If_5_4": "True", "Return_8_2": ""},
+  "If_5_4": {"For_6_6": "True", "exit_If_5_4": ""},
+  "For_6_6": {"AugAssign_7_8": "True", "exit_If_5_4": ""},
+  "AugAssign_7_8": {"For_6_6": ""},
+  "exit_If_5_4": {"For_4_2": ""},
+  "Return_8_2": {}
+}
+
+
+EMPTY_CHAIN = """
+def f(x):
+  x = 1
+  if x:
+    x = 2
+    if x:
+      x = 3
+      if x:
+        return x
+  return 0
+"""
+EMPTY_CHAIN_CHILDREN = {
+  "root": {"If_4_2": ""},
+  "If_4_2": {"Assign_5_4": "True", "exit_If_4_2": ""},
+  "Assign_5_4": {"If_6_4": ""},
+  "If_6_4": {"Assign_7_6": "True", "exit_If_6_4": ""},
+  "Assign_7_6": {"If_8_6": ""},
+  "If_8_6": {"Return_9_8": "", "exit_If_6_4": ""},
+  "Return_9_8": {},
+  "exit_If_6_4": {"exit_If_4_2": ""},
+  "exit_If_4_2": {"Return_10_2": ""},
+  "Return_10_2": {}
+}
+
+
+if __name__ == '__main__':
+  unittest.main()
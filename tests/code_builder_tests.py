@@ -0,0 +1,120 @@
+from pyssect import builds_code, builds_pyc, pyssect_dumps, ControlEvent
+import json
+import os
+import py_compile
+import tempfile
+import unittest
+
+
+class CodetoCFGTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(CodetoCFGTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_branches(self):
+    cfg = builds_code(compile(BRANCHES, '<test>', 'exec'))['f']
+    events = self._events(cfg)
+    self.assertIn(ControlEvent.ONTRUE, events)
+    self.assertIn(ControlEvent.ONFALSE, events)
+    returns = [node for node in cfg.nodes.values() if node.contents[-1].opname.startswith('RETURN')]
+    self.assertEqual(2, len(returns))
+    self.assertTrue(all(not node.children for node in returns))
+
+
+  def test_loop_back_edge(self):
+    cfg = builds_code(compile(LOOP, '<test>', 'exec'))['f']
+    header = next(node for node in cfg.nodes.values() if node.contents[0].opname == 'FOR_ITER')
+    self.assertIn(ControlEvent.ONTRUE, header.children.values())
+    self.assertTrue(any(name in header.children for name in header.parents if name != 'root'))
+
+
+  def test_exception_edges(self):
+    cfg = builds_code(compile(TRY, '<test>', 'exec'))['f']
+    self.assertIn(ControlEvent.ONEXCEPTION, self._events(cfg))
+
+
+  def test_nested_code_objects(self):
+    cfg_dict = builds_code(compile(NESTED, '<test>', 'exec'))
+    self.assertTrue({'__main__', 'outer', 'outer.<locals>.inner'} <= set(cfg_dict))
+
+
+  def test_function_and_pyc(self):
+    def f(x):
+      return x + 1 if x else 0
+    self.assertIn('CodetoCFGTests.test_function_and_pyc.<locals>.f', builds_code(f))
+
+    with tempfile.TemporaryDirectory() as dir:
+      source = os.path.join(dir, 'mod.py')
+      with open(source, 'w') as fp:
+        fp.write(NESTED)
+      cfg_dict = builds_pyc(py_compile.compile(source, cfile=os.path.join(dir, 'mod.pyc')))
+      self.assertEqual(set(builds_code(compile(NESTED, source, 'exec'))), set(cfg_dict))
+
+
+  def test_handler_locations_are_lines(self):
+    for program in (TRY, WITH):
+      cfg = builds_code(compile(program, '<test>', 'exec'))['f']
+      for node in cfg.nodes.values():
+        for location in (node.start, node.end):
+          self.assertIs(int, type(location.line), f"{node.name} {location}")
+          self.assertLessEqual(1, location.line)
+
+
+  def test_serializes_instructions(self):
+    cfg = builds_code(compile(BRANCHES, '<test>', 'exec'))['f']
+    nodes = json.loads(pyssect_dumps(cfg, simple=True))['nodes']
+    self.assertTrue(any(contents == 'RETURN_VALUE' for node in nodes.values() for contents in node['contents']))
+    self.assertEqual(pyssect_dumps(cfg), pyssect_dumps(cfg.freeze()))
+
+
+  def _events(self, cfg):
+    return {event for node in cfg.nodes.values() for event in node.children.values()}
+
+
+BRANCHES = """
+def f(x):
+  if x > 1:
+    return x
+  x += 1
+  return -x
+"""
+
+
+LOOP = """
+def f(xs):
+  total = 0
+  for x in xs:
+    total += x
+  return total
+"""
+
+
+TRY = """
+def f(x):
+  try:
+    x = int(x)
+  except ValueError:
+    x = 0
+  return x
+"""
+
+
+WITH = """
+def f(path):
+  with open(path) as fp:
+    data = fp.read()
+  return data
+"""
+
+
+NESTED = """
+def outer():
+  def inner():
+    return 1
+  return inner
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()
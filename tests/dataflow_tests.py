@@ -0,0 +1,122 @@
+from pyssect import builds, builds_code, solve, live_variables, reaching_definitions, def_use_chains, DataflowAnalysis
+from pyssect.dataflow import Definition, Use
+import unittest
+
+
+class DataflowTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(DataflowTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_liveness(self):
+    live = live_variables(builds(PROGRAM)['f'])
+    self.assertEqual({'n', 'xs'}, live.before['root'])
+    self.assertEqual({'n', 'total', 'xs'}, live.before['For_4_2'])
+    self.assertEqual({'n', 'total', 'x', 'xs'}, live.before['If_5_4'])
+    self.assertEqual({'total'}, live.before['exit_For_4_2'])
+    self.assertEqual(set(), live.after['Return_11_2'])
+
+
+  def test_bytecode_swap(self):
+    cfg = builds_code(compile(SWAP, '<test>', 'exec'))['f']
+    self.assertEqual({'a', 'b'}, live_variables(cfg).before[cfg.root])
+    self.assertEqual({'a', 'b', 'c'}, {d.variable for d in reaching_definitions(cfg).after[cfg.root]})
+    chains = def_use_chains(cfg)
+    self.assertEqual({'a', 'b', 'c'}, {use.variable for use in chains.definitions if chains.definitions[use]})
+
+
+  def test_reaching_definitions(self):
+    reaching = reaching_definitions(builds(PROGRAM)['f'])
+    total = Definition('root', 0, 'total')
+    self.assertEqual({total}, reaching.after['root'])
+    loop = {total, Definition('AugAssign_6_6', 0, 'total'), Definition('Assign_8_6', 0, 'y')}
+    self.assertEqual(loop, reaching.before['For_4_2'] - {Definition('For_4_2', 0, 'x')})
+    self.assertEqual(loop | {Definition('For_4_2', 0, 'x')}, reaching.before['If_5_4'])
+    self.assertEqual(
+      {Definition('Assign_10_4', 0, 'total'), Definition('Assign_8_6', 0, 'y'), Definition('For_4_2', 0, 'x')},
+      reaching.after['Assign_10_4']
+    )
+
+
+  def test_def_use_chains(self):
+    chains = def_use_chains(builds(PROGRAM)['f'])
+    self.assertEqual(
+      {Definition('root', 0, 'total'), Definition('AugAssign_6_6', 0, 'total'), Definition('Assign_10_4', 0, 'total')},
+      chains.definitions[Use('Return_11_2', 0, 'total')]
+    )
+    self.assertEqual(set(), chains.definitions[Use('If_5_4', 0, 'n')])
+    self.assertEqual(
+      {Use('If_5_4', 0, 'x'), Use('AugAssign_6_6', 0, 'x'), Use('Assign_8_6', 0, 'x')},
+      chains.uses[Definition('For_4_2', 0, 'x')]
+    )
+    self.assertEqual(set(), chains.uses[Definition('Assign_8_6', 0, 'y')])
+
+
+  def test_statements_in_order(self):
+    chains = def_use_chains(builds(SEQUENCE)['g'])
+    node = chains.definitions[Use('root', 1, 'a')]
+    self.assertEqual({Definition('root', 0, 'a')}, node)
+    self.assertEqual(set(), chains.definitions[Use('root', 0, 'b')])
+    self.assertNotIn(Use('root', 2, 'i'), chains.definitions)
+
+
+  def test_custom_analysis(self):
+    class Depth(DataflowAnalysis):
+      """Longest acyclic distance from the root, capped to keep the lattice finite"""
+      def initial(self, cfg):
+        return 0
+
+      def join(self, a, b):
+        return max(a, b)
+
+      def transfer(self, node, fact):
+        return min(fact + 1, 20)
+
+    result = solve(builds(PROGRAM)['f'], Depth())
+    self.assertEqual(0, result.before['root'])
+    self.assertEqual(1, result.after['root'])
+    self.assertEqual(20, result.after['Return_11_2'])
+
+
+  def test_incomplete_analysis(self):
+    class Incomplete(DataflowAnalysis):
+      def initial(self, cfg):
+        return 0
+
+    with self.assertRaises(TypeError):
+      Incomplete()
+
+
+PROGRAM = """
+def f(xs, n):
+  total = 0
+  for x in xs:
+    if x > n:
+      total += x
+    else:
+      y = x
+  while total > 100:
+    total = total // 2
+  return total
+"""
+
+
+SWAP = """
+def f(a, b):
+  a, b = b, a
+  c = a
+  return a - b - c
+"""
+
+
+SEQUENCE = """
+def g(b):
+  a = b
+  print(a)
+  c = [i for i in a]
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,120 @@
+from pyssect import builds, diff, diff_graphs, apply_patch, pyssect_dumps, pyssect_loads, ControlEvent, Location
+from pyssect.diff import match_nodes
+import json
+import unittest
+
+
+class DiffTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(DiffTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_unchanged(self):
+    self.assertFalse(diff(builds(PROGRAM), builds(PROGRAM)))
+
+
+  def test_inserted_line_moves_nodes(self):
+    old, new = builds(PROGRAM), builds(PROGRAM.replace('  total = 0\n', '  total = 0\n  count = 0\n'))
+    patch = diff(old, new)
+    self.assertEqual(['__main__', 'f', 'C.m'], list(patch.changed))
+    self.assertEqual({}, patch.changed['C.m'].changed_nodes)
+    self.assertEqual(
+      {'While_13_4', 'AugAssign_14_6', 'exit_While_13_4', 'Return_15_4'}, set(patch.changed['C.m'].moved_nodes)
+    )
+
+    graph_patch = patch.changed['f']
+    self.assertEqual([], graph_patch.removed_nodes)
+    self.assertEqual([], graph_patch.added_nodes)
+    self.assertEqual([], graph_patch.removed_edges)
+    self.assertEqual([], graph_patch.added_edges)
+    self.assertEqual(
+      {
+        'For_4_2': 1, 'If_5_4': 1, 'AugAssign_6_6': 1, 'exit_If_5_4': 1, 'AugAssign_8_6': 1, 'exit_For_4_2': 1,
+        'Return_9_2': 1
+      },
+      graph_patch.moved_nodes
+    )
+    self.assertEqual({'root'}, set(graph_patch.changed_nodes))
+    self.assertEqual(Location(4, 11), graph_patch.changed_nodes['root']['end'])
+    self.assertEqual(2, len(graph_patch.changed_nodes['root']['contents']))
+
+
+  def test_added_branch(self):
+    old = builds(PROGRAM)
+    new = builds(PROGRAM.replace('      total -= 1\n', '      total -= 1\n      if x < 0:\n        break\n'))
+    graph_patch = diff_graphs(old['f'], new['f'])
+    self.assertEqual({'Return_9_2': 2}, graph_patch.moved_nodes)
+    self.assertEqual(['If_9_6', 'Break_10_8', 'exit_If_9_6'], [node.name for node in graph_patch.added_nodes])
+    self.assertIn(('AugAssign_8_6', 'If_9_6', ControlEvent.PASS), graph_patch.added_edges)
+    self.assertIn(('Break_10_8', 'exit_For_4_2', ControlEvent.ONBREAK), graph_patch.added_edges)
+    self.assertEqual([('AugAssign_8_6', 'exit_If_5_4')], graph_patch.removed_edges)
+
+
+  def test_matching_ignores_names(self):
+    old = builds(PROGRAM)['C.m']
+    new = builds('\n\n' + PROGRAM)['C.m']
+    self.assertEqual(
+      {'root': 'root', 'While_13_4': 'While_15_4', 'AugAssign_14_6': 'AugAssign_16_6',
+       'exit_While_13_4': 'exit_While_15_4', 'Return_15_4': 'Return_17_4'},
+      match_nodes(old, new)
+    )
+
+
+  def test_apply(self):
+    sources = [
+      PROGRAM,
+      PROGRAM.replace('  total = 0\n', '  total = 0\n  count = 0\n'),
+      PROGRAM.replace('    else:\n      total -= 1\n', ''),
+      PROGRAM.replace('class C:', 'def g():\n  return 1\n\nclass C:'),
+      PROGRAM.replace('while n:', 'for _ in range(n):'),
+      PROGRAM.replace('def f(xs):', 'def h(xs):')
+    ]
+    for old_source in sources:
+      for new_source in sources:
+        old, new = builds(old_source), builds(new_source)
+        patched = apply_patch(builds(old_source), diff(old, new))
+        self.assertEqual(_normalized(new), _normalized(patched))
+
+
+  def test_serialized_patch(self):
+    old, new = builds(PROGRAM), builds(PROGRAM.replace('  total = 0\n', '  total = 0\n  count = 0\n'))
+    patch = json.loads(pyssect_dumps(diff(old, new), indent=None))
+    self.assertEqual({'removed', 'added', 'changed'}, set(patch))
+    self.assertEqual(1, patch['changed']['f']['moved_nodes']['Return_9_2'])
+    self.assertEqual(['total = 0', 'count = 0'], patch['changed']['f']['changed_nodes']['root']['contents'])
+    self.assertLess(len(pyssect_dumps(diff(old, new))), len(pyssect_dumps(new)) / 4)
+
+
+def _normalized(cfg_dict):
+  """The json of a build with node and edge order left out, which patches do not keep"""
+  loaded = json.loads(pyssect_dumps(cfg_dict))
+  return {
+    key: {**cfg, 'nodes': {
+      name: {**node, 'parents': sorted(node['parents'].items()), 'children': sorted(node['children'].items())}
+      for name, node in sorted(cfg['nodes'].items())
+    }}
+    for key, cfg in sorted(loaded.items())
+  }
+
+
+PROGRAM = """
+def f(xs):
+  total = 0
+  for x in xs:
+    if x > 2:
+      total += x
+    else:
+      total -= 1
+  return total
+
+class C:
+  def m(self, n):
+    while n:
+      n -= 1
+    return n
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()
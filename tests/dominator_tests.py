@@ -0,0 +1,78 @@
+from pyssect import builds, pyssect_dumps, ControlEvent, PyssectGraph, PyssectNode
+import unittest
+
+
+class DominatorTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(DominatorTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_dominators(self):
+    cfg = builds(PROGRAM)['f']
+    dominators = cfg.dominators()
+    self.assertEqual(None, dominators.immediate('root'))
+    self.assertEqual('While_3_2', dominators.immediate('If_4_4'))
+    self.assertEqual('While_3_2', dominators.immediate('exit_While_3_2'))
+    self.assertTrue(dominators.dominates('While_3_2', 'Return_7_2'))
+    self.assertTrue(dominators.dominates('Return_7_2', 'Return_7_2'))
+    self.assertFalse(dominators.strictly_dominates('Return_7_2', 'Return_7_2'))
+    self.assertFalse(dominators.dominates('If_4_4', 'Return_7_2'))
+    self.assertEqual(['Continue_5_6', 'exit_If_4_4'], dominators.children('If_4_4'))
+
+
+  def test_post_dominators(self):
+    cfg = builds(PROGRAM)['f']
+    post_dominators = cfg.post_dominators()
+    self.assertEqual(None, post_dominators.immediate('Return_7_2'))
+    self.assertEqual('While_3_2', post_dominators.immediate('If_4_4'))
+    self.assertTrue(post_dominators.dominates('Return_7_2', 'root'))
+    self.assertFalse(post_dominators.dominates('If_4_4', 'While_3_2'))
+
+
+  def test_unreachable(self):
+    cfg = PyssectGraph('test', 'a', 'a', {
+      'a': PyssectNode(name='a', children={'b': ControlEvent.PASS}),
+      'b': PyssectNode(name='b', parents={'a': ControlEvent.PASS}),
+      'c': PyssectNode(name='c', children={'c': ControlEvent.PASS}, parents={'c': ControlEvent.PASS})
+    })
+    self.assertNotIn('c', cfg.dominators())
+    self.assertFalse(cfg.dominators().dominates('a', 'c'))
+    self.assertNotIn('c', cfg.post_dominators())
+    self.assertEqual(2, len(cfg.dominators()))
+
+
+  def test_cached_until_changed(self):
+    cfg = builds(PROGRAM)['f']
+    dominators = cfg.dominators()
+    self.assertIs(dominators, cfg.dominators())
+
+    cfg.go_to('If_4_4')
+    cfg.attach_child(cfg.nodes['Return_7_2'], ControlEvent.ONTRUE)
+    self.assertIsNot(dominators, cfg.dominators())
+    self.assertEqual('While_3_2', cfg.dominators().immediate('Return_7_2'))
+
+    post_dominators = cfg.post_dominators()
+    cfg.clean_graph()
+    self.assertIsNot(post_dominators, cfg.post_dominators())
+
+
+  def test_not_serialized(self):
+    cfg = builds(PROGRAM)['f']
+    serialized = pyssect_dumps(cfg)
+    cfg.dominators()
+    self.assertEqual(serialized, pyssect_dumps(cfg))
+
+
+PROGRAM = """
+def f(x):
+  while x < 10:
+    if x == 5:
+      continue
+    x += 1
+  return x
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,98 @@
+from pyssect import builds, pyssect_dumps, structural_hash, structural_hashes, ControlEvent, DedupStore, PyssectNode
+import json
+import unittest
+
+
+class StructuralHashTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(StructuralHashTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_same_shape(self):
+    hashes = structural_hashes(builds(PROGRAM))
+    self.assertEqual(hashes['get_a'], hashes['get_b'])
+    self.assertEqual(hashes['loop_a'], hashes['loop_b'])
+    self.assertNotEqual(hashes['get_a'], hashes['loop_a'])
+
+
+  def test_contents(self):
+    hashes = structural_hashes(builds(PROGRAM), contents=True)
+    self.assertEqual(hashes['get_a'], hashes['get_b'])
+    self.assertNotEqual(hashes['loop_a'], hashes['loop_b'])
+
+
+  def test_event_labels(self):
+    cfg_dict = builds(PROGRAM)
+    a, b = cfg_dict['loop_a'], cfg_dict['loop_b']
+    self.assertEqual(structural_hash(a), structural_hash(b))
+    b.nodes['If_15_4'].children['Assign_16_6'] = ControlEvent.ONBREAK
+    b._invalidate()
+    self.assertNotEqual(structural_hash(a), structural_hash(b))
+
+
+  def test_cached_until_changed(self):
+    cfg = builds(PROGRAM)['get_a']
+    first = structural_hash(cfg)
+    cfg.attach_child(PyssectNode(name='extra'))
+    self.assertNotEqual(first, structural_hash(cfg))
+
+
+class DedupStoreTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(DedupStoreTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_round_trip(self):
+    cfg_dict = builds(PROGRAM, do_clean=True)
+    store = DedupStore()
+    store.update(cfg_dict)
+    self.assertEqual(list(cfg_dict), list(store))
+    for name, cfg in cfg_dict.items():
+      self.assertEqual(cfg, store[name])
+
+
+  def test_shares_shapes(self):
+    store = DedupStore()
+    store.update(builds(PROGRAM))
+    self.assertEqual(3, len(store.shapes))
+    self.assertEqual(['get_a', 'get_b'], store.keys_by_shape()[store.shape_of('get_a')])
+    self.assertIs(store.frozen('loop_a').succ_targets, store.frozen('loop_b').succ_targets)
+
+
+  def test_serialized(self):
+    store = DedupStore()
+    store.update(builds(PROGRAM))
+    serialized = json.loads(pyssect_dumps(store))
+    self.assertEqual(3, len(serialized['shapes']))
+    loop = serialized['graphs']['loop_b']
+    self.assertEqual('root', loop['names'][0])
+    self.assertEqual(
+      [[1, '']],
+      serialized['shapes'][loop['shape']]['children'][0]
+    )
+    self.assertEqual(['for x in xs:\n    ...'], loop['contents'][1])
+
+
+PROGRAM = """
+def get_a(self):
+  return self.a
+
+def get_b(self):
+  return self.b
+
+def loop_a(xs):
+  for x in xs:
+    if x:
+      print(x)
+
+def loop_b(xs):
+  for x in xs:
+    if x:
+      x = 1
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()
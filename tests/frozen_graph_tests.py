@@ -0,0 +1,58 @@
+from pyssect import builds, pyssect_dumps, ControlEvent, PyssectGraph, PyssectNode
+import unittest
+
+
+class FrozenGraphTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(FrozenGraphTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_round_trip(self):
+    for cfg in builds(PROGRAM).values():
+      self.assertEqual(cfg, cfg.freeze().thaw())
+
+
+  def test_edges(self):
+    frozen = builds(PROGRAM)['f'].freeze()
+    header = frozen.ids['While_3_2']
+    self.assertEqual(
+      [('If_4_4', ControlEvent.ONTRUE), ('exit_While_3_2', ControlEvent.PASS)],
+      [(frozen.names[i], event) for i, event in frozen.successors(header)]
+    )
+    self.assertEqual(
+      ['root', 'Continue_5_6', 'exit_If_4_4'],
+      [frozen.names[i] for i, _ in frozen.predecessors(header)]
+    )
+    self.assertEqual(sum(len(node.children) for node in builds(PROGRAM)['f'].nodes.values()), frozen.num_edges)
+
+
+  def test_walk(self):
+    cfg = PyssectGraph('test', 'a', 'a', {
+      'a': PyssectNode(name='a', children={'b': ControlEvent.PASS, 'c': ControlEvent.PASS}),
+      'b': PyssectNode(name='b', parents={'a': ControlEvent.PASS}, children={'c': ControlEvent.PASS}),
+      'c': PyssectNode(name='c', parents={'a': ControlEvent.PASS, 'b': ControlEvent.PASS}),
+      'd': PyssectNode(name='d')
+    })
+    frozen = cfg.freeze()
+    self.assertEqual(['a', 'b', 'c'], [frozen.names[i] for i in frozen.walk()])
+
+
+  def test_serializes_like_graph(self):
+    for cfg in builds(PROGRAM).values():
+      self.assertEqual(pyssect_dumps(cfg), pyssect_dumps(cfg.freeze()))
+      self.assertEqual(pyssect_dumps(cfg, simple=True), pyssect_dumps(cfg.freeze(), simple=True))
+
+
+PROGRAM = """
+def f(x):
+  while x < 10:
+    if x == 5:
+      continue
+    x += 1
+  return x
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()
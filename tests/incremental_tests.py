@@ -0,0 +1,82 @@
+from pyssect import builds, pyssect_dumps, IncrementalBuilder
+import unittest
+
+
+class IncrementalBuilderTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(IncrementalBuilderTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def assertMatchesBuild(self, source, cfg_dict, do_clean):
+    self.assertEqual(pyssect_dumps(builds(source, do_clean)), pyssect_dumps(cfg_dict))
+
+
+  def test_edit_inside_function(self):
+    for do_clean in [False, True]:
+      inc = IncrementalBuilder(PROGRAM, do_clean)
+      previous = dict(inc.cfg_dict)
+      source = PROGRAM.replace('  if x:\n    return 1\n', '  if x:\n    x += 1\n    return x\n')
+      cfg_dict = inc.update(source, 5, 5)
+
+      self.assertMatchesBuild(source, cfg_dict, do_clean)
+      self.assertIsNot(previous['a'], cfg_dict['a'])
+      for name in ['b', 'b.<locals>.inner', 'C.m', 'C.n']:
+        self.assertIs(previous[name], cfg_dict[name])
+
+
+  def test_insert_lines_before_definitions(self):
+    for do_clean in [False, True]:
+      inc = IncrementalBuilder(PROGRAM, do_clean)
+      previous = dict(inc.cfg_dict)
+      source = '# header\n\n' + PROGRAM
+      cfg_dict = inc.update(source, 1, 0)
+
+      self.assertMatchesBuild(source, cfg_dict, do_clean)
+      self.assertEqual((20, 22), inc.spans['C.m'])
+      for name in ['a', 'b', 'b.<locals>.inner', 'C.m', 'C.n']:
+        self.assertIs(previous[name], cfg_dict[name])
+
+
+  def test_successive_edits(self):
+    inc = IncrementalBuilder(PROGRAM)
+    source = PROGRAM.replace('x = a(1)\n', '')
+    self.assertMatchesBuild(source, inc.update(source, 26, 26), False)
+
+    source = source.replace('    y += i\n', '    y += i\n    y -= 1\n')
+    self.assertMatchesBuild(source, inc.update(source, 12, 12), False)
+
+    source = '\n' + source
+    self.assertMatchesBuild(source, inc.update(source, 1, 0), False)
+
+
+PROGRAM = """import os
+
+def a(x):
+  if x:
+    return 1
+  return 2
+
+@dec
+def b(y):
+  for i in y:
+    y += i
+  def inner():
+    return 1
+  return y
+
+class C:
+  z = 1
+  def m(self):
+    while self.x:
+      self.x -= 1
+  if z:
+    def n(self):
+      return 2
+
+x = a(1)
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,97 @@
+from pyssect import builds, builds_lazy, pyssect_dumps, Instrumentation, JsonLinesSink, ReportSink, LoggingSink, Sink
+from pyssect.instrumentation import current
+import io
+import json
+import logging
+import unittest
+
+
+class InstrumentationTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(InstrumentationTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_phases_and_counters(self):
+    with Instrumentation() as instrumentation:
+      cfg_dict = builds(PROGRAM, do_clean=True)
+      pyssect_dumps(cfg_dict)
+      summary = instrumentation.summary()
+
+    self.assertEqual({'parse', 'visit', 'clean', 'serialize'}, set(summary['phases']))
+    self.assertEqual(1, summary['phases']['visit']['calls'])
+    counters = summary['counters']
+    self.assertEqual(3, counters['graphs'])
+    self.assertEqual(sum(len(cfg.nodes) for cfg in cfg_dict.values()), counters['nodes'] - counters['nodes_removed'])
+    self.assertGreater(counters['nodes_removed'], 0)
+    self.assertIsNone(current())
+
+
+  def test_function_callback(self):
+    built = []
+    with Instrumentation(on_function=lambda name, cfg, seconds: built.append((name, len(cfg.nodes)))):
+      builds(PROGRAM)
+      builds_lazy(PROGRAM)['C.m']
+    self.assertEqual(['f', 'C.m', 'C.m'], [name for name, _ in built])
+
+
+  def test_json_lines_sink(self):
+    fp = io.StringIO()
+    with Instrumentation(JsonLinesSink(fp)):
+      builds(PROGRAM)
+    records = [json.loads(line) for line in fp.getvalue().splitlines()]
+    self.assertEqual(['function', 'function', 'summary'], [record['event'] for record in records])
+    self.assertEqual('C.m', records[1]['name'])
+    self.assertEqual(3, records[-1]['counters']['graphs'])
+
+
+  def test_report_sink(self):
+    stream = io.StringIO()
+    with Instrumentation(ReportSink(stream)):
+      builds(PROGRAM)
+    report = stream.getvalue()
+    self.assertIn('ncalls  tottime  percall phase', report)
+    self.assertIn(' parse\n', report)
+    self.assertIn(' nodes\n', report)
+
+
+  def test_logging_sink(self):
+    with self.assertLogs('pyssect', logging.INFO) as logs:
+      with Instrumentation(LoggingSink()):
+        builds(PROGRAM)
+    self.assertEqual(1, len(logs.records))
+    self.assertIn('summary', logs.output[0])
+
+
+  def test_sink_requires_emit(self):
+    class Silent(Sink):
+      pass
+
+    with self.assertRaises(TypeError):
+      Silent()
+
+
+  def test_disabled(self):
+    self.assertIsNone(current())
+    cfg_dict = builds(PROGRAM)
+    with Instrumentation():
+      self.assertEqual(pyssect_dumps(cfg_dict), pyssect_dumps(builds(PROGRAM)))
+
+
+PROGRAM = """
+def f(x):
+  if x:
+    return 1
+  return 2
+
+class C:
+  def m(self):
+    while self.x:
+      self.x -= 1
+
+print(f(1))
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()
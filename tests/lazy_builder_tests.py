@@ -0,0 +1,76 @@
+from pyssect import builds, builds_lazy, pyssect_dumps
+from unittest import mock
+import unittest
+
+
+class LazyBuilderTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(LazyBuilderTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_matches_eager_build(self):
+    for do_clean in [False, True]:
+      eager, lazy = builds(PROGRAM, do_clean), builds_lazy(PROGRAM, do_clean)
+      self.assertEqual(list(eager), list(lazy))
+      for name in eager:
+        self.assertEqual(pyssect_dumps(eager[name]), pyssect_dumps(lazy[name]))
+
+
+  def test_builds_on_access(self):
+    lazy = builds_lazy(PROGRAM)
+    with mock.patch('pyssect.builders.ASTtoCFG.visit_While') as visit_while:
+      self.assertIn('C.m', lazy)
+      self.assertEqual(5, len(lazy))
+      lazy['f']
+      lazy['__main__']
+      visit_while.assert_not_called()
+      lazy['C.m']
+      visit_while.assert_called_once()
+
+
+  def test_memoized(self):
+    lazy = builds_lazy(PROGRAM)
+    self.assertIs(lazy['f.<locals>.g'], lazy['f.<locals>.g'])
+    with self.assertRaises(KeyError):
+      lazy['g']
+
+
+  def test_skips_unreachable_definitions(self):
+    self.assertEqual(['__main__', 'f'], list(builds_lazy(UNREACHABLE)))
+    self.assertEqual(list(builds(UNREACHABLE)), list(builds_lazy(UNREACHABLE)))
+
+
+PROGRAM = """
+def f(x):
+  if x:
+    def g():
+      try:
+        return 1
+      except ValueError:
+        pass
+  return g
+
+class C:
+  def m(self):
+    while self.x:
+      self.x -= 1
+
+  if True:
+    def n(self):
+      return 2
+
+print(f(1))
+"""
+
+
+UNREACHABLE = """
+def f():
+  return 1
+  def g():
+    pass
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()
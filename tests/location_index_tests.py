@@ -0,0 +1,126 @@
+from pyssect import builds, LocationIndex, NodeSpan, PyssectNode
+from pyssect.locations import IntervalTree
+from pyssect.node import Location
+from unittest import mock
+import pyssect.locations
+import unittest
+
+
+class LocationIndexTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(LocationIndexTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_interval_tree(self):
+    tree = IntervalTree([(5, 9, 'b'), (1, 3, 'a'), (2, 12, 'c'), (10, 11, 'd'), (4, 4, 'e')])
+    self.assertEqual(['a', 'c'], tree.overlapping(3, 3))
+    self.assertEqual(['c', 'e', 'b'], tree.overlapping(4, 6))
+    self.assertEqual(['c', 'd'], tree.overlapping(10, 20))
+    self.assertEqual([], tree.overlapping(13, 20))
+    self.assertEqual([], IntervalTree([]).overlapping(0, 1))
+
+
+  def test_point_queries(self):
+    index = LocationIndex(builds(PROGRAM))
+    self.assertEqual(('f', 'AugAssign_6_6'), index.at(6, 8)[:2])
+    self.assertEqual(
+      [('f', 'AugAssign_6_6'), ('f', 'If_5_4'), ('f', 'For_4_2'), ('__main__', 'FunctionDef_2_0')],
+      [span[:2] for span in index.containing(6, 8)]
+    )
+    self.assertEqual(('C.m', 'While_13_4'), index.at(13)[:2])
+    self.assertEqual(('__main__', 'FunctionDef_12_2'), index.at(12)[:2])
+    self.assertIsNone(index.at(11))
+    self.assertIsNone(index.at(40))
+
+
+  def test_range_queries(self):
+    index = LocationIndex(builds(PROGRAM))
+    spans = index.overlapping(Location(13, 0), Location(15, 4))
+    self.assertEqual(
+      [('__main__', 'FunctionDef_12_2'), ('C.m', 'While_13_4'), ('C.m', 'AugAssign_14_6'), ('C.m', 'Return_15_4')],
+      [span[:2] for span in spans]
+    )
+    self.assertEqual(NodeSpan('C.m', 'Return_15_4', Location(15, 4), Location(15, 12)), spans[-1])
+
+
+  def test_kept_valid(self):
+    cfg_dict = builds(PROGRAM)
+    index = LocationIndex(cfg_dict)
+    self.assertIsNone(index.at(30))
+
+    cfg = cfg_dict['f']
+    cfg.go_to('Return_9_2')
+    cfg.attach_child(PyssectNode('Pass_30_2', 'Pass', Location(30, 2), Location(30, 6), contents=['pass']))
+    self.assertEqual(('f', 'Pass_30_2'), index.at(30)[:2])
+
+    cfg_dict['g'] = builds("\n" * 32 + "x = 1\n")['__main__']
+    self.assertEqual(('g', 'root'), index.at(33)[:2])
+
+
+  def test_outside_functions(self):
+    index = LocationIndex(builds(MODULE))
+    self.assertEqual([('__main__', 'root')], [span[:2] for span in index.containing(1)])
+    self.assertEqual([], index.containing(2))
+    self.assertIsNone(index.at(6))
+    self.assertEqual(('f', 'root'), index.at(4)[:2])
+    self.assertEqual(Location(4, 2), index.at(4).start)
+    self.assertEqual([('__main__', 'FunctionDef_7_0')], [span[:2] for span in index.containing(7)])
+
+
+  def test_unrelated_edits(self):
+    cfg_dict = builds(PROGRAM)
+    index = LocationIndex(cfg_dict)
+    tree = index.tree()
+    builds(PROGRAM)['f'].clean_graph()
+    self.assertIs(tree, index.tree())
+    cfg_dict['f']._invalidate()
+    self.assertIsNot(tree, index.tree())
+
+
+
+  def test_rebuilds_changed_graphs_only(self):
+    cfg_dict = builds(PROGRAM)
+    index = LocationIndex(cfg_dict)
+    index.tree()
+    with mock.patch('pyssect.locations._intervals', wraps=pyssect.locations._intervals) as intervals:
+      self.assertEqual(('f', 'AugAssign_6_6'), index.at(6, 8)[:2])
+      self.assertEqual(('C.m', 'AugAssign_14_6'), index.at(14)[:2])
+      intervals.assert_not_called()
+      cfg_dict['f']._invalidate()
+      self.assertEqual(('C.m', 'AugAssign_14_6'), index.at(14)[:2])
+      self.assertEqual(['f'], [call.args[0] for call in intervals.call_args_list])
+
+
+PROGRAM = """
+def f(xs):
+  total = 0
+  for x in xs:
+    if x > 2:
+      total += x
+    else:
+      total -= 1
+  return total
+
+class C:
+  def m(self, n):
+    while n:
+      n -= 1
+    return n
+"""
+
+
+MODULE = """x = 1
+
+def f(a):
+  b = a
+  return b
+
+def g(a):
+  c = a
+  return c
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,118 @@
+from pyssect import builds, drop_ast, collect_metrics, graph_metrics, pyssect_dumps, pyssect_loads
+from pyssect import GraphMetrics, MetricsTable
+from pyssect.metrics import COLUMNS
+import json
+import unittest
+
+
+class MetricsTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(MetricsTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_graph_metrics(self):
+    cfg_dict = builds(PROGRAM)
+    metrics = graph_metrics(cfg_dict['f'])
+    self.assertEqual((12, 14, 4, 2, 2), metrics[:5])
+    self.assertEqual(metrics.edges, sum(metrics.events))
+    self.assertEqual(GraphMetrics(5, 4, 2, 1, 0, (0,) * 10 + (4,)), graph_metrics(cfg_dict['g']))
+
+
+  def test_cached_until_edited(self):
+    cfg = builds(PROGRAM)['g']
+    metrics = graph_metrics(cfg)
+    self.assertIs(metrics, graph_metrics(cfg))
+    cfg.clean_graph()
+    self.assertEqual((metrics.nodes - 1, metrics.edges - 1), graph_metrics(cfg)[:2])
+
+
+  def test_nested_loops(self):
+    cfg = builds('def h(n):\n  for i in range(n):\n    while i:\n      for j in range(i):\n        i -= j\n')['h']
+    metrics = graph_metrics(cfg)
+    self.assertEqual((4, 3, 3), (metrics.cyclomatic, metrics.max_nesting, metrics.loops))
+
+
+  def test_elif_chain(self):
+    cfg_dict = builds(CHAIN)
+    self.assertEqual(1, graph_metrics(cfg_dict['flat']).max_nesting)
+    self.assertEqual(1, graph_metrics(cfg_dict['else_if']).max_nesting)
+    self.assertEqual(2, graph_metrics(cfg_dict['nested']).max_nesting)
+    self.assertEqual(2, graph_metrics(cfg_dict['else_block']).max_nesting)
+
+    # Records and rendered contents give the numbers of the ast
+    keys = ['flat', 'else_if', 'nested', 'else_block']
+    expected = [graph_metrics(cfg_dict[key]).max_nesting for key in keys]
+    rendered = pyssect_loads(pyssect_dumps(cfg_dict))
+    for other in [drop_ast(builds(CHAIN)), drop_ast(builds(CHAIN), headers=False), rendered]:
+      self.assertEqual(expected, [graph_metrics(other[key]).max_nesting for key in keys])
+
+
+  def test_table(self):
+    table = collect_metrics({'a.py': builds(PROGRAM), 'b.py': builds('def f():\n  return 1\n')})
+    self.assertEqual(['a.py:__main__', 'a.py:f', 'a.py:g', 'b.py:__main__', 'b.py:f'], table.keys)
+    self.assertEqual([1, 4, 2, 1, 1], list(table['cyclomatic']))
+    self.assertEqual(graph_metrics(builds(PROGRAM)['g']).nodes, table.row('a.py:g')['nodes'])
+    self.assertEqual(['f', 'g'], collect_metrics(builds(PROGRAM), MetricsTable()).keys[1:])
+
+    dumped = json.loads(pyssect_dumps(table, indent=None))
+    self.assertEqual(['keys', *COLUMNS], list(dumped))
+    self.assertEqual([0, 1, 0, 0, 0], dumped['edges_oncontinue'])
+
+
+PROGRAM = """
+def f(xs):
+  total = 0
+  for x in xs:
+    if x > 2:
+      total += x
+      continue
+    else:
+      total -= 1
+    while x:
+      x -= 1
+  return total
+
+def g(x):
+  if x:
+    return 1
+  return 2
+"""
+
+
+CHAIN = """
+def flat(a):
+  if a == 1:
+    return 1
+  elif a == 2:
+    return 2
+  elif a == 3:
+    return 3
+  else:
+    return 4
+
+def else_if(a):
+  if a == 1:
+    return 1
+  else:
+    if a == 2:
+      return 2
+
+def nested(a):
+  if a:
+    if a == 2:
+      return 2
+  return 1
+
+def else_block(a):
+  if a == 1:
+    return 1
+  else:
+    a += 1
+    if a == 2:
+      return 2
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,95 @@
+from pyssect import builds, builds_file, drop_ast, rehydrate, rehydrate_file, pyssect_dumps, structural_hash
+from pyssect import ASTtoCFG, GraphCache, Location, StatementRecord, live_variables
+import ast
+import gc
+import json
+import os
+import tempfile
+import unittest
+import weakref
+
+
+class RecordsTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(RecordsTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_records(self):
+    cfg_dict = builds(PROGRAM, records=True)
+    self.assertEqual(
+      [StatementRecord('For', Location(4, 2), Location(8, 16), 'for x in xs:\n    ...')],
+      cfg_dict['f'].nodes['For_4_2'].contents
+    )
+    self.assertEqual(pyssect_dumps(builds(PROGRAM)), pyssect_dumps(cfg_dict))
+    self.assertEqual(structural_hash(builds(PROGRAM)['f'], True), structural_hash(cfg_dict['f'], True))
+
+
+  def test_without_headers(self):
+    cfg_dict = drop_ast(builds(PROGRAM), headers=False)
+    node = json.loads(pyssect_dumps(cfg_dict))['f']['nodes']['Return_9_2']
+    self.assertEqual(
+      [{'type': 'Return', 'start': {'line': 9, 'column': 2}, 'end': {'line': 9, 'column': 14}}],
+      node['contents']
+    )
+
+
+  def test_frees_ast(self):
+    tree = ast.parse(PROGRAM)
+    loop = weakref.ref(tree.body[0].body[1])
+    cfg_dict = drop_ast(ASTtoCFG().build(tree))
+    del tree
+    gc.collect()
+    self.assertIsNone(loop())
+    self.assertEqual('For', cfg_dict['f'].nodes['For_4_2'].contents[0].type)
+
+
+  def test_rehydrate(self):
+    cfg_dict = rehydrate(builds(PROGRAM, records=True), PROGRAM)
+    loop = cfg_dict['f'].nodes['For_4_2'].contents[0]
+    self.assertIsInstance(loop, ast.For)
+    self.assertEqual(4, loop.lineno)
+    self.assertEqual(
+      live_variables(builds(PROGRAM)['f']).before['If_5_4'], live_variables(cfg_dict['f']).before['If_5_4']
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, 'program.py')
+      with open(path, 'w') as f:
+        f.write(PROGRAM)
+      cfg_dict = rehydrate_file(builds_file(path, records=True), path)
+    self.assertIsInstance(cfg_dict['C.m'].nodes['While_13_4'].contents[0], ast.While)
+
+
+  def test_cache_excludes_records(self):
+    with tempfile.TemporaryDirectory() as directory:
+      with self.assertRaisesRegex(ValueError, 'either cache or records'):
+        builds(PROGRAM, cache=GraphCache(directory), records=True)
+
+
+  def test_rehydrate_mismatch(self):
+    cfg_dict = builds(PROGRAM, records=True)
+    with self.assertRaisesRegex(ValueError, r'No FunctionDef statement at \(2, 0, 9, 14\)'):
+      rehydrate(cfg_dict, '\n' + PROGRAM)
+
+
+PROGRAM = """
+def f(xs):
+  total = 0
+  for x in xs:
+    if x > 2:
+      total += x
+    else:
+      total -= 1
+  return total
+
+class C:
+  def m(self, n):
+    while n:
+      n -= 1
+    return n
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()
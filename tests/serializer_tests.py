@@ -0,0 +1,207 @@
+from pyssect import builds, drop_ast, pyssect_dumps, pyssect_dump, pyssect_iterdumps, pyssect_loads, SchemaError
+from pyssect import ControlEvent, Location, PyssectNode, StatementRecord
+from pyssect import DedupStore, collect_metrics, diff, diff_graphs
+from pyssect.serializers import SCHEMA_VERSION, render_ast
+from unittest import mock
+import ast
+import io
+import json
+import pickle
+import unittest
+
+
+class StreamingSerializerTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(StreamingSerializerTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_dump_matches_dumps(self):
+    for simple in [False, True]:
+      for indent in [None, 2]:
+        fp = io.StringIO()
+        pyssect_dump(builds(PROGRAM), fp, indent=indent, simple=simple, chunk_size=64)
+        self.assertEqual(pyssect_dumps(builds(PROGRAM), indent=indent, simple=simple), fp.getvalue())
+
+
+  def test_chunks(self):
+    chunks = list(pyssect_iterdumps(builds(PROGRAM), chunk_size=100))
+    self.assertGreater(len(chunks), 1)
+    self.assertTrue(all(len(chunk) >= 100 for chunk in chunks[:-1]))
+
+
+  def test_renders_lazily(self):
+    cfg_dict = builds(PROGRAM)
+    with mock.patch('pyssect.serializers.ast.unparse', wraps=ast.unparse) as unparse:
+      chunks = pyssect_iterdumps(cfg_dict, chunk_size=1)
+      next(chunks)
+      self.assertEqual(0, unparse.call_count)
+      list(chunks)
+      self.assertGreater(unparse.call_count, 0)
+
+
+class RenderTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(RenderTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_dumps_is_non_destructive(self):
+    cfg_dict = builds(PROGRAM)
+    loop = cfg_dict['__main__'].nodes['For_3_0'].contents[0]
+    first = pyssect_dumps(cfg_dict)
+    self.assertEqual(1, len(loop.body))
+    self.assertIsInstance(loop.body[0], ast.If)
+    self.assertEqual(first, pyssect_dumps(cfg_dict))
+
+
+  def test_renders_are_memoized(self):
+    cfg_dict = builds(PROGRAM)
+    pyssect_dumps(cfg_dict)
+    with mock.patch('pyssect.serializers.ast.unparse', wraps=ast.unparse) as unparse:
+      pyssect_dumps(cfg_dict)
+      unparse.assert_not_called()
+
+
+  def test_try(self):
+    node = ast.parse(TRY).body[0]
+    self.assertEqual("try:\n    ...\nexcept ValueError:\n    ...\nfinally:\n    ...", render_ast(node))
+    self.assertEqual(2, len(node.body))
+
+
+class LayoutTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(LayoutTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_slotted_nodes(self):
+    node = builds(PROGRAM)['__main__'].nodes['For_3_0']
+    self.assertFalse(hasattr(node, '__dict__'))
+    self.assertFalse(hasattr(node.start, '__dict__'))
+    copied = pickle.loads(pickle.dumps(node))
+    self.assertEqual(
+      (node.name, node.start, node.end, node.children), (copied.name, copied.start, copied.end, copied.children)
+    )
+
+
+  def test_node_layout(self):
+    node = json.loads(pyssect_dumps(builds(PROGRAM)))['__main__']['nodes']['For_3_0']
+    self.assertEqual(['name', 'type', 'start', 'end', 'parents', 'children', 'contents'], list(node))
+    self.assertEqual({'line': 3, 'column': 0}, node['start'])
+    self.assertEqual({'line': 7, 'column': 10}, node['end'])
+
+
+class LoadsTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(LoadsTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_round_trip(self):
+    text = pyssect_dumps(builds(PROGRAM))
+    cfg_dict = pyssect_loads(text)
+    self.assertEqual(text, pyssect_dumps(cfg_dict))
+    node = cfg_dict['__main__'].nodes['For_3_0']
+    self.assertEqual(Location(3, 0), node.start)
+    self.assertIs(ControlEvent.ONTRUE, node.children['If_4_2'])
+    self.assertEqual(['for i in range(x):\n    ...'], node.contents)
+
+
+  def test_kinds(self):
+    cfg_dict = builds(PROGRAM)
+    text = pyssect_dumps(cfg_dict['__main__'])
+    self.assertEqual(text, pyssect_dumps(pyssect_loads(text)))
+    node = cfg_dict['__main__'].nodes['For_3_0']
+    self.assertEqual(node.children, pyssect_loads(pyssect_dumps(node)).children)
+    self.assertEqual(Location(3, 0), pyssect_loads(pyssect_dumps(node.start)))
+    self.assertEqual(Location(3, 0), pyssect_loads('{"line": 3, "column": 0}', kind='location'))
+
+
+  def test_simple(self):
+    cfg = pyssect_loads(pyssect_dumps(builds(PROGRAM), simple=True))['__main__']
+    node = cfg.nodes['If_4_2']
+    self.assertEqual(('If_4_2', '', Location()), (node.name, node.type, node.start))
+    self.assertEqual({'For_3_0': ControlEvent.ONTRUE}, node.parents)
+
+
+  def test_contents_stay_opaque(self):
+    cfg_dict = drop_ast(builds(PROGRAM), headers=False)
+    cfg_dict['__main__'].nodes['exit_For_3_0'].contents.append({'line': 1, 'column': 2})
+    contents = pyssect_loads(pyssect_dumps(cfg_dict))['__main__'].nodes['exit_For_3_0'].contents
+    self.assertEqual([StatementRecord('Expr', Location(8, 0), Location(8, 8)), {'line': 1, 'column': 2}], contents)
+
+
+  def test_schema_errors(self):
+    text = pyssect_dumps(builds(PROGRAM), indent=None)
+    node = r'^\$\.__main__\.nodes\.'
+    cases = [
+      (text.replace('"True"', '"maybe"', 1), node + r'For_3_0\.children\.If_4_2: unknown control event'),
+      (text.replace('"column": 0', '"column": "0"', 1), node + r'root\.start\.column: expected an integer'),
+      (text.replace('"name": "For_3_0"', '"name": "For_3_1"'), node + r'For_3_0\.name: node'),
+      (text.replace('"children": {"If_4_2"', '"children": {"If_9_9"'), node + r'For_3_0\.children: edge to'),
+      (text.replace('"cur"', '"current"'), r"^\$\.__main__: missing graph field 'cur'"),
+      ('[]', r'^\$: expected an object, found list')
+    ]
+    for broken, message in cases:
+      with self.assertRaisesRegex(SchemaError, message):
+        pyssect_loads(broken)
+
+    records = pyssect_dumps(drop_ast(builds(PROGRAM), headers=False), indent=None)
+    with self.assertRaisesRegex(SchemaError, node + r'exit_For_3_0\.contents\[0\]\.start\.line: expected an integer'):
+      pyssect_loads(records.replace('"start": {"line": 8', '"start": {"line": "8"'))
+    self.assertIsInstance(SchemaError('$', ''), ValueError)
+
+
+  def test_versions(self):
+    text = pyssect_dumps(builds(PROGRAM), indent=None)
+    self.assertEqual(SCHEMA_VERSION, json.loads(text)['__main__']['version'])
+    self.assertEqual(SCHEMA_VERSION, json.loads(pyssect_dumps(builds(PROGRAM)['__main__'].freeze()))['version'])
+    legacy = text.replace(f'"version": {SCHEMA_VERSION}, ', '')
+    self.assertNotIn('"version"', legacy)
+    self.assertEqual(text, pyssect_dumps(pyssect_loads(legacy), indent=None))
+    with self.assertRaisesRegex(SchemaError, r'^\$\.__main__\.version: unsupported schema version 3'):
+      pyssect_loads(text.replace(f'"version": {SCHEMA_VERSION}', '"version": 3'))
+
+
+  def test_other_layouts(self):
+    cfg_dict = builds(PROGRAM)
+    edited = builds(PROGRAM.replace('x -= i', 'x -= 2 * i'))
+    store = DedupStore()
+    store.add('__main__', cfg_dict['__main__'])
+    for obj, layout in [
+      (collect_metrics(cfg_dict), 'MetricsTable'),
+      (store, 'DedupStore'),
+      (diff(cfg_dict, edited), 'Patch'),
+      (diff_graphs(cfg_dict['__main__'], edited['__main__']), 'GraphPatch')
+    ]:
+      with self.assertRaisesRegex(SchemaError, rf'^\$: found the layout of a {layout}, only builds'):
+        pyssect_loads(pyssect_dumps(obj))
+    with self.assertRaisesRegex(SchemaError, r'^\$\.a: expected an object, found an integer'):
+      pyssect_loads('{"a": 1}')
+
+
+PROGRAM = """
+x = 1
+for i in range(x):
+  if i % 2:
+    x += i
+  else:
+    x -= i
+print(x)
+"""
+
+
+TRY = """
+try:
+  x = 1
+  y = 2
+except ValueError:
+  pass
+finally:
+  print(x)
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()
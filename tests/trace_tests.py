@@ -0,0 +1,162 @@
+from pyssect import builds, LineIndex, PyssectGraph, TraceOverlay
+from pyssect.node import ControlEvent
+import sys
+import threading
+import unittest
+
+
+class TraceTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(TraceTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def test_line_index(self):
+    index = LineIndex(builds(PROGRAM)['f'])
+    self.assertEqual('For_4_2', index.node(4))
+    self.assertEqual('If_5_4', index.node(5))
+    self.assertEqual('AugAssign_6_6', index.node(6))
+    self.assertEqual('AugAssign_8_6', index.node(8))
+    self.assertEqual('Return_9_2', index.node(9))
+    self.assertEqual('If_5_4', index.node(7))
+    self.assertEqual('root', index.node(3))
+    self.assertIsNone(index.node(2))
+    self.assertIsNone(index.node(10))
+    self.assertEqual('Return_9_2', LineIndex(builds(PROGRAM)['f'], 10).node(19))
+
+
+  def test_for_code(self):
+    code = compile(PROGRAM, '<trace>', 'exec')
+    overlay = TraceOverlay.for_code(builds(PROGRAM), code)
+    with overlay:
+      exec(code, {})
+
+    graphs = {cfg.name: (nodes, edges) for cfg, nodes, edges in overlay.overlays()}
+    self.assertEqual({'__main__', 'f', 'C.m'}, set(graphs))
+
+    nodes, edges = graphs['f']
+    self.assertEqual(5, nodes['For_4_2'])
+    self.assertEqual(2, nodes['AugAssign_6_6'])
+    self.assertEqual(2, nodes['AugAssign_8_6'])
+    self.assertEqual(4, nodes['exit_If_5_4'])
+    self.assertEqual(1, nodes['Return_9_2'])
+    self.assertEqual(4, edges['For_4_2', 'If_5_4', ControlEvent.ONTRUE])
+    self.assertEqual(2, edges['If_5_4', 'AugAssign_6_6', ControlEvent.ONTRUE])
+    self.assertEqual(2, edges['If_5_4', 'AugAssign_8_6', ControlEvent.ONFALSE])
+    self.assertEqual(4, edges['exit_If_5_4', 'For_4_2', ControlEvent.PASS])
+    self.assertEqual(1, edges['exit_For_4_2', 'Return_9_2', ControlEvent.PASS])
+
+    nodes, edges = graphs['C.m']
+    self.assertEqual(4, nodes['While_13_4'])
+    self.assertEqual(3, edges['While_13_4', 'AugAssign_14_6', ControlEvent.ONTRUE])
+    self.assertEqual(3, edges['AugAssign_14_6', 'While_13_4', ControlEvent.PASS])
+
+
+  def test_for_functions(self):
+    with TraceOverlay.for_functions(countdown) as overlay:
+      countdown(2)
+      countdown(0)
+    countdown(5)
+
+    (cfg, nodes, edges), = overlay.overlays()
+    self.assertEqual('countdown', cfg.name)
+    self.assertEqual(2, nodes['Return_4_2'])
+    self.assertEqual(2, edges['While_2_2', 'AugAssign_3_4', ControlEvent.ONTRUE])
+    self.assertEqual(2, edges['While_2_2', 'exit_While_2_2', ControlEvent.PASS])
+
+
+  def test_untraced(self):
+    overlay = TraceOverlay.for_functions(countdown)
+    countdown(3)
+    (_, nodes, edges), = overlay.overlays()
+    self.assertEqual({}, nodes)
+    self.assertEqual({}, edges)
+
+
+  @unittest.skipUnless(hasattr(sys, 'monitoring'), 'sys.monitoring is new in python 3.12')
+  def test_monitoring_traces_lines_disabled_before(self):
+    # Every line of countdown is disabled by an overlay whose graph has no nodes
+    with TraceOverlay({countdown.__code__: PyssectGraph('countdown')}) as overlay:
+      self.assertIsNotNone(overlay._tool)
+      countdown(2)
+    with TraceOverlay.for_functions(countdown) as overlay:
+      self.assertIsNotNone(overlay._tool)
+      countdown(2)
+
+    (_, nodes, edges), = overlay.overlays()
+    self.assertEqual(1, nodes['Return_4_2'])
+    self.assertEqual(2, edges['While_2_2', 'AugAssign_3_4', ControlEvent.ONTRUE])
+
+
+  @unittest.skipUnless(hasattr(sys, 'monitoring'), 'sys.monitoring is new in python 3.12')
+  def test_monitoring_threads(self):
+    entered, resume = threading.Event(), threading.Event()
+
+    def pause():
+      entered.set()
+      resume.wait(5)
+
+    with TraceOverlay.for_functions(branch) as overlay:
+      first = threading.Thread(target=branch, args=(True, pause))
+      first.start()
+      entered.wait(5)
+      second = threading.Thread(target=branch, args=(False, None))
+      second.start()
+      second.join()
+      resume.set()
+      first.join()
+
+    (_, nodes, edges), = overlay.overlays()
+    self.assertEqual(1, nodes['Assign_3_4'])
+    self.assertEqual(1, nodes['Assign_6_4'])
+    self.assertEqual(2, nodes['Return_7_2'])
+    self.assertEqual(
+      {
+        ('If_2_2', 'Assign_3_4', ControlEvent.ONTRUE): 1,
+        ('Assign_3_4', 'exit_If_2_2', ControlEvent.PASS): 1,
+        ('If_2_2', 'Assign_6_4', ControlEvent.ONFALSE): 1,
+        ('Assign_6_4', 'exit_If_2_2', ControlEvent.PASS): 1,
+        ('exit_If_2_2', 'Return_7_2', ControlEvent.PASS): 2
+      },
+      edges
+    )
+
+
+def countdown(n):
+  while n:
+    n -= 1
+  return n
+
+
+def branch(taken, pause):
+  if taken:
+    x = 1
+    pause()
+  else:
+    x = 2
+  return x
+
+
+PROGRAM = """
+def f(xs):
+  total = 0
+  for x in xs:
+    if x > 2:
+      total += x
+    else:
+      total -= 1
+  return total
+
+class C:
+  def m(self, n):
+    while n:
+      n -= 1
+    return n
+
+f([1, 2, 3, 4])
+C().m(3)
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()
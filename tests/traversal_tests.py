@@ -0,0 +1,70 @@
+from pyssect import builds, ControlEvent, PyssectGraph, PyssectNode
+import unittest
+
+
+class TraversalTests(unittest.TestCase):
+  def __init__(self, *args, **kwargs):
+    super(TraversalTests, self).__init__(*args, **kwargs)
+    self.maxDiff = None
+
+
+  def names(self, nodes):
+    return [node.name for node in nodes]
+
+
+  def test_orders(self):
+    cfg = diamond()
+    self.assertEqual(['a', 'b', 'c', 'd', 'e'], self.names(cfg.bfs()))
+    self.assertEqual(['a', 'b', 'd', 'e', 'c'], self.names(cfg.dfs()))
+    self.assertEqual(['e', 'd', 'b', 'c', 'a'], self.names(cfg.postorder()))
+    self.assertEqual(['a', 'c', 'b', 'd', 'e'], self.names(cfg.reverse_postorder()))
+    self.assertEqual(['d', 'b', 'e'], self.names(cfg.bfs('d')))
+
+
+  def test_does_not_move_current_node(self):
+    cfg = builds(PROGRAM)['f']
+    cfg.go_to('If_4_4')
+    bfs, dfs = cfg.bfs(), cfg.dfs()
+    interleaved = [node.name for pair in zip(bfs, dfs) for node in pair]
+    self.assertEqual(2 * len(cfg.nodes), len(interleaved))
+    list(cfg.postorder())
+    self.assertEqual('If_4_4', cfg.cur)
+
+
+  def test_reverse_postorder_is_cached(self):
+    cfg = diamond()
+    order = cfg._reverse_postorder('a')
+    self.assertIs(order, cfg._reverse_postorder('a'))
+    cfg.go_to('c')
+    cfg.attach_child(PyssectNode(name='f'))
+    self.assertEqual(['a', 'c', 'f', 'b', 'd', 'e'], self.names(cfg.reverse_postorder()))
+
+
+def diamond() -> PyssectGraph:
+  return PyssectGraph('test', 'a', 'a', {
+    'a': PyssectNode(name='a', children={'b': ControlEvent.ONTRUE, 'c': ControlEvent.ONFALSE}),
+    'b': PyssectNode(
+      name='b', parents={'a': ControlEvent.ONTRUE, 'd': ControlEvent.PASS}, children={'d': ControlEvent.PASS}
+    ),
+    'c': PyssectNode(name='c', parents={'a': ControlEvent.ONFALSE}, children={'d': ControlEvent.PASS}),
+    'd': PyssectNode(
+      name='d',
+      parents={'b': ControlEvent.PASS, 'c': ControlEvent.PASS},
+      children={'b': ControlEvent.PASS, 'e': ControlEvent.PASS}
+    ),
+    'e': PyssectNode(name='e', parents={'d': ControlEvent.PASS})
+  })
+
+
+PROGRAM = """
+def f(x):
+  while x < 10:
+    if x == 5:
+      continue
+    x += 1
+  return x
+"""
+
+
+if __name__ == '__main__':
+  unittest.main()